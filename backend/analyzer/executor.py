@@ -0,0 +1,486 @@
+import asyncio
+import gc
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from analyzer.sentiment import SentimentAnalyzer
+from analyzer.keywords import KeywordExtractor
+from analyzer.memo import MEMO_SCHEMA_VERSION, AnalysisMemo
+from analyzer.tokens import MorphTokenizer
+from analyzer.topk import SpaceSaving
+from utils.metrics import STAGE_SECONDS, registry
+
+logger = logging.getLogger(__name__)
+
+COMMENTS_ANALYZED = registry.counter("analyzer_comments_total", "分析したコメント数")
+MEMO_LOOKUPS = registry.counter(
+    "analyzer_memo_lookups_total", "コメント単位の分析結果メモの参照件数", ["result"]
+)
+ANALYZER_PATHS = registry.counter(
+    "analyzer_path_total",
+    "分析器の経路ごとのコメント数（janome/simple・oseti/dictionary/simpleなどフォールバックの使用状況）",
+    ["component", "path"],
+)
+
+# 単語の出現回数（厳密なCounterまたは近似のSpaceSaving）
+WordCounts = Union[Counter, SpaceSaving]
+
+# ワーカー（プロセスまたはスレッド）ごとの分析器
+_worker_state = threading.local()
+
+# プロセス内で共有するコメント単位の分析結果メモ
+_memo: Optional[AnalysisMemo] = None
+_memo_pid: Optional[int] = None
+_memo_lock = threading.Lock()
+
+# fork前に読み込んだ分析器（フォーク先のプロセスがコピーオンライトで共有する）
+_preloaded: Optional[Tuple[SentimentAnalyzer, KeywordExtractor, MorphTokenizer]] = None
+_preloaded_claimed_pid: Optional[int] = None
+_preload_lock = threading.Lock()
+
+
+def preload_analyzers() -> None:
+    """
+    分析器（辞書）を現在のプロセスで読み込む
+
+    ワーカーをforkする前に呼び出すと、各ワーカーは辞書を読み込み直さずに
+    親プロセスのメモリをコピーオンライトで共有する。
+    """
+    global _preloaded
+    with _preload_lock:
+        if _preloaded is None:
+            _preloaded = (SentimentAnalyzer(), KeywordExtractor(), MorphTokenizer())
+            # 読み込んだオブジェクトをGCの走査対象から外し、fork後のページ複製を防ぐ
+            gc.freeze()
+            logger.info("fork前に分析器を読み込みました")
+
+
+def _claim_preloaded() -> Optional[Tuple[SentimentAnalyzer, KeywordExtractor, MorphTokenizer]]:
+    """読み込み済みの分析器を取得（各プロセスで最初の1ワーカーのみ）"""
+    global _preloaded_claimed_pid
+    with _preload_lock:
+        if _preloaded is None or _preloaded_claimed_pid == os.getpid():
+            return None
+        _preloaded_claimed_pid = os.getpid()
+        return _preloaded
+
+
+def _init_worker() -> None:
+    """ワーカー起動時に分析器を一度だけ初期化"""
+    if getattr(_worker_state, "sentiment_analyzer", None) is None:
+        analyzers = _claim_preloaded() or (SentimentAnalyzer(), KeywordExtractor(), MorphTokenizer())
+        (_worker_state.sentiment_analyzer,
+         _worker_state.keyword_extractor,
+         _worker_state.tokenizer) = analyzers
+
+
+def _get_memo() -> AnalysisMemo:
+    """分析結果メモを取得（プロセスごとに一度だけ生成）"""
+    global _memo, _memo_pid
+    with _memo_lock:
+        # fork元で生成されたメモ（SQLite接続を含む）は引き継がずに作り直す
+        if _memo is None or _memo_pid != os.getpid():
+            _memo_pid = os.getpid()
+            sentiment_analyzer = _worker_state.sentiment_analyzer
+            if _worker_state.tokenizer.available:
+                # osetiは形態素解析のエラー時にしか使わないため、ここでは生成しない
+                text_sentiment = "oseti" if sentiment_analyzer.oseti_enabled else "simple"
+            else:
+                text_sentiment = "oseti" if sentiment_analyzer.analyzer else "simple"
+            # 分析方式・極性辞書（SENTIMENT_LEXICON_PATH）・メモの形式が変わった場合に
+            # 古い結果を使わないよう、それらをキーに含める
+            namespace = "-".join([
+                f"v{MEMO_SCHEMA_VERSION}",
+                "morph" if _worker_state.tokenizer.available else "text",
+                "dict" if sentiment_analyzer.word_polarity else "nodict",
+                text_sentiment,
+                sentiment_analyzer.lexicon.fingerprint,
+            ])
+            _memo = AnalysisMemo(
+                max_entries=int(os.getenv("ANALYSIS_MEMO_SIZE", "50000")),
+                path=os.getenv("ANALYSIS_MEMO_PATH") or None,
+                namespace=namespace,
+            )
+        return _memo
+
+
+def _analyze_text(text: str) -> Tuple[str, List[str]]:
+    """単一コメントの感情ラベルと単語リストを求める"""
+    sentiment_analyzer = _worker_state.sentiment_analyzer
+    keyword_extractor = _worker_state.keyword_extractor
+    tokenizer = _worker_state.tokenizer
+
+    if not tokenizer.available:
+        return sentiment_analyzer.analyze_text(text), keyword_extractor.extract_words(text)
+
+    # 1回の形態素解析結果を感情分析とキーワード抽出で共有する
+    try:
+        tokens = tokenizer.tokenize(text)
+    except Exception as e:
+        logger.error("形態素解析エラー: %s", e)
+        return sentiment_analyzer.analyze_text(text), keyword_extractor.extract_words(text, tokenize=False)
+
+    return sentiment_analyzer.analyze_tokens(tokens), keyword_extractor.extract_words_from_tokens(tokens)
+
+
+def _analyze_texts(texts: List[str], seconds: Dict[str, float]) -> List[Tuple[str, List[str]]]:
+    """
+    複数コメントの感情ラベルと単語リストを求める
+
+    形態素解析はコメントごとに行い、感情スコアはまとめて計算する。
+
+    Args:
+        texts: 分析対象のテキストリスト
+        seconds: 段階（tokenize・sentiment・keywords）ごとの所要時間の加算先
+    """
+    sentiment_analyzer = _worker_state.sentiment_analyzer
+    keyword_extractor = _worker_state.keyword_extractor
+    tokenizer = _worker_state.tokenizer
+
+    if not tokenizer.available:
+        started = time.perf_counter()
+        labels = [sentiment_analyzer.analyze_text(text) for text in texts]
+        seconds['sentiment'] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        words = [keyword_extractor.extract_words(text) for text in texts]
+        seconds['keywords'] += time.perf_counter() - started
+        return list(zip(labels, words))
+
+    results: List[Optional[Tuple[str, List[str]]]] = [None] * len(texts)
+    token_lists = []
+    token_indices = []
+    started = time.perf_counter()
+    for index, text in enumerate(texts):
+        try:
+            token_lists.append(tokenizer.tokenize(text))
+            token_indices.append(index)
+        except Exception as e:
+            logger.error("形態素解析エラー: %s", e)
+            results[index] = (sentiment_analyzer.analyze_text(text), keyword_extractor.extract_words(text, tokenize=False))
+    seconds['tokenize'] += time.perf_counter() - started
+
+    started = time.perf_counter()
+    labels = sentiment_analyzer.analyze_tokens_batch(token_lists)
+    seconds['sentiment'] += time.perf_counter() - started
+
+    started = time.perf_counter()
+    for index, tokens, label in zip(token_indices, token_lists, labels):
+        results[index] = (label, keyword_extractor.extract_words_from_tokens(tokens))
+    seconds['keywords'] += time.perf_counter() - started
+    return results
+
+
+def new_word_counts(topk_capacity: Optional[int] = None) -> WordCounts:
+    """単語の集計先を生成（容量を指定した場合は近似上位K件カウンター）"""
+    return SpaceSaving(topk_capacity) if topk_capacity else Counter()
+
+
+def _analyze_distinct(texts: List[str]) -> Tuple[List[Tuple[Tuple[str, List[str]], List[int]]], Dict[str, Any]]:
+    """
+    チャンク内の重複を除いたコメントごとに分析結果を求める（ワーカー内で実行）
+
+    メモにないコメントは集めてからまとめて分析し、結果をメモに登録する。
+
+    Returns:
+        ((感情ラベル, 単語リスト), textsでの位置のリスト) のリストと計測値
+        計測値はメモのヒット・ミス件数、段階ごとの所要時間（seconds）、分析器の経路ごとの件数（paths）
+    """
+    _init_worker()
+    memo = _get_memo()
+    sentiment_analyzer = _worker_state.sentiment_analyzer
+    keyword_extractor = _worker_state.keyword_extractor
+
+    memo_stats = {'memo_hits': 0, 'memo_misses': 0}
+    seconds = {'tokenize': 0.0, 'sentiment': 0.0, 'keywords': 0.0}
+    sentiment_paths = Counter(sentiment_analyzer.path_counts)
+    keyword_paths = Counter(keyword_extractor.path_counts)
+
+    # {テキスト: チャンク内の位置}。同じコメントは1回だけ参照・分析する
+    positions: Dict[str, List[int]] = {}
+    for index, text in enumerate(texts):
+        positions.setdefault(text, []).append(index)
+
+    results: List[Tuple[Tuple[str, List[str]], List[int]]] = []
+    pending: List[str] = []
+    for text, indices in positions.items():
+        entry = memo.get(text)
+        if entry is None:
+            # 2件目以降の重複は1件目の分析結果を使うためヒットとして数える
+            memo_stats['memo_misses'] += 1
+            memo_stats['memo_hits'] += len(indices) - 1
+            pending.append(text)
+        else:
+            memo_stats['memo_hits'] += len(indices)
+            results.append((entry, indices))
+
+    if pending:
+        for text, (label, words) in zip(pending, _analyze_texts(pending, seconds)):
+            memo.set(text, label, words)
+            results.append(((label, words), positions[text]))
+
+    memo.flush()
+
+    # このチャンクで各経路を通ったコメント数（プロセスワーカーの場合は呼び出し元で集計する）
+    paths = {f"sentiment.{path}": count for path, count in (sentiment_analyzer.path_counts - sentiment_paths).items()}
+    paths.update({f"keywords.{path}": count for path, count in (keyword_extractor.path_counts - keyword_paths).items()})
+    return results, {**memo_stats, 'seconds': seconds, 'paths': paths}
+
+
+def analyze_chunk(texts: List[str], topk_capacity: Optional[int] = None) -> Tuple[Dict[str, int], WordCounts, Dict[str, Any]]:
+    """
+    コメントのチャンクを分析（ワーカー内で実行）
+
+    Args:
+        texts: 分析対象のテキストリスト
+        topk_capacity: 指定した場合は単語を近似集計し、保持する単語数をこの件数に制限する
+
+    Returns:
+        (感情別の件数辞書, 単語の出現回数, 計測値)
+        計測値はメモのヒット・ミス件数、段階ごとの所要時間（seconds）、分析器の経路ごとの件数（paths）
+    """
+    distinct, metrics = _analyze_distinct(texts)
+
+    sentiment_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
+    word_counts = new_word_counts(topk_capacity)
+    for (label, words), indices in distinct:
+        occurrences = len(indices)
+        sentiment_counts[label] += occurrences
+        if occurrences == 1:
+            word_counts.update(words)
+        else:
+            # 同じコメントの重複分は回数を掛けて1回で加算する（Counter・SpaceSavingとも{単語: 回数}を受け付ける）
+            word_counts.update({word: count * occurrences for word, count in Counter(words).items()})
+
+    return sentiment_counts, word_counts, metrics
+
+
+def analyze_each_chunk(texts: List[str]) -> Tuple[List[Tuple[str, List[str]]], Dict[str, Any]]:
+    """
+    コメントのチャンクをコメント単位で分析（ワーカー内で実行）
+
+    集計せずにコメントごとの結果を返す（コメントストアへの保存用）。
+
+    Args:
+        texts: 分析対象のテキストリスト
+
+    Returns:
+        ((感情ラベル, 単語リスト)のリスト（textsと同じ順）, 計測値（analyze_chunkと同じ形式）)
+    """
+    distinct, metrics = _analyze_distinct(texts)
+
+    results: List[Optional[Tuple[str, List[str]]]] = [None] * len(texts)
+    for entry, indices in distinct:
+        for index in indices:
+            results[index] = entry
+    return results, metrics
+
+
+class AnalysisExecutor:
+    """感情分析・キーワード抽出をイベントループ外のワーカーで実行するクラス"""
+
+    def __init__(self, mode: str = "process", max_workers: Optional[int] = None, min_chunk_size: int = 50,
+                 topk_capacity: Optional[int] = None):
+        """
+        Args:
+            mode: 'process'（プロセスプール）または 'thread'（スレッドプール）
+            max_workers: ワーカー数（省略時はCPUコア数）
+            min_chunk_size: 1チャンクあたりの最小コメント数
+            topk_capacity: 指定した場合はキーワードを近似集計（Space-Saving）し、保持する単語数を制限する
+        """
+        if mode not in ("process", "thread"):
+            raise ValueError(f"不明な実行モードです: {mode}")
+
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_chunk_size = max(1, min_chunk_size)
+        self.topk_capacity = topk_capacity
+        self._executor: Optional[Executor] = None
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=_init_worker
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_worker,
+                    thread_name_prefix="analysis",
+                )
+            logger.info("分析ワーカーを起動しました: mode=%s, workers=%s", self.mode, self.max_workers)
+        return self._executor
+
+    async def warm_up(self) -> None:
+        """全ワーカーを起動して分析器を読み込ませる"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*[
+            loop.run_in_executor(executor, _init_worker) for _ in range(self.max_workers)
+        ])
+        logger.info("分析ワーカーのウォームアップが完了しました")
+
+    def _split_chunks(self, texts: List[str]) -> List[List[str]]:
+        """コメントをワーカー数に応じて分割"""
+        chunk_size = max(self.min_chunk_size, -(-len(texts) // self.max_workers))
+        return [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+    async def analyze(self, texts: List[str], top_n: int = 20) -> Tuple[Dict[str, int], List[Tuple]]:
+        """
+        コメントを分割してワーカーで並列に分析
+
+        Args:
+            texts: 分析対象のテキストリスト
+            top_n: 上位何件のキーワードを返すか
+
+        Returns:
+            (感情別の件数辞書, (キーワード, 出現回数)のタプルリスト)
+            近似集計の場合は (キーワード, 出現回数の上限, 誤差) のタプルリスト
+        """
+        sentiment_counts, word_counts = await self.analyze_counts(texts)
+        return sentiment_counts, word_counts.most_common(top_n)
+
+    def new_word_counts(self, exact: bool = False) -> WordCounts:
+        """analyze_countsの結果を逐次マージするための集計先を生成"""
+        return new_word_counts(None if exact else self.topk_capacity)
+
+    async def analyze_counts(self, texts: List[str], exact: bool = False) -> Tuple[Dict[str, int], WordCounts]:
+        """
+        コメントを分割してワーカーで並列に分析し、集計前の単語カウントを返す
+
+        ページごとの結果を呼び出し側で逐次マージする場合に使用する。
+
+        Args:
+            texts: 分析対象のテキストリスト
+            exact: Trueの場合は近似集計の設定によらず厳密に集計する（Counterを返す）
+
+        Returns:
+            (感情別の件数辞書, 単語の出現回数)
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        topk_capacity = None if exact else self.topk_capacity
+
+        with STAGE_SECONDS.time(stage="analysis"):
+            results = await asyncio.gather(*[
+                loop.run_in_executor(executor, analyze_chunk, chunk, topk_capacity)
+                for chunk in self._split_chunks(texts)
+            ])
+
+        sentiment_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
+        word_counts = new_word_counts(topk_capacity)
+        for chunk_sentiment, chunk_words, _ in results:
+            for label, count in chunk_sentiment.items():
+                sentiment_counts[label] += count
+            word_counts.update(chunk_words)
+
+        self._record_stats(len(texts), [chunk_stats for _, _, chunk_stats in results])
+        return sentiment_counts, word_counts
+
+    async def analyze_each(self, texts: List[str]) -> List[Tuple[str, List[str]]]:
+        """
+        コメントを分割してワーカーで並列に分析し、コメントごとの結果を返す
+
+        Args:
+            texts: 分析対象のテキストリスト
+
+        Returns:
+            (感情ラベル, 単語リスト)のリスト（textsと同じ順）
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+
+        with STAGE_SECONDS.time(stage="analysis"):
+            results = await asyncio.gather(*[
+                loop.run_in_executor(executor, analyze_each_chunk, chunk)
+                for chunk in self._split_chunks(texts)
+            ])
+
+        self._record_stats(len(texts), [chunk_stats for _, chunk_stats in results])
+        return [entry for chunk_results, _ in results for entry in chunk_results]
+
+    def _record_stats(self, comments: int, stats_per_chunk: List[Dict[str, Any]]) -> None:
+        """チャンクごとの計測値をメモのヒット・ミス件数とメトリクスに反映"""
+        memo_hits = memo_misses = 0
+        seconds: Counter = Counter()
+        for chunk_stats in stats_per_chunk:
+            memo_hits += chunk_stats['memo_hits']
+            memo_misses += chunk_stats['memo_misses']
+            seconds.update(chunk_stats['seconds'])
+            for key, count in chunk_stats['paths'].items():
+                component, path = key.split('.', 1)
+                ANALYZER_PATHS.inc(count, component=component, path=path)
+
+        self.memo_hits += memo_hits
+        self.memo_misses += memo_misses
+        COMMENTS_ANALYZED.inc(comments)
+        MEMO_LOOKUPS.inc(memo_hits, result="hit")
+        MEMO_LOOKUPS.inc(memo_misses, result="miss")
+        # 段階ごとの所要時間はワーカーでの処理時間の合計（実行されなかった段階は記録しない）
+        for stage, elapsed in seconds.items():
+            if elapsed > 0:
+                STAGE_SECONDS.observe(elapsed, stage=stage)
+
+    def stats(self) -> Dict[str, object]:
+        """ワーカー設定とコメント単位メモのヒット・ミス件数"""
+        lookups = self.memo_hits + self.memo_misses
+        return {
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "keyword_count_mode": "approximate" if self.topk_capacity else "exact",
+            "memo_hits": self.memo_hits,
+            "memo_misses": self.memo_misses,
+            "memo_hit_rate": self.memo_hits / lookups if lookups else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """ワーカーを停止"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class PageAccumulator:
+    """
+    ページ単位で取得したコメントの分析結果を逐次集計するクラス
+
+    ページごとにワーカーで分析し、感情別件数と単語の出現回数を全体の集計にマージしていく。
+    """
+
+    def __init__(self, executor: AnalysisExecutor):
+        self._executor = executor
+        self.sentiment: Dict[str, int] = {'positive': 0, 'neutral': 0, 'negative': 0}
+        self.word_counts = executor.new_word_counts()
+        self.total_comments = 0
+        self.pages_fetched = 0
+
+    async def add(self, page: List[str]) -> None:
+        """1ページ分のコメントを分析して集計に加える"""
+        page_sentiment, page_words = await self._executor.analyze_counts(page)
+        for label, count in page_sentiment.items():
+            self.sentiment[label] += count
+        self.word_counts.update(page_words)
+        self.total_comments += len(page)
+        self.pages_fetched += 1
+
+
+def create_analysis_executor() -> AnalysisExecutor:
+    """環境変数の設定に従って分析エグゼキューターを生成"""
+    mode = os.getenv("ANALYSIS_EXECUTOR", "process").lower()
+    workers = os.getenv("ANALYSIS_WORKERS")
+    min_chunk_size = int(os.getenv("ANALYSIS_MIN_CHUNK_SIZE", "50"))
+    approximate = os.getenv("KEYWORD_COUNT_MODE", "exact").lower() == "approximate"
+    return AnalysisExecutor(
+        mode=mode,
+        max_workers=int(workers) if workers else None,
+        min_chunk_size=min_chunk_size,
+        topk_capacity=int(os.getenv("KEYWORD_TOPK_CAPACITY", "1000")) if approximate else None,
+    )
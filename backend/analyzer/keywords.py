@@ -1,6 +1,7 @@
-from typing import List, Tuple, Dict
+from typing import Iterable, Iterator, List, Optional, Tuple, Dict, Sequence
 from collections import Counter
 import re
+import string
 import logging
 
 try:
@@ -8,8 +9,24 @@ try:
 except ImportError:
     Tokenizer = None
 
+from analyzer.tokens import Token, major_pos
+from analyzer.topk import SpaceSaving
+
 logger = logging.getLogger(__name__)
 
+# 簡易分割の前処理: ASCII記号を空白に置き換え、数字を除去する
+_SIMPLE_TRANSLATION = str.maketrans({
+    **{symbol: ' ' for symbol in string.punctuation},
+    **{digit: None for digit in string.digits},
+})
+# URL・メールアドレスらしい単語
+_URL_LIKE_PATTERN = re.compile(r'http|@|\.com')
+# 全角・半角の記号と空白のみの単語
+_SYMBOLS_ONLY_PATTERN = re.compile(r'[!-/:-@\\[-`{-~\s　]+')
+
+# 単語ごとの判定結果を保持する最大件数（超えた場合は作り直す）
+WORD_DECISION_CACHE_SIZE = 100000
+
 class KeywordExtractor:
     """日本語テキストからキーワードを抽出するクラス"""
     
@@ -23,8 +40,14 @@ class KeywordExtractor:
                 self.tokenizer = Tokenizer()
                 logger.info("janome形態素解析器を初期化しました")
             except Exception as e:
-                logger.error(f"janome初期化エラー: {e}")
+                logger.error("janome初期化エラー: %s", e)
                 self.tokenizer = None
+
+        # 抽出経路（janome・simple）ごとの処理件数
+        self.path_counts: Counter = Counter()
+
+        # 品詞によらない単語ごとの判定結果 {単語: キーワードとして採用するか}
+        self._word_decisions: Dict[str, bool] = {}
         
         # 除外する品詞
         self.exclude_pos = {
@@ -42,35 +65,63 @@ class KeywordExtractor:
             'w', 'ww', 'www', '笑', 'lol', 'lmao'
         }
     
-    def extract_keywords(self, texts: List[str], top_n: int = 20) -> List[Tuple[str, int]]:
+    def extract_keywords(self, texts: Iterable[str], top_n: int = 20) -> List[Tuple[str, int]]:
         """
         テキストリストからキーワードを抽出
         
         Args:
-            texts: 分析対象のテキストリスト
+            texts: 分析対象のテキスト（リストまたはジェネレーター）
             top_n: 上位何件のキーワードを返すか
             
         Returns:
             (キーワード, 出現回数)のタプルリスト
         """
-        all_words = []
-        
-        for text in texts:
-            words = self._extract_words_from_text(text)
-            all_words.extend(words)
-        
-        # 単語カウント
-        word_counts = Counter(all_words)
+        # 単語カウント（全単語のリストは作らずに逐次集計）
+        word_counts = Counter(self.iter_words(texts))
         
         # 上位キーワード取得
         top_keywords = word_counts.most_common(top_n)
         
-        logger.info(f"キーワード抽出完了: {len(top_keywords)}件")
+        logger.info("キーワード抽出完了: %s件", len(top_keywords))
         return top_keywords
+
+    def extract_keywords_approximate(self, texts: Iterable[str], top_n: int = 20,
+                                     capacity: int = 1000) -> List[Tuple[str, int, int]]:
+        """
+        テキストからキーワードを近似的に抽出（メモリ使用量はcapacityで一定）
+
+        Args:
+            texts: 分析対象のテキスト（リストまたはジェネレーター）
+            top_n: 上位何件のキーワードを返すか
+            capacity: 集計中に保持する単語数の上限
+
+        Returns:
+            (キーワード, 出現回数の上限, 誤差)のタプルリスト。真の出現回数は「上限 - 誤差」以上
+        """
+        summary = SpaceSaving(capacity)
+        summary.update(self.iter_words(texts))
+
+        top_keywords = summary.most_common(top_n)
+        logger.info("キーワード抽出完了（近似）: %s件", len(top_keywords))
+        return top_keywords
+
+    def iter_words(self, texts: Iterable[str]) -> Iterator[str]:
+        """テキストから抽出した単語を順に返す"""
+        for text in texts:
+            yield from self.extract_words(text)
     
-    def _extract_words_from_text(self, text: str) -> List[str]:
-        """単一テキストから意味のある単語を抽出"""
-        if self.tokenizer:
+    def extract_words(self, text: str, tokenize: bool = True) -> List[str]:
+        """
+        単一テキストから意味のある単語を抽出
+
+        Args:
+            text: 分析対象のテキスト
+            tokenize: Falseの場合は形態素解析を行わずに簡易分割する（形態素解析に失敗した場合の代替用）
+
+        Returns:
+            抽出した単語のリスト
+        """
+        if tokenize and self.tokenizer:
             return self._extract_with_janome(text)
         else:
             return self._extract_simple(text)
@@ -81,35 +132,68 @@ class KeywordExtractor:
         
         try:
             for token in self.tokenizer.tokenize(text, wakati=False):
-                # 品詞情報を取得
-                pos = token.part_of_speech.split(',')[0]
                 word = token.surface
-                
-                # フィルタリング条件
-                if (len(word) >= 2 and  # 2文字以上
-                    pos not in self.exclude_pos and  # 除外品詞でない
-                    word not in self.stopwords and  # ストップワードでない
-                    not word.isdigit() and  # 数字でない
-                    self._is_meaningful_word(word)):  # 意味のある単語
-                    
+                if self._is_keyword(word, major_pos(token.part_of_speech)):
                     words.append(word)
                     
         except Exception as e:
-            logger.error(f"形態素解析エラー: {e}")
+            logger.error("形態素解析エラー: %s", e)
             return self._extract_simple(text)
         
+        self.path_counts['janome'] += 1
         return words
     
+    def extract_words_from_tokens(self, tokens: Sequence[Token]) -> List[str]:
+        """
+        形態素解析済みトークン列から意味のある単語を抽出
+
+        Args:
+            tokens: MorphTokenizerで生成したトークン列
+
+        Returns:
+            抽出した単語のリスト
+        """
+        self.path_counts['janome'] += 1
+        exclude_pos = self.exclude_pos
+        decisions = self._word_decisions
+        words = []
+        for token in tokens:
+            if token.pos in exclude_pos:
+                continue
+            accepted = decisions.get(token.surface)
+            if accepted is None:
+                accepted = self._remember_decision(token.surface)
+            if accepted:
+                words.append(token.surface)
+        return words
+
+    def _is_keyword(self, word: str, pos: str) -> bool:
+        """形態素解析結果の単語をキーワードとして採用するか判定"""
+        if pos in self.exclude_pos:  # 除外品詞でない
+            return False
+        accepted = self._word_decisions.get(word)
+        if accepted is None:
+            accepted = self._remember_decision(word)
+        return accepted
+
+    def _remember_decision(self, word: str) -> bool:
+        """品詞によらない判定を行い、結果を保持する"""
+        if len(self._word_decisions) >= WORD_DECISION_CACHE_SIZE:
+            self._word_decisions = {}
+        accepted = self._word_decisions[word] = (
+            len(word) >= 2 and  # 2文字以上
+            word not in self.stopwords and  # ストップワードでない
+            not word.isdigit() and  # 数字でない
+            self._is_meaningful_word(word)  # 意味のある単語
+        )
+        return accepted
+
     def _extract_simple(self, text: str) -> List[str]:
         """簡易的な単語抽出（janomeが利用できない場合）"""
-        # 基本的な前処理
-        text = re.sub(r'[!-/:-@\\[-`{-~]', ' ', text)  # 記号除去
-        text = re.sub(r'[0-9]+', '', text)  # 数字除去
-        text = re.sub(r'\s+', ' ', text)  # 連続する空白を1つに
-        
-        # 空白で分割（簡易的）
-        words = [word.strip() for word in text.split() if word.strip()]
-        
+        self.path_counts['simple'] += 1
+        # 記号を空白に置き換え、数字を除去して空白で分割（簡易的）
+        words = text.translate(_SIMPLE_TRANSLATION).split()
+
         # フィルタリング
         filtered_words = []
         for word in words:
@@ -123,24 +207,30 @@ class KeywordExtractor:
     def _is_meaningful_word(self, word: str) -> bool:
         """単語が意味のあるものかどうかチェック"""
         # URLやメール等を除外
-        if 'http' in word or '@' in word or '.com' in word:
+        if _URL_LIKE_PATTERN.search(word):
             return False
         
         # 全角・半角の記号のみの場合を除外
-        if re.match(r'^[!-/:-@\\[-`{-~\s　]+$', word):
+        if _SYMBOLS_ONLY_PATTERN.fullmatch(word):
             return False
         
         # 連続する同じ文字（笑笑笑等）を除外
-        if len(set(word)) == 1 and len(word) > 2:
+        if len(word) > 2 and word.count(word[0]) == len(word):
             return False
         
         return True
     
-    def get_word_frequency(self, texts: List[str]) -> Dict[str, int]:
-        """全単語の出現頻度辞書を取得"""
-        all_words = []
-        for text in texts:
-            words = self._extract_words_from_text(text)
-            all_words.extend(words)
-        
-        return dict(Counter(all_words))
\ No newline at end of file
+    def get_word_frequency(self, texts: Iterable[str], capacity: Optional[int] = None) -> Dict[str, int]:
+        """
+        全単語の出現頻度辞書を取得
+
+        Args:
+            texts: 分析対象のテキスト（リストまたはジェネレーター）
+            capacity: 指定した場合は近似集計し、出現回数の多い単語をこの件数まで返す
+        """
+        if capacity is None:
+            return dict(Counter(self.iter_words(texts)))
+
+        summary = SpaceSaving(capacity)
+        summary.update(self.iter_words(texts))
+        return dict(summary.to_counter())
\ No newline at end of file
@@ -0,0 +1,213 @@
+from collections import deque
+import hashlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# 簡易感情分析用のキーワード
+POSITIVE_WORDS = [
+    '素晴らしい', '最高', '面白い', 'いいね', '良い', 'よい', 'よかった',
+    'ありがとう', '感動', '楽しい', '嬉しい', 'すごい', 'かっこいい',
+    'きれい', '美しい', '感謝', '好き', '愛', '幸せ', '喜び'
+]
+NEGATIVE_WORDS = [
+    'つまらない', '嫌い', 'ひどい', '最悪', '悪い', 'だめ', 'ダメ',
+    '残念', '微妙', '納得いかない', '腹立つ', '怒', '悲しい',
+    '失望', 'がっかり', '不満', '問題', '困る'
+]
+
+# 直後に続くと極性を反転させる否定表現（長いものから順に照合）
+NEGATION_SUFFIXES = (
+    'じゃなかった', 'ではなかった', 'じゃない', 'ではない',
+    'なかった', 'ません', 'ない', 'なく', 'ず'
+)
+
+
+class LexiconMatch(NamedTuple):
+    """辞書照合の結果"""
+    start: int
+    end: int
+    word: str
+    weight: float
+    negated: bool
+
+
+class PolarityLexicon:
+    """
+    極性辞書をAho-Corasickオートマトンにコンパイルし、テキスト長に比例する時間で照合するクラス
+
+    辞書の語数が増えても1回の走査で全ての語を照合できる。
+    形容詞（「〜い」で終わる語）は連用形「〜く」・過去形「〜かった」も登録し、
+    直後の否定表現（「良くない」など）で極性を反転させる。
+    """
+
+    def __init__(self, entries: Dict[str, float], negations: Iterable[str] = NEGATION_SUFFIXES):
+        """
+        Args:
+            entries: {語: 重み}（正はポジティブ、負はネガティブ）
+            negations: 極性を反転させる否定表現
+        """
+        self.entries: Dict[str, float] = {}
+        for word, weight in entries.items():
+            if not word or weight == 0:
+                continue
+            self.entries[word] = weight
+            # 形容詞の活用形（「面白い」→「面白く」「面白かった」）
+            if len(word) >= 2 and word.endswith('い'):
+                stem = word[:-1]
+                self.entries.setdefault(stem + 'く', weight)
+                self.entries.setdefault(stem + 'かった', weight)
+
+        self.negations = tuple(sorted(set(negations), key=len, reverse=True))
+        self._build()
+
+    @property
+    def fingerprint(self) -> str:
+        """辞書の内容の識別子（外部辞書の変更で分析結果のメモを使い分けるために使用）"""
+        payload = json.dumps([sorted(self.entries.items()), self.negations], ensure_ascii=False)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
+    @classmethod
+    def from_word_lists(cls, positive_words: Iterable[str], negative_words: Iterable[str]) -> 'PolarityLexicon':
+        """ポジティブ・ネガティブの単語リストから重み±1の辞書を生成"""
+        entries = {word: 1.0 for word in positive_words}
+        entries.update({word: -1.0 for word in negative_words})
+        return cls(entries)
+
+    def _build(self) -> None:
+        """goto関数・failure関数・出力リンクを構築"""
+        # 状態ごとの遷移表、状態で終わる語（なければNone）、失敗時の遷移先、
+        # 失敗リンクをたどって最初に見つかる語を持つ状態（出力リンク）
+        self._goto: List[Dict[str, int]] = [{}]
+        self._word_at: List[Optional[str]] = [None]
+        self._fail: List[int] = [0]
+        self._output_link: List[int] = [-1]
+
+        for word in self.entries:
+            state = 0
+            for char in word:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._word_at.append(None)
+                    self._fail.append(0)
+                    self._output_link.append(-1)
+                state = next_state
+            self._word_at[state] = word
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                fail_state = self._fail[next_state]
+                self._output_link[next_state] = (
+                    fail_state if self._word_at[fail_state] is not None else self._output_link[fail_state]
+                )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def find(self, text: str) -> List[LexiconMatch]:
+        """
+        テキスト中の辞書語を検出
+
+        重なり合う語は、開始位置が早いもの・同じ開始位置なら長いものを優先する。
+
+        Args:
+            text: 照合対象のテキスト
+
+        Returns:
+            検出した語のリスト（出現順）
+        """
+        goto = self._goto
+        fail = self._fail
+        word_at = self._word_at
+        output_link = self._output_link
+
+        candidates: List[Tuple[int, int, str]] = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            matched = state if word_at[state] is not None else output_link[state]
+            while matched > 0:
+                word = word_at[matched]
+                end = position + 1
+                candidates.append((end - len(word), end, word))
+                matched = output_link[matched]
+
+        candidates.sort(key=lambda candidate: (candidate[0], -candidate[1]))
+
+        matches = []
+        last_end = 0
+        for start, end, word in candidates:
+            if start < last_end:
+                continue
+            negated = text.startswith(self.negations, end)
+            weight = self.entries[word]
+            matches.append(LexiconMatch(start, end, word, -weight if negated else weight, negated))
+            last_end = end
+        return matches
+
+    def score(self, text: str) -> float:
+        """テキスト中の辞書語の重み（否定を反映）の合計"""
+        return sum(match.weight for match in self.find(text))
+
+
+def load_lexicon_entries(path: str) -> Dict[str, float]:
+    """
+    外部の極性辞書ファイルを読み込む
+
+    JSON（{語: 重み}）または TSV（1行に「語<TAB>重み」、#で始まる行はコメント）に対応する。
+
+    Args:
+        path: 辞書ファイルのパス
+
+    Returns:
+        {語: 重み}
+    """
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return {word: float(weight) for word, weight in json.load(f).items()}
+
+        entries = {}
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split('\t')
+            try:
+                entries[parts[0]] = float(parts[1]) if len(parts) > 1 else 1.0
+            except ValueError:
+                logger.warning("極性辞書の%s行目を読み飛ばしました: %s", line_number, line)
+        return entries
+
+
+def build_default_lexicon() -> PolarityLexicon:
+    """組み込みのキーワードと、SENTIMENT_LEXICON_PATHで指定された外部辞書から極性辞書を生成"""
+    entries = {word: 1.0 for word in POSITIVE_WORDS}
+    entries.update({word: -1.0 for word in NEGATIVE_WORDS})
+
+    path = os.getenv('SENTIMENT_LEXICON_PATH')
+    if path:
+        try:
+            external = load_lexicon_entries(path)
+            entries.update(external)
+            logger.info("外部極性辞書を読み込みました: %s (%s語)", path, len(external))
+        except Exception as e:
+            logger.error("外部極性辞書の読み込みエラー: %s", e)
+
+    return PolarityLexicon(entries)
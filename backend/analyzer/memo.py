@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (感情ラベル, 抽出した単語リスト)
+MemoEntry = Tuple[str, List[str]]
+
+# 分析結果の形式・判定方法を変更した場合に上げる（永続化した古い結果を使わないようキーに含める）
+MEMO_SCHEMA_VERSION = 2
+
+
+class AnalysisMemo:
+    """
+    コメント単位の分析結果をテキストのハッシュをキーに保持するクラス
+
+    メモリ上のLRUに加えて、パスを指定した場合はSQLiteにも保存し再起動後も再利用する。
+    """
+
+    def __init__(self, max_entries: int = 50000, path: Optional[str] = None, namespace: str = ""):
+        """
+        Args:
+            max_entries: メモリ上に保持する最大件数
+            path: 永続化先のSQLiteファイル（省略時はメモリのみ）
+            namespace: 分析方式の識別子（方式が異なる結果を混同しないためキーに含める）
+        """
+        self.max_entries = max(1, max_entries)
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, MemoEntry]" = OrderedDict()
+        self._pending: Dict[str, MemoEntry] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS analysis_memo ("
+                    " key TEXT PRIMARY KEY,"
+                    " label TEXT NOT NULL,"
+                    " words TEXT NOT NULL)"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error("分析メモの永続化を無効にします: %s", e)
+                self._conn = None
+
+    def make_key(self, text: str) -> str:
+        """
+        テキストからメモ化キーを生成
+
+        改行は文の区切り、空白は形態素の区切りとして判定結果に影響するため、テキストは正規化せずにそのまま使う
+        （取得時にnormalize_commentでNFKC正規化済み）。
+        """
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+        return f"{self.namespace}:{digest}"
+
+    def get(self, text: str) -> Optional[MemoEntry]:
+        """
+        分析結果を取得
+
+        Args:
+            text: コメントテキスト
+
+        Returns:
+            (感情ラベル, 単語リスト)。未登録の場合はNone
+        """
+        key = self.make_key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT label, words FROM analysis_memo WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], json.loads(row[1]))
+                    self._store(key, entry)
+                    self.hits += 1
+                    return entry
+
+            self.misses += 1
+            return None
+
+    def set(self, text: str, label: str, words: List[str]) -> None:
+        """分析結果を登録（永続化はflush時にまとめて行う）"""
+        key = self.make_key(text)
+        entry = (label, list(words))
+        with self._lock:
+            self._store(key, entry)
+            if self._conn is not None:
+                self._pending[key] = entry
+
+    def _store(self, key: str, entry: MemoEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def flush(self) -> None:
+        """未保存の分析結果をSQLiteに書き込む"""
+        with self._lock:
+            if self._conn is None or not self._pending:
+                return
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO analysis_memo (key, label, words) VALUES (?, ?, ?)",
+                    [
+                        (key, label, json.dumps(words, ensure_ascii=False))
+                        for key, (label, words) in self._pending.items()
+                    ],
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error("分析メモの保存エラー: %s", e)
+            self._pending.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット・ミス件数の統計情報を取得"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
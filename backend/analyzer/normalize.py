@@ -0,0 +1,33 @@
+import html
+import re
+import unicodedata
+
+# textDisplayに含まれるHTML（<br>・<a href=...>・<b>など）
+_LINE_BREAK_PATTERN = re.compile(r'<br\s*/?>', re.IGNORECASE)
+_TAG_PATTERN = re.compile(r'</?[a-zA-Z][^<>]*>')
+
+
+def strip_markup(text: str) -> str:
+    """
+    YouTube APIのtextDisplayからHTMLタグを除去し、文字参照（&quot;など）を元の文字に戻す
+
+    <br>は改行に置き換え、リンクなどのタグはタグのみを除去して中身のテキストを残す。
+    """
+    if '<' in text:
+        text = _TAG_PATTERN.sub('', _LINE_BREAK_PATTERN.sub('\n', text))
+    if '&' in text:
+        text = html.unescape(text)
+    return text
+
+
+def normalize_comment(text: str) -> str:
+    """
+    コメント本文を分析用に正規化（HTMLの除去とNFKC正規化）
+
+    全角英数字・半角カタカナなどの表記ゆれをNFKCで統一する。
+    タグの除去を文字参照の復元より先に行うため、本文中の「&lt;3」などはタグとして扱われない。
+    """
+    text = strip_markup(text)
+    if not text.isascii():
+        text = unicodedata.normalize('NFKC', text)
+    return text
@@ -1,13 +1,72 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence
+from collections import Counter
+import json
 import logging
+import os
 
 try:
     import oseti
 except ImportError:
     oseti = None
 
+from analyzer.lexicon import build_default_lexicon
+from analyzer.tokens import Token
+from analyzer.vectorized import (
+    BatchSentimentScorer, DICTIONARY_THRESHOLD, LEXICON_THRESHOLD, VECTORIZE_AVAILABLE
+)
+
 logger = logging.getLogger(__name__)
 
+# 直前の極性を反転させる否定表現（osetiと同じ）
+NEGATION_WORDS = ('ない', 'ず', 'ぬ')
+
+# 文の区切りとみなす記号
+SENTENCE_DELIMITERS = frozenset(['。', '！', '？', '!', '?', '\n'])
+
+# oseti感情分析器が未生成であることを表す値
+_NOT_CREATED = object()
+
+
+def _load_oseti_dictionaries():
+    """
+    osetiに同梱されている極性辞書を読み込む
+
+    Returns:
+        (単語辞書 {原形: 極性}, 複数語の和語辞書 {末尾の原形: [(先行する原形のタプル, 極性)]})
+        読み込めない場合は空の辞書
+    """
+    if oseti is None:
+        return {}, {}
+
+    dict_dir = os.path.join(os.path.dirname(oseti.__file__), 'dic')
+    try:
+        with open(os.path.join(dict_dir, 'pn_noun.json'), encoding='utf-8') as f:
+            noun_dict = json.load(f)
+        with open(os.path.join(dict_dir, 'pn_wago.json'), encoding='utf-8') as f:
+            wago_dict = json.load(f)
+    except Exception as e:
+        logger.error("oseti辞書の読み込みエラー: %s", e)
+        return {}, {}
+
+    word_polarity = {}
+    phrase_polarity = {}
+    for phrase, label in wago_dict.items():
+        polarity = 1 if label.startswith('ポジ') else -1
+        *prefix, last = phrase.split(' ')
+        if prefix:
+            phrase_polarity.setdefault(last, []).append((tuple(prefix), polarity))
+        else:
+            word_polarity[phrase] = polarity
+    # 名詞辞書を優先（osetiと同じ）
+    for word, label in noun_dict.items():
+        if label in ('p', 'n'):
+            word_polarity[word] = 1 if label == 'p' else -1
+
+    # 長い表現から順に照合する
+    for candidates in phrase_polarity.values():
+        candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+    return word_polarity, phrase_polarity
+
 class SentimentAnalyzer:
     """日本語テキストの感情分析を行うクラス"""
     
@@ -16,16 +75,51 @@ class SentimentAnalyzer:
         if oseti is None:
             logger.warning("osetiライブラリが見つかりません。簡易な感情分析を使用します。")
             logger.warning("より正確な分析のために: pip install oseti を実行してください")
-            self.analyzer = None
+            self._analyzer = None
         else:
+            # MeCabの読み込みは重いため、テキストのまま分析する場合に初めて生成する
+            self._analyzer = _NOT_CREATED
+
+        # 簡易感情分析用の極性辞書（初期化時に一度だけコンパイル）
+        self.lexicon = build_default_lexicon()
+
+        # 共有トークン列で使用する原形ベースの極性辞書
+        self.word_polarity, self.phrase_polarity = _load_oseti_dictionaries()
+
+        # 分析経路（oseti・dictionary・simple）ごとの処理件数
+        self.path_counts: Counter = Counter()
+
+        # 複数コメントをまとめてスコアリングする行列演算エンジン（numpy・scipyが必要）
+        if VECTORIZE_AVAILABLE:
+            self.batch_scorer = BatchSentimentScorer(
+                self.word_polarity, self.phrase_polarity, self.lexicon, NEGATION_WORDS, SENTENCE_DELIMITERS
+            )
+        else:
+            logger.info("numpy・scipyが見つかりません。感情分析は1件ずつ実行します。")
+            self.batch_scorer = None
+
+    @property
+    def analyzer(self):
+        """oseti感情分析器（初回の参照時に生成し、利用できない場合はNone）"""
+        if self._analyzer is _NOT_CREATED:
             try:
-                self.analyzer = oseti.Analyzer()
+                self._analyzer = oseti.Analyzer()
                 logger.info("oseti感情分析器を初期化しました")
             except Exception as e:
-                logger.error(f"oseti初期化エラー: {e}")
+                logger.error("oseti初期化エラー: %s", e)
                 logger.warning("osetiの初期化に失敗しました。簡易な感情分析を使用します。")
                 logger.warning("解決方法: pip install ipadic-neologd を実行してください")
-                self.analyzer = None
+                self._analyzer = None
+        return self._analyzer
+
+    @analyzer.setter
+    def analyzer(self, value) -> None:
+        self._analyzer = value
+
+    @property
+    def oseti_enabled(self) -> bool:
+        """テキストの分析にosetiを使用するか（未生成の場合は生成を試みない）"""
+        return self._analyzer is not None
     
     def analyze_text(self, text: str) -> str:
         """
@@ -43,6 +137,7 @@ class SentimentAnalyzer:
                 
                 # osetiは複数の感情スコアを返すので、合計で判定
                 total_score = sum(scores)
+                self.path_counts['oseti'] += 1
                 
                 if total_score > 0.1:
                     return 'positive'
@@ -52,11 +147,97 @@ class SentimentAnalyzer:
                     return 'neutral'
                     
             except Exception as e:
-                logger.error(f"感情分析エラー: {e}")
+                logger.error("感情分析エラー: %s", e)
                 return self._simple_sentiment_analysis(text)
         else:
             return self._simple_sentiment_analysis(text)
     
+    def analyze_tokens(self, tokens: Sequence[Token]) -> str:
+        """
+        形態素解析済みトークン列の感情分析
+
+        原形を極性辞書で引いて文ごとにスコアを求め、analyze_textと同じ閾値で判定する。
+        極性辞書が読み込めない場合は簡易感情分析を使用する。
+
+        Args:
+            tokens: MorphTokenizerで生成したトークン列
+
+        Returns:
+            感情ラベル ('positive', 'neutral', 'negative')
+        """
+        if not self.word_polarity:
+            return self._simple_sentiment_analysis(''.join(token.surface for token in tokens))
+
+        self.path_counts['dictionary'] += 1
+        total_score = 0.0
+        polarities: List[int] = []
+        lemmas: List[str] = []
+
+        for token in tokens:
+            if token.surface in SENTENCE_DELIMITERS:
+                total_score += self._sentence_score(polarities)
+                polarities = []
+                lemmas = []
+                continue
+
+            polarity = self._lookup_polarity(token.base_form, lemmas)
+            if polarity is not None:
+                polarities.append(polarity)
+            elif polarities and token.surface in NEGATION_WORDS:
+                polarities[-1] = -polarities[-1]
+            lemmas.append(token.base_form)
+
+        total_score += self._sentence_score(polarities)
+
+        if total_score > 0.1:
+            return 'positive'
+        elif total_score < -0.1:
+            return 'negative'
+        else:
+            return 'neutral'
+
+    def analyze_tokens_batch(self, token_lists: Sequence[Sequence[Token]]) -> List[str]:
+        """
+        複数コメントのトークン列をまとめて感情分析
+
+        行列演算エンジンが利用できる場合はバッチ全体を一度にスコアリングする。
+        結果はトークン列ごとにanalyze_tokensを呼び出した場合と同じ。
+
+        Args:
+            token_lists: コメントごとのトークン列
+
+        Returns:
+            コメントごとの感情ラベル
+        """
+        if not self.word_polarity:
+            return self._simple_sentiment_batch(
+                [''.join(token.surface for token in tokens) for tokens in token_lists]
+            )
+        if self.batch_scorer is None:
+            return [self.analyze_tokens(tokens) for tokens in token_lists]
+
+        scores = self.batch_scorer.score_tokens(token_lists)
+        self.path_counts['dictionary'] += len(token_lists)
+        return self.batch_scorer.to_labels(scores, DICTIONARY_THRESHOLD)
+
+    def _lookup_polarity(self, lemma: str, lemmas: List[str]) -> Optional[int]:
+        """原形（と直前の原形列）から極性を取得"""
+        polarity = self.word_polarity.get(lemma)
+        if polarity is not None:
+            return polarity
+
+        for prefix, polarity in self.phrase_polarity.get(lemma, ()):
+            if len(prefix) <= len(lemmas) and tuple(lemmas[-len(prefix):]) == prefix:
+                return polarity
+        return None
+
+    @staticmethod
+    def _sentence_score(polarities: List[int]) -> float:
+        """1文の極性スコア（osetiと同様に極性の平均）"""
+        if not polarities:
+            return 0.0
+        return sum(polarities) / len(polarities)
+
     def analyze_batch(self, texts: List[str]) -> Dict[str, int]:
         """
         複数テキストの感情分析
@@ -67,6 +248,14 @@ class SentimentAnalyzer:
         Returns:
             感情別の件数辞書
         """
+        if self.analyzer is None and self.batch_scorer is not None:
+            # 簡易感情分析はバッチ全体を一度にスコアリングする
+            scores = self.batch_scorer.score_texts(texts)
+            self.path_counts['simple'] += len(texts)
+            sentiment_counts = self.batch_scorer.count_labels(scores, LEXICON_THRESHOLD)
+            logger.info("感情分析結果: %s", sentiment_counts)
+            return sentiment_counts
+
         sentiment_counts = {
             'positive': 0,
             'neutral': 0,
@@ -77,37 +266,28 @@ class SentimentAnalyzer:
             sentiment = self.analyze_text(text)
             sentiment_counts[sentiment] += 1
         
-        logger.info(f"感情分析結果: {sentiment_counts}")
+        logger.info("感情分析結果: %s", sentiment_counts)
         return sentiment_counts
     
+    def _simple_sentiment_batch(self, texts: List[str]) -> List[str]:
+        """複数テキストの簡易感情分析（行列演算エンジンが利用できればまとめて実行）"""
+        if self.batch_scorer is None:
+            return [self._simple_sentiment_analysis(text) for text in texts]
+        scores = self.batch_scorer.score_texts(texts)
+        self.path_counts['simple'] += len(texts)
+        return self.batch_scorer.to_labels(scores, LEXICON_THRESHOLD)
+
     def _simple_sentiment_analysis(self, text: str) -> str:
         """
         簡易的な感情分析（osetiが利用できない場合）
-        感情表現キーワードに基づく分類
+        感情表現キーワードの重み（否定表現で反転）の合計に基づく分類
         """
-        # ポジティブキーワード
-        positive_words = [
-            '素晴らしい', '最高', '面白い', 'いいね', '良い', 'よい', 'よかった',
-            'ありがとう', '感動', '楽しい', '嬉しい', 'すごい', 'かっこいい',
-            'きれい', '美しい', '感謝', '好き', '愛', '幸せ', '喜び'
-        ]
-        
-        # ネガティブキーワード
-        negative_words = [
-            'つまらない', '嫌い', 'ひどい', '最悪', '悪い', 'だめ', 'ダメ',
-            '残念', '微妙', '納得いかない', '腹立つ', '怒', '悲しい',
-            '失望', 'がっかり', '不満', '問題', '困る'
-        ]
-        
-        # 日本語は大文字小文字の区別がないため、元のテキストを使用
-        text_lower = text
-        
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        self.path_counts['simple'] += 1
+        score = self.lexicon.score(text)
         
-        if positive_count > negative_count:
+        if score > 0:
             return 'positive'
-        elif negative_count > positive_count:
+        elif score < 0:
             return 'negative'
         else:
             return 'neutral'
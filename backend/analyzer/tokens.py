@@ -0,0 +1,72 @@
+from typing import Dict, List, NamedTuple
+import logging
+import sys
+
+try:
+    from janome.tokenizer import Tokenizer
+except ImportError:
+    Tokenizer = None
+
+logger = logging.getLogger(__name__)
+
+# 品詞情報（"名詞,一般,*,*"など）から大分類への変換結果（組み合わせは数百種類のため全て保持する）
+_major_pos_cache: Dict[str, str] = {}
+
+
+def major_pos(part_of_speech: str) -> str:
+    """
+    janomeの品詞情報から品詞の大分類を取得
+
+    分割結果をキャッシュし、同じ品詞には同じ（intern済みの）文字列を返す。
+    """
+    pos = _major_pos_cache.get(part_of_speech)
+    if pos is None:
+        pos = _major_pos_cache[part_of_speech] = sys.intern(part_of_speech.split(',', 1)[0])
+    return pos
+
+
+class Token(NamedTuple):
+    """形態素解析結果の1トークン"""
+    surface: str    # 表層形
+    base_form: str  # 原形
+    pos: str        # 品詞（大分類）
+
+
+class MorphTokenizer:
+    """
+    コメントを一度だけ形態素解析し、感情分析とキーワード抽出で共有するトークン列に変換するクラス
+    """
+
+    def __init__(self):
+        """形態素解析器の初期化"""
+        if Tokenizer is None:
+            logger.warning("janomeライブラリが見つかりません。共有トークン化は無効です。")
+            self.tokenizer = None
+        else:
+            try:
+                self.tokenizer = Tokenizer()
+            except Exception as e:
+                logger.error("janome初期化エラー: %s", e)
+                self.tokenizer = None
+
+    @property
+    def available(self) -> bool:
+        """形態素解析が利用可能かどうか"""
+        return self.tokenizer is not None
+
+    def tokenize(self, text: str) -> List[Token]:
+        """
+        テキストをトークン列に変換
+
+        Args:
+            text: 解析対象のテキスト
+
+        Returns:
+            トークンのリスト
+        """
+        tokens = []
+        for token in self.tokenizer.tokenize(text, wakati=False):
+            surface = token.surface
+            base_form = token.base_form if token.base_form != '*' else surface
+            tokens.append(Token(surface, base_form, major_pos(token.part_of_speech)))
+        return tokens
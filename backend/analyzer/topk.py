@@ -0,0 +1,130 @@
+import heapq
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Tuple, Union
+
+
+class SpaceSaving:
+    """
+    Space-Savingアルゴリズムによる近似上位K件カウンター
+
+    保持する項目数をcapacityに制限し、メモリ使用量を入力の規模によらず一定に保つ。
+    各項目のカウントは真の出現回数の上限で、count - error が下限となる。
+    出現回数が 総数 / capacity を超える項目は必ず保持される。
+    """
+
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError("capacityは1以上を指定してください")
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[Hashable, int] = {}
+        self._errors: Dict[Hashable, int] = {}
+        # (カウント, 挿入順, 項目) の最小ヒープ。カウント更新時は古いエントリを残し、取り出し時に読み飛ばす
+        self._heap: List[Tuple[int, int, Hashable]] = []
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def _push(self, item: Hashable, count: int) -> None:
+        self._sequence += 1
+        heapq.heappush(self._heap, (count, self._sequence, item))
+        # 古いエントリが溜まりすぎた場合は作り直す
+        if len(self._heap) > 4 * self.capacity + 16:
+            self._heap = [(c, i, key) for i, (key, c) in enumerate(self._counts.items())]
+            heapq.heapify(self._heap)
+            self._sequence = len(self._heap)
+
+    def _pop_min(self) -> Tuple[Hashable, int]:
+        """最小カウントの項目を取り除いて返す"""
+        while True:
+            count, _, item = heapq.heappop(self._heap)
+            if self._counts.get(item) == count:
+                del self._counts[item]
+                del self._errors[item]
+                return item, count
+
+    def add(self, item: Hashable, count: int = 1) -> None:
+        """項目の出現を記録"""
+        self.total += count
+        if item in self._counts:
+            self._counts[item] += count
+            self._push(item, self._counts[item])
+        elif len(self._counts) < self.capacity:
+            self._counts[item] = count
+            self._errors[item] = 0
+            self._push(item, count)
+        else:
+            # 最小の項目を置き換え、その回数を誤差として引き継ぐ
+            _, min_count = self._pop_min()
+            self._counts[item] = min_count + count
+            self._errors[item] = min_count
+            self._push(item, self._counts[item])
+
+    def update(self, items: Union[Iterable[Hashable], Mapping[Hashable, int], 'SpaceSaving']) -> None:
+        """
+        複数の項目を記録（Counter.updateと同様に、反復可能オブジェクトまたは{項目: 回数}を受け付ける）
+
+        SpaceSavingを渡した場合は要約同士をマージする。
+        """
+        if isinstance(items, SpaceSaving):
+            self.merge(items)
+        elif isinstance(items, Mapping):
+            for item, count in items.items():
+                self.add(item, count)
+        else:
+            for item in items:
+                self.add(item)
+
+    def merge(self, other: 'SpaceSaving') -> None:
+        """
+        別の要約をマージ
+
+        片方にしか存在しない項目には、もう片方の最小カウント（満杯の場合）を
+        誤差として加算し、上限・下限の性質を保つ。
+        """
+        self_floor = self._min_count() if len(self._counts) >= self.capacity else 0
+        other_floor = other._min_count() if len(other._counts) >= other.capacity else 0
+
+        counts: Dict[Hashable, int] = {}
+        errors: Dict[Hashable, int] = {}
+        for item in set(self._counts) | set(other._counts):
+            if item in self._counts:
+                count, error = self._counts[item], self._errors[item]
+            else:
+                count, error = self_floor, self_floor
+            if item in other._counts:
+                count += other._counts[item]
+                error += other._errors[item]
+            else:
+                count += other_floor
+                error += other_floor
+            counts[item] = count
+            errors[item] = error
+
+        kept = heapq.nlargest(self.capacity, counts.items(), key=lambda entry: entry[1])
+        self._counts = dict(kept)
+        self._errors = {item: errors[item] for item in self._counts}
+        self.total += other.total
+        self._heap = [(count, i, item) for i, (item, count) in enumerate(self._counts.items())]
+        heapq.heapify(self._heap)
+        self._sequence = len(self._heap)
+
+    def _min_count(self) -> int:
+        return min(self._counts.values()) if self._counts else 0
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Hashable, int, int]]:
+        """
+        カウントの多い順に項目を取得
+
+        Returns:
+            (項目, カウント（上限）, 誤差) のタプルリスト
+        """
+        ranked = sorted(self._counts.items(), key=lambda entry: entry[1], reverse=True)
+        if n is not None:
+            ranked = ranked[:n]
+        return [(item, count, self._errors[item]) for item, count in ranked]
+
+    def to_counter(self) -> Counter:
+        """保持している項目のカウント（上限値）をCounterとして取得"""
+        return Counter(self._counts)
@@ -0,0 +1,106 @@
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# 集計単位ごとのバケット幅（秒）
+BUCKET_SECONDS = {
+    'hour': 3600,
+    'day': 86400,
+}
+
+# バケットごとの集計結果 (感情別の件数辞書, 上位キーワードのタプルリスト, コメント数)
+BucketSummary = Tuple[Dict[str, int], List[Tuple], int]
+
+
+def to_epoch_seconds(published_at: str) -> int:
+    """ISO 8601形式の日時をUNIX秒に変換（解析できない場合は0）"""
+    if not published_at:
+        return 0
+    try:
+        parsed = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
+    except ValueError:
+        return 0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _empty_sentiment() -> Dict[str, int]:
+    return {'positive': 0, 'neutral': 0, 'negative': 0}
+
+
+class TrendAccumulator:
+    """
+    コメント単位の分析結果を投稿日時のバケット（1時間・1日）ごとに逐次集計するクラス
+
+    ページごとの分析結果を追加していき、全体を分析し直さずにバケットごとの
+    感情別件数と単語の出現回数を求める。
+    """
+
+    def __init__(self, bucket: str = 'day', new_word_counts: Callable[[], Counter] = Counter):
+        """
+        Args:
+            bucket: 'hour' または 'day'
+            new_word_counts: バケットごとの単語の集計先を生成する関数（近似集計の場合はSpaceSavingを返す）
+        """
+        if bucket not in BUCKET_SECONDS:
+            raise ValueError(f"集計単位は {', '.join(BUCKET_SECONDS)} のいずれかを指定してください: {bucket}")
+        self.bucket = bucket
+        self.bucket_seconds = BUCKET_SECONDS[bucket]
+        self._new_word_counts = new_word_counts
+        self._sentiment: Dict[int, Dict[str, int]] = {}
+        self._words: Dict[int, Counter] = {}
+        self.total_comments = 0
+        self.undated_comments = 0  # 投稿日時が不明で集計できなかったコメント数
+
+    def add(self, published_at: Sequence[str], results: Sequence[Tuple[str, List[str]]]) -> None:
+        """
+        コメントの分析結果を追加
+
+        Args:
+            published_at: コメントごとの投稿日時（ISO 8601形式）
+            results: コメントごとの(感情ラベル, 単語リスト)（published_atと同じ順）
+        """
+        for timestamp, (label, words) in zip(published_at, results):
+            epoch = to_epoch_seconds(timestamp)
+            if epoch <= 0:
+                self.undated_comments += 1
+                continue
+            start = epoch - epoch % self.bucket_seconds
+            sentiment = self._sentiment.get(start)
+            if sentiment is None:
+                sentiment = self._sentiment[start] = _empty_sentiment()
+                self._words[start] = self._new_word_counts()
+            sentiment[label] += 1
+            self._words[start].update(words)
+            self.total_comments += 1
+
+    def summaries(self, top_n: int = 5) -> Dict[int, BucketSummary]:
+        """バケットの開始時刻（UNIX秒）ごとの集計結果"""
+        return {
+            start: (sentiment, self._words[start].most_common(top_n), sum(sentiment.values()))
+            for start, sentiment in self._sentiment.items()
+        }
+
+
+def build_series(summaries: Dict[int, BucketSummary], bucket_seconds: int,
+                 max_buckets: int) -> Tuple[List[int], List[BucketSummary], int]:
+    """
+    バケットごとの集計結果を、空のバケットを補った時系列に並べる
+
+    最も古いバケットから最も新しいバケットまでを連続させる。
+    期間がmax_bucketsを超える場合は新しい方からmax_buckets件に絞る。
+
+    Returns:
+        (バケットの開始時刻（UNIX秒）のリスト, 集計結果のリスト, 期間外として除いたコメント数)
+    """
+    if not summaries:
+        return [], [], 0
+
+    last = max(summaries)
+    first = max(min(summaries), last - (max_buckets - 1) * bucket_seconds)
+    starts = list(range(first, last + 1, bucket_seconds))
+    empty: BucketSummary = (_empty_sentiment(), [], 0)
+    series = [summaries.get(start, empty) for start in starts]
+    omitted = sum(summary[2] for start, summary in summaries.items() if start < first)
+    return starts, series, omitted
@@ -0,0 +1,202 @@
+from typing import Collection, Dict, Iterable, List, Mapping, Sequence, Tuple
+import logging
+
+try:
+    import numpy as np
+    from scipy import sparse
+    VECTORIZE_AVAILABLE = True
+except ImportError:
+    np = None
+    sparse = None
+    VECTORIZE_AVAILABLE = False
+
+from analyzer.lexicon import PolarityLexicon
+from analyzer.tokens import Token
+
+logger = logging.getLogger(__name__)
+
+# 判定の閾値（SentimentAnalyzerの1件ずつの判定と同じ）
+DICTIONARY_THRESHOLD = 0.1  # 極性辞書（共有トークン列）による判定
+LEXICON_THRESHOLD = 0.0     # 簡易感情分析による判定
+
+
+class BatchSentimentScorer:
+    """
+    コメントをまとめて感情スコアリングするクラス
+
+    各コメントの辞書語を語彙IDに変換して疎行列（文×語・コメント×語）を作り、
+    極性（重み）ベクトルとの行列ベクトル積でバッチ全体のスコアを一度に求める。
+    スコアと判定結果はSentimentAnalyzerの1件ずつの分析と一致する。
+    """
+
+    def __init__(self, word_polarity: Mapping[str, int],
+                 phrase_polarity: Mapping[str, Sequence[Tuple[Tuple[str, ...], int]]],
+                 lexicon: PolarityLexicon, negation_words: Iterable[str],
+                 sentence_delimiters: Collection[str]):
+        """
+        Args:
+            word_polarity: 原形ごとの極性 {原形: 極性}
+            phrase_polarity: 複数語の極性 {末尾の原形: [(先行する原形のタプル, 極性)]}（長い表現から順）
+            lexicon: 簡易感情分析用の極性辞書
+            negation_words: 直前の極性を反転させる否定表現
+            sentence_delimiters: 文の区切りとみなす記号
+        """
+        if not VECTORIZE_AVAILABLE:
+            raise RuntimeError("numpyとscipyが必要です: pip install numpy scipy")
+
+        self.negation_words = tuple(negation_words)
+        self.sentence_delimiters = frozenset(sentence_delimiters)
+
+        # 極性辞書の語・表現に語彙IDを割り当てる
+        polarities: List[float] = []
+        self._word_ids: Dict[str, int] = {}
+        for word, polarity in word_polarity.items():
+            self._word_ids[word] = len(polarities)
+            polarities.append(float(polarity))
+        # 複数語の表現は {末尾の原形: {直前の原形: [(先行する原形のタプル, 語数, 語彙ID)]}} で引く
+        # （直前の原形で候補を絞り込み、絞り込んだ中では長い表現から順に照合する）
+        self._phrase_ids: Dict[str, Dict[str, List[Tuple[Tuple[str, ...], int, int]]]] = {}
+        for last, candidates in phrase_polarity.items():
+            by_previous = self._phrase_ids.setdefault(last, {})
+            for prefix, polarity in candidates:
+                by_previous.setdefault(prefix[-1], []).append((prefix, len(prefix), len(polarities)))
+                polarities.append(float(polarity))
+        self._polarity = np.asarray(polarities, dtype=np.float64)
+
+        # 簡易感情分析用の極性辞書
+        self.lexicon = lexicon
+        self._lexicon_ids = {word: index for index, word in enumerate(lexicon.entries)}
+        self._lexicon_weights = np.fromiter(lexicon.entries.values(), dtype=np.float64, count=len(lexicon.entries))
+
+    def _lookup_term(self, lemma: str, lemmas: List[str]) -> int:
+        """原形（と直前の原形列）から語彙IDを取得（該当しない場合は-1）"""
+        term_id = self._word_ids.get(lemma)
+        if term_id is not None:
+            return term_id
+
+        by_previous = self._phrase_ids.get(lemma)
+        if by_previous is None or not lemmas:
+            return -1
+        for prefix, length, term_id in by_previous.get(lemmas[-1], ()):
+            if length <= len(lemmas) and tuple(lemmas[-length:]) == prefix:
+                return term_id
+        return -1
+
+    def score_tokens(self, token_lists: Sequence[Sequence[Token]]) -> 'np.ndarray':
+        """
+        形態素解析済みトークン列の感情スコアを一括で計算
+
+        文ごとの極性の平均を合計する（SentimentAnalyzer.analyze_tokensと同じ）。
+        文×語の行列と極性ベクトルの積で文ごとの極性の合計を求め、
+        文の極性数で割った後、コメント×文の行列との積でコメントごとに合計する。
+
+        Args:
+            token_lists: コメントごとのトークン列
+
+        Returns:
+            コメントごとのスコア
+        """
+        delimiters = self.sentence_delimiters
+        negation_words = self.negation_words
+
+        # 文×語の行列（値は否定による符号）
+        rows: List[int] = []
+        cols: List[int] = []
+        signs: List[float] = []
+        sentence_lengths: List[int] = []
+        sentence_comments: List[int] = []
+
+        for index, tokens in enumerate(token_lists):
+            terms: List[int] = []
+            term_signs: List[float] = []
+            lemmas: List[str] = []
+            for token in tokens:
+                if token.surface in delimiters:
+                    if terms:
+                        rows.extend([len(sentence_lengths)] * len(terms))
+                        cols.extend(terms)
+                        signs.extend(term_signs)
+                        sentence_lengths.append(len(terms))
+                        sentence_comments.append(index)
+                    terms = []
+                    term_signs = []
+                    lemmas = []
+                    continue
+
+                term_id = self._lookup_term(token.base_form, lemmas)
+                if term_id >= 0:
+                    terms.append(term_id)
+                    term_signs.append(1.0)
+                elif terms and token.surface in negation_words:
+                    term_signs[-1] = -term_signs[-1]
+                lemmas.append(token.base_form)
+
+            if terms:
+                rows.extend([len(sentence_lengths)] * len(terms))
+                cols.extend(terms)
+                signs.extend(term_signs)
+                sentence_lengths.append(len(terms))
+                sentence_comments.append(index)
+
+        sentence_count = len(sentence_lengths)
+        if sentence_count == 0:
+            return np.zeros(len(token_lists), dtype=np.float64)
+
+        sentence_matrix = sparse.csr_matrix(
+            (np.asarray(signs, dtype=np.float64), (rows, cols)),
+            shape=(sentence_count, len(self._polarity)),
+        )
+        sentence_scores = sentence_matrix.dot(self._polarity) / np.asarray(sentence_lengths, dtype=np.float64)
+
+        comment_matrix = sparse.csr_matrix(
+            (np.ones(sentence_count, dtype=np.float64), (sentence_comments, np.arange(sentence_count))),
+            shape=(len(token_lists), sentence_count),
+        )
+        return comment_matrix.dot(sentence_scores)
+
+    def score_texts(self, texts: Sequence[str]) -> 'np.ndarray':
+        """
+        簡易感情分析のスコアを一括で計算
+
+        コメント×語の行列（値は否定による符号）と重みベクトルの積で、
+        辞書語の重みの合計（PolarityLexicon.scoreと同じ）を求める。
+
+        Args:
+            texts: 分析対象のテキストリスト
+
+        Returns:
+            コメントごとのスコア
+        """
+        rows: List[int] = []
+        cols: List[int] = []
+        signs: List[float] = []
+        lexicon_ids = self._lexicon_ids
+
+        for index, text in enumerate(texts):
+            for match in self.lexicon.find(text):
+                rows.append(index)
+                cols.append(lexicon_ids[match.word])
+                signs.append(-1.0 if match.negated else 1.0)
+
+        matrix = sparse.csr_matrix(
+            (np.asarray(signs, dtype=np.float64), (rows, cols)),
+            shape=(len(texts), len(self._lexicon_weights)),
+        )
+        return matrix.dot(self._lexicon_weights)
+
+    @staticmethod
+    def count_labels(scores: 'np.ndarray', threshold: float) -> Dict[str, int]:
+        """スコアを閾値で判定し、感情別の件数を求める"""
+        positive = int(np.count_nonzero(scores > threshold))
+        negative = int(np.count_nonzero(scores < -threshold))
+        return {
+            'positive': positive,
+            'neutral': len(scores) - positive - negative,
+            'negative': negative,
+        }
+
+    @staticmethod
+    def to_labels(scores: 'np.ndarray', threshold: float) -> List[str]:
+        """スコアを閾値で判定し、コメントごとの感情ラベルを求める"""
+        labels = np.where(scores > threshold, 'positive', np.where(scores < -threshold, 'negative', 'neutral'))
+        return labels.tolist()
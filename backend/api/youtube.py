@@ -1,11 +1,97 @@
+import asyncio
+import math
 import os
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
 import httpx
 import logging
 from fastapi import HTTPException
 
+from analyzer.normalize import normalize_comment
+from utils.metrics import STAGE_SECONDS, registry
+from utils.ratelimit import CircuitBreaker, DailyQuota, SQLiteDailyQuota, TokenBucket, backoff_delay
+
+try:
+    import h2  # noqa: F401  HTTP/2はh2パッケージがある場合のみ有効
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# commentThreads.listで1回に取得できる最大件数
+PAGE_SIZE = 100
+
+# APIメソッドごとの消費クォータ
+QUOTA_COST = {
+    'videos.list': 1,
+    'commentThreads.list': 1,
+    'comments.list': 1,
+}
+
+# APIメソッドごとの計測段階（analyzer_stage_secondsのstageラベル）
+API_STAGES = {
+    'videos.list': 'check_video',
+    'commentThreads.list': 'fetch_page',
+    'comments.list': 'fetch_replies',
+}
+
+API_REQUESTS = registry.counter(
+    "youtube_api_requests_total", "YouTube Data APIの呼び出し回数", ["method", "status"]
+)
+QUOTA_UNITS = registry.counter(
+    "youtube_quota_units_total", "YouTube Data APIの消費クォータ", ["method"]
+)
+API_RETRIES = registry.counter(
+    "youtube_api_retries_total", "一時的なエラーによるYouTube Data APIの再試行回数", ["method"]
+)
+
+# クォータ超過を表すエラー理由（error.errors[].reason）。リセットまで回復しない
+QUOTA_EXCEEDED_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+# 短時間のレート制限を表すエラー理由。待てば回復するため再試行する
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+# 再試行するHTTPステータス
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class YouTubeUnavailableError(HTTPException):
+    """
+    クォータ超過や障害でYouTube APIを呼び出せない場合のエラー
+
+    呼び出し元は期限切れのキャッシュなどで代替できる。
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[float] = None):
+        headers = {'Retry-After': str(math.ceil(retry_after))} if retry_after else None
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
+        self.retry_after = retry_after
+
+
+def _error_reason(response: httpx.Response) -> str:
+    """エラーレスポンスの理由（error.errors[0].reason）を取得"""
+    try:
+        errors = response.json()['error']['errors']
+        return errors[0].get('reason', '') if errors else ''
+    except Exception:
+        return ''
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Retry-Afterヘッダーの秒数（ない場合や日時形式の場合はNone）"""
+    try:
+        return max(0.0, float(response.headers['Retry-After']))
+    except (KeyError, ValueError):
+        return None
+
+
+class CommentRecord(NamedTuple):
+    """取得したコメント1件"""
+    id: str
+    text: str
+    published_at: str  # ISO 8601形式（例: 2024-01-01T00:00:00Z）
+    like_count: int
+    parent_id: str = ''  # 返信の場合は返信先のコメント（スレッド）ID
+
+
 class YouTubeClient:
     """YouTube Data API v3を使用してコメントを取得するクライアント"""
     
@@ -14,48 +100,175 @@ class YouTubeClient:
         if not self.api_key:
             logger.warning("YOUTUBE_API_KEYが設定されていません。環境変数を確認してください。")
         
-        self.base_url = "https://www.googleapis.com/youtube/v3"
-        
-    async def get_comments(self, video_id: str, max_results: int = 100) -> List[str]:
+        # ベンチマーク用のローカルスタブなどに向ける場合は環境変数で変更する
+        self.base_url = os.getenv('YOUTUBE_API_BASE_URL', "https://www.googleapis.com/youtube/v3").rstrip('/')
+        self.max_connections = int(os.getenv('YOUTUBE_MAX_CONNECTIONS', '20'))
+        # 返信を取得する際に1動画あたり同時に取得するスレッド数
+        self.reply_concurrency = max(1, int(os.getenv('YOUTUBE_REPLY_CONCURRENCY', '4')))
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # 同時に多数の動画を取得してもクォータを急激に消費しないよう、全リクエストで共有する
+        quota_rate = float(os.getenv('YOUTUBE_QUOTA_PER_SECOND', '10'))
+        self.quota_bucket = TokenBucket(
+            rate=quota_rate,
+            capacity=float(os.getenv('YOUTUBE_QUOTA_BURST', str(quota_rate))),
+        )
+        # 1日あたりの予算（YouTube Data APIの標準の割り当ては10,000ユニット。0で無制限）
+        # マルチワーカー構成では使用量をCOORDINATION_DB_PATHに保存して全プロセスで共有する
+        daily_limit = int(os.getenv('YOUTUBE_QUOTA_DAILY', '10000'))
+        coordination_path = os.getenv('COORDINATION_DB_PATH')
+        self.daily_quota = (
+            SQLiteDailyQuota(daily_limit, coordination_path) if coordination_path else DailyQuota(daily_limit)
+        )
+        # 一時的なエラー（5xx・429・接続エラー）の再試行
+        self.max_retries = max(0, int(os.getenv('YOUTUBE_MAX_RETRIES', '3')))
+        self.retry_base_seconds = float(os.getenv('YOUTUBE_RETRY_BASE_SECONDS', '0.5'))
+        self.retry_max_seconds = float(os.getenv('YOUTUBE_RETRY_MAX_SECONDS', '8'))
+        # 再試行しても失敗する呼び出しが続いた場合や、クォータを使い切った場合はAPIの呼び出しを止める
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv('YOUTUBE_BREAKER_FAILURES', '5')),
+            reset_timeout=float(os.getenv('YOUTUBE_BREAKER_COOLDOWN_SECONDS', '30')),
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """アプリ全体で共有する接続プール付きHTTPクライアントを取得"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    def stats(self) -> Dict[str, Any]:
+        """クォータとサーキットブレーカーの状態（共有ストアを参照するため、イベントループからはスレッドで呼び出す）"""
+        return {
+            "quota_daily_limit": self.daily_quota.limit,
+            "quota_used_today": self.daily_quota.used,
+            "quota_remaining_today": self.daily_quota.remaining,
+            "quota_resets_in_seconds": round(self.daily_quota.seconds_until_reset()),
+            "circuit_state": self.breaker.state,
+            "circuit_reason": self.breaker.reason,
+            "circuit_retry_after_seconds": round(self.breaker.retry_after, 1),
+        }
+
+    async def aclose(self):
+        """HTTPクライアントを閉じる（アプリ終了時に呼び出す）"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_comments(self, video_id: str, max_results: int = 100, include_replies: bool = False) -> List[str]:
         """
         指定されたYouTube動画のコメントを取得
         
         Args:
             video_id: YouTube動画ID
-            max_results: 取得する最大コメント数（デフォルト: 100）
+            max_results: 取得する最大コメント数（デフォルト: 100、100件を超える場合はページングして取得）
+            include_replies: 返信も取得するか（返信も最大コメント数に含める）
             
         Returns:
             コメントテキストのリスト
             
+        Raises:
+            HTTPException: APIキーが設定されていない場合や、API呼び出しに失敗した場合
+        """
+        comments = []
+        async for page in self.iter_comment_pages(video_id, max_results, include_replies):
+            comments.extend(page)
+
+        logger.info("取得完了: %s件のコメント", len(comments))
+        return comments
+
+    async def iter_comment_pages(self, video_id: str, max_results: int = 100,
+                                 include_replies: bool = False) -> AsyncIterator[List[str]]:
+        """
+        指定されたYouTube動画のコメントをページ単位で取得
+
+        動画の存在確認は最初のページの取得と並行して行い、
+        最初のページを返す前に完了を待つ。
+
+        Args:
+            video_id: YouTube動画ID
+            max_results: 取得する最大コメント数
+            include_replies: 返信も取得するか
+
+        Yields:
+            1ページ分のコメントテキストのリスト
+
+        Raises:
+            HTTPException: APIキーが設定されていない場合や、API呼び出しに失敗した場合
+        """
+        pages = self.iter_comment_records(video_id, max_results, include_replies=include_replies)
+        try:
+            async for records in pages:
+                yield [record.text for record in records]
+        finally:
+            await pages.aclose()
+
+    async def iter_comment_records(self, video_id: str, max_results: int = 100, order: str = 'relevance',
+                                   include_replies: bool = False) -> AsyncIterator[List[CommentRecord]]:
+        """
+        指定されたYouTube動画のコメントをID・投稿日時付きでページ単位で取得
+
+        Args:
+            video_id: YouTube動画ID
+            max_results: 取得する最大コメント数
+            order: 'relevance'（関連度順）または 'time'（新しい順）
+            include_replies: 返信も取得するか（各スレッドの返信はトップレベルのコメントの直後に並ぶ）
+
+        Yields:
+            1ページ分のコメントのリスト
+
         Raises:
             HTTPException: APIキーが設定されていない場合や、API呼び出しに失敗した場合
         """
         if not self.api_key:
             logger.error("YOUTUBE_API_KEYが設定されていません")
             raise HTTPException(status_code=500, detail="YouTube APIキーが設定されていません。管理者に連絡してください。")
-        
+
+        client = self._get_client()
+        check_task: Optional[asyncio.Future] = asyncio.ensure_future(self._check_video_exists(client, video_id))
+        pages = self._fetch_comment_threads(client, video_id, max_results, order, include_replies)
+
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # 動画が存在するかチェック
-                await self._check_video_exists(client, video_id)
-                
-                # コメントスレッド取得
-                comments = await self._fetch_comment_threads(client, video_id, max_results)
-                
-                logger.info(f"取得完了: {len(comments)}件のコメント")
-                return comments
-                
+            async for page in pages:
+                if check_task is not None:
+                    # 存在確認のエラー（404など）を優先して報告する
+                    await check_task
+                    check_task = None
+                yield page
+
+            if check_task is not None:
+                await check_task
+
+        except HTTPException:
+            raise
         except httpx.HTTPStatusError as e:
-            logger.error(f"YouTube API HTTPエラー: {e.response.status_code}")
-            if e.response.status_code == 403:
-                raise HTTPException(status_code=403, detail="YouTube APIの利用制限に達しました")
+            reason = _error_reason(e.response)
+            logger.error("YouTube API HTTPエラー: %s %s", e.response.status_code, reason)
+            if e.response.status_code == 403 and reason == 'commentsDisabled':
+                raise HTTPException(status_code=403, detail="この動画はコメントが無効になっています")
+            elif e.response.status_code == 403:
+                raise HTTPException(status_code=403, detail="YouTube APIへのアクセスが拒否されました")
             elif e.response.status_code == 404:
                 raise HTTPException(status_code=404, detail="動画が見つかりません")
             else:
                 raise HTTPException(status_code=500, detail="YouTube APIエラーが発生しました")
         except Exception as e:
-            logger.error(f"コメント取得エラー: {e}")
+            logger.error("コメント取得エラー: %s", e)
             raise HTTPException(status_code=500, detail="コメントの取得に失敗しました")
+        finally:
+            await pages.aclose()
+            if check_task is not None:
+                if check_task.done():
+                    # 未取得の例外として警告されないようにする
+                    check_task.cancelled() or check_task.exception()
+                else:
+                    check_task.cancel()
     
     async def _check_video_exists(self, client: httpx.AsyncClient, video_id: str):
         """動画の存在確認"""
@@ -66,50 +279,260 @@ class YouTubeClient:
             'part': 'id'
         }
         
-        response = await client.get(url, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await self._get_json(client, url, params, 'videos.list')
         if not data.get('items'):
             raise HTTPException(status_code=404, detail="指定された動画が見つかりません")
     
-    async def _fetch_comment_threads(self, client: httpx.AsyncClient, video_id: str, max_results: int) -> List[str]:
-        """コメントスレッドを取得して平坦化"""
+    async def _fetch_comment_threads(self, client: httpx.AsyncClient, video_id: str, max_results: int,
+                                     order: str = 'relevance',
+                                     include_replies: bool = False) -> AsyncIterator[List[CommentRecord]]:
+        """
+        コメントスレッドをページ単位で取得して平坦化
+
+        次ページのトークンを受け取った時点で次のリクエストを開始し、
+        現在のページの解析（および呼び出し元の処理）と並行させる。
+
+        返信も取得する場合は、スレッドに埋め込まれた返信を使い、埋め込まれていない返信がある
+        スレッドのみcomments.listで取得する。取得は1動画あたりreply_concurrency件まで並行させる。
+
+        Yields:
+            1ページ分のコメントのリスト
+        """
         url = f"{self.base_url}/commentThreads"
         params = {
             'key': self.api_key,
             'videoId': video_id,
+            'part': 'snippet,replies' if include_replies else 'snippet',
+            'maxResults': min(max_results, PAGE_SIZE),  # APIの制限
+            'order': order  # 関連度順（relevance）または新しい順（time）
+        }
+
+        fetched = 0
+        method = 'commentThreads.list'
+        reply_semaphore = asyncio.Semaphore(self.reply_concurrency)
+        pending: Optional[asyncio.Future] = asyncio.ensure_future(self._get_json(client, url, params, method))
+
+        try:
+            while pending is not None:
+                data = await pending
+                pending = None
+                items = data.get('items', [])
+
+                # 次のページがあれば先にリクエストを開始
+                next_page_token = data.get('nextPageToken')
+                if next_page_token and fetched + len(items) < max_results:
+                    pending = asyncio.ensure_future(
+                        self._get_json(client, url, {**params, 'pageToken': next_page_token}, method)
+                    )
+
+                # コメント抽出
+                if include_replies:
+                    page = await self._expand_threads(client, items, max_results - fetched, reply_semaphore)
+                else:
+                    page = [
+                        self._parse_comment(item['snippet']['topLevelComment'])
+                        for item in items[:max_results - fetched]
+                    ]
+                fetched += len(page)
+
+                # 返信で取得上限に達した場合は先に開始した次ページの取得を取りやめる
+                if pending is not None and fetched >= max_results:
+                    pending.cancel()
+                    pending = None
+                yield page
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def _expand_threads(self, client: httpx.AsyncClient, items: List[Dict[str, Any]], limit: int,
+                              semaphore: asyncio.Semaphore) -> List[CommentRecord]:
+        """
+        1ページ分のスレッドをトップレベルのコメントと返信に展開
+
+        取得上限はスレッドの順に割り当てる（トップレベルのコメント、その返信の順）。
+
+        Args:
+            items: commentThreadsリソースのリスト
+            limit: このページで返す最大コメント数
+            semaphore: 返信の取得の同時実行数を制限するセマフォ（動画ごと）
+
+        Returns:
+            スレッドごとにトップレベルのコメントと返信を並べたリスト
+        """
+        threads: List[List[CommentRecord]] = []
+        remaining = limit
+        position = 0
+
+        # 返信を取得するスレッドには取得予定の件数を割り当て、取得後に実際の件数との差を戻す。
+        # 削除などで返信が少なかった場合は、戻した分で続くスレッドを展開する
+        while position < len(items) and remaining > 0:
+            reply_fetches: Dict[int, Tuple[int, asyncio.Future]] = {}
+            for item in items[position:]:
+                if remaining <= 0:
+                    break
+                position += 1
+                snippet = item['snippet']
+                top_level = snippet['topLevelComment']
+                thread = [self._parse_comment(top_level)]
+                remaining -= 1
+
+                wanted = min(snippet.get('totalReplyCount', 0), remaining)
+                embedded = [
+                    self._parse_comment(reply)
+                    for reply in item.get('replies', {}).get('comments', [])
+                ]
+                if wanted > len(embedded):
+                    # 埋め込まれていない返信がある場合はスレッドの全返信を取得する
+                    reply_fetches[len(threads)] = (wanted, asyncio.ensure_future(
+                        self._fetch_replies(client, top_level.get('id') or item.get('id', ''), wanted, semaphore)
+                    ))
+                else:
+                    thread.extend(embedded[:wanted])
+                remaining -= wanted
+                threads.append(thread)
+
+            if not reply_fetches:
+                break
+            futures = [future for _, future in reply_fetches.values()]
+            try:
+                replies = await asyncio.gather(*futures)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+            for (index, (wanted, _)), thread_replies in zip(reply_fetches.items(), replies):
+                threads[index].extend(thread_replies)
+                remaining += wanted - len(thread_replies)
+
+        return [record for thread in threads for record in thread]
+
+    async def _fetch_replies(self, client: httpx.AsyncClient, parent_id: str, max_results: int,
+                             semaphore: asyncio.Semaphore) -> List[CommentRecord]:
+        """スレッドの返信をcomments.listでページングして取得"""
+        url = f"{self.base_url}/comments"
+        params = {
+            'key': self.api_key,
+            'parentId': parent_id,
             'part': 'snippet',
-            'maxResults': min(max_results, 100),  # APIの制限
-            'order': 'relevance'  # 関連度順
+            'maxResults': min(max_results, PAGE_SIZE),
         }
-        
-        comments = []
-        next_page_token = None
-        
-        while len(comments) < max_results:
-            if next_page_token:
-                params['pageToken'] = next_page_token
-            
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # コメント抽出
-            for item in data.get('items', []):
-                comment_text = item['snippet']['topLevelComment']['snippet']['textDisplay']
-                comments.append(comment_text)
-                
-                if len(comments) >= max_results:
+
+        replies: List[CommentRecord] = []
+        async with semaphore:
+            while len(replies) < max_results:
+                data = await self._get_json(client, url, params, 'comments.list')
+                replies.extend(self._parse_comment(item) for item in data.get('items', []))
+                next_page_token = data.get('nextPageToken')
+                if not next_page_token:
                     break
-            
-            # 次のページがあるかチェック
-            next_page_token = data.get('nextPageToken')
-            if not next_page_token:
+                params = {**params, 'pageToken': next_page_token}
+        return replies[:max_results]
+
+    @staticmethod
+    def _parse_comment(comment: Dict[str, Any]) -> CommentRecord:
+        """APIのcommentリソースをCommentRecordに変換（本文はHTMLを除去して正規化する）"""
+        snippet = comment['snippet']
+        return CommentRecord(
+            id=comment.get('id', ''),
+            text=normalize_comment(snippet['textDisplay']),
+            published_at=snippet.get('publishedAt', ''),
+            like_count=snippet.get('likeCount', 0),
+            parent_id=snippet.get('parentId', ''),
+        )
+
+    async def _get_json(self, client: httpx.AsyncClient, url: str, params: Dict[str, Any],
+                        method: str) -> Dict[str, Any]:
+        """
+        クォータの割り当てを待ってからGETリクエストを送信し、JSONを返す
+
+        一時的なエラー（5xx・429・短時間のレート制限・接続エラー）はジッター付きの指数バックオフで
+        再試行する。1日の予算を使い切った場合やAPIがクォータ超過を返した場合は、
+        リセットまでサーキットブレーカーを開いてAPIを呼び出さない。
+
+        Args:
+            method: APIメソッド名（消費クォータと計測のラベルに使用）
+
+        Raises:
+            YouTubeUnavailableError: ブレーカーが開いている場合、クォータを使い切った場合、再試行しても失敗した場合
+            httpx.HTTPStatusError: 再試行しないエラー（404など）
+        """
+        cost = QUOTA_COST[method]
+        if not self.breaker.allow():
+            API_REQUESTS.inc(method=method, status="rejected")
+            raise self._unavailable_error()
+
+        for attempt in range(self.max_retries + 1):
+            if not await self.daily_quota.consume(cost):
+                API_REQUESTS.inc(method=method, status="rejected")
+                self._trip_for_quota("daily_budget")
+                raise self._unavailable_error()
+            with STAGE_SECONDS.time(stage="quota_wait"):
+                await self.quota_bucket.acquire(cost)
+
+            retry_after: Optional[float] = None
+            try:
+                with STAGE_SECONDS.time(stage=API_STAGES[method]):
+                    response = await client.get(url, params=params)
+            except httpx.TransportError as e:
+                API_REQUESTS.inc(method=method, status="error")
+                failure = f"{type(e).__name__}: {e}"
+            else:
+                API_REQUESTS.inc(method=method, status=str(response.status_code))
+                QUOTA_UNITS.inc(cost, method=method)
+                if response.is_success:
+                    self.breaker.record_success()
+                    return response.json()
+
+                reason = _error_reason(response)
+                if response.status_code == 403 and reason in QUOTA_EXCEEDED_REASONS:
+                    await self.daily_quota.aexhaust()
+                    self._trip_for_quota(reason)
+                    raise self._unavailable_error()
+                if response.status_code not in TRANSIENT_STATUS_CODES and reason not in RATE_LIMIT_REASONS:
+                    # 404などはAPI自体の障害ではないため、ブレーカーには成功として記録する
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                failure = f"{response.status_code} {reason}".rstrip()
+                retry_after = _retry_after_seconds(response)
+
+            if self.breaker.state == CircuitBreaker.OPEN:
+                # 再試行を待つ間に他の呼び出しがブレーカーを開いた
+                raise self._unavailable_error()
+            if attempt >= self.max_retries:
                 break
-        
-        return comments[:max_results]
+            delay = backoff_delay(attempt, self.retry_base_seconds, self.retry_max_seconds)
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.retry_max_seconds))
+            logger.warning("YouTube API %s の一時的なエラー（%s）。%.2f秒後に再試行します", method, failure, delay)
+            API_RETRIES.inc(method=method)
+            await asyncio.sleep(delay)
+
+        logger.error("YouTube API %s の呼び出しに失敗しました: %s", method, failure)
+        self.breaker.record_failure()
+        raise YouTubeUnavailableError(
+            status_code=503,
+            detail="YouTube APIが一時的に利用できません。しばらく待ってから再試行してください",
+            retry_after=self.breaker.retry_after or retry_after,
+        )
+
+    def _trip_for_quota(self, reason: str) -> None:
+        """クォータのリセットまでブレーカーを開く"""
+        if self.breaker.state != CircuitBreaker.OPEN:
+            logger.warning("YouTube APIのクォータを使い切りました（%s）。リセットまで呼び出しを停止します", reason)
+        self.breaker.trip(self.daily_quota.seconds_until_reset(), "quota")
+
+    def _unavailable_error(self) -> YouTubeUnavailableError:
+        """ブレーカーが開いている間に返すエラー"""
+        if self.breaker.reason == "quota":
+            return YouTubeUnavailableError(
+                status_code=403, detail="YouTube APIの利用制限に達しました",
+                retry_after=self.breaker.retry_after,
+            )
+        return YouTubeUnavailableError(
+            status_code=503,
+            detail="YouTube APIが一時的に利用できません。しばらく待ってから再試行してください",
+            retry_after=self.breaker.retry_after,
+        )
     
     def _get_dummy_comments(self) -> List[str]:
         """テスト用のダミーコメントデータ"""
@@ -0,0 +1,152 @@
+import re
+import statistics
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from analyzer.executor import _analyze_text, _init_worker
+from analyzer.keywords import KeywordExtractor
+from analyzer.normalize import normalize_comment
+from analyzer.sentiment import SentimentAnalyzer
+from analyzer.tokens import MorphTokenizer, Token
+from benchmarks.corpus import generate_comments
+
+
+def measure(func: Callable[[], object], items: int, repeat: int = 3) -> Dict[str, float]:
+    """
+    関数の実行時間を計測
+
+    Args:
+        func: 計測対象（引数なし）
+        items: 1回の実行で処理する件数（スループットの計算に使用）
+        repeat: 計測回数
+
+    Returns:
+        実行時間（秒）の中央値・最小値と、1秒あたりの処理件数
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    median = statistics.median(timings)
+    return {
+        "items": items,
+        "repeat": repeat,
+        "median_seconds": median,
+        "min_seconds": min(timings),
+        "items_per_second": items / median if median > 0 else 0.0,
+    }
+
+
+def _is_meaningful_word_baseline(word: str) -> bool:
+    """KeywordExtractor._is_meaningful_wordの以前の実装（パターンを事前にコンパイルしない）"""
+    if 'http' in word or '@' in word or '.com' in word:
+        return False
+    if re.match(r'^[!-/:-@\\[-`{-~\s　]+$', word):
+        return False
+    if len(set(word)) == 1 and len(word) > 2:
+        return False
+    return True
+
+
+def filter_tokens_baseline(keywords: KeywordExtractor, tokens: Sequence[Token]) -> List[str]:
+    """
+    KeywordExtractor.extract_words_from_tokensの以前の実装（keywords.filterの比較用）
+
+    単語ごとの判定結果を保持せず、トークンごとに全ての条件を判定する。
+    """
+    return [
+        token.surface for token in tokens
+        if (len(token.surface) >= 2 and
+            token.pos not in keywords.exclude_pos and
+            token.surface not in keywords.stopwords and
+            not token.surface.isdigit() and
+            _is_meaningful_word_baseline(token.surface))
+    ]
+
+
+def run_analyzer_benchmarks(comment_count: int = 1000, repeat: int = 3, seed: int = 0) -> Dict[str, Optional[Dict[str, float]]]:
+    """
+    各分析器のマイクロベンチマークを実行
+
+    利用できない経路（osetiやjanomeが未インストールの場合など）はNoneを返す。
+
+    Args:
+        comment_count: 1回の計測で分析するコメント数
+        repeat: 計測回数
+        seed: コーパス生成の乱数シード
+
+    Returns:
+        {ベンチマーク名: 計測結果}
+    """
+    texts = generate_comments(comment_count, seed=seed)
+    results: Dict[str, Optional[Dict[str, float]]] = {}
+
+    sentiment = SentimentAnalyzer()
+    keywords = KeywordExtractor()
+
+    # 感情分析: oseti（MeCab）経路と簡易分析経路
+    if sentiment.analyzer is not None:
+        results["sentiment.oseti"] = measure(lambda: sentiment.analyze_batch(texts), len(texts), repeat)
+    else:
+        results["sentiment.oseti"] = None
+
+    fallback_sentiment = SentimentAnalyzer()
+    fallback_sentiment.analyzer = None
+    results["sentiment.simple"] = measure(lambda: fallback_sentiment.analyze_batch(texts), len(texts), repeat)
+
+    # 共有トークン列の感情分析: 1件ずつの判定と行列演算による一括判定
+    tokenizer = MorphTokenizer()
+    if tokenizer.available and sentiment.word_polarity:
+        token_lists = [tokenizer.tokenize(text) for text in texts]
+        results["sentiment.tokens"] = measure(
+            lambda: [sentiment.analyze_tokens(tokens) for tokens in token_lists], len(texts), repeat
+        )
+        if sentiment.batch_scorer is not None:
+            results["sentiment.tokens_batch"] = measure(
+                lambda: sentiment.analyze_tokens_batch(token_lists), len(texts), repeat
+            )
+        else:
+            results["sentiment.tokens_batch"] = None
+    else:
+        results["sentiment.tokens"] = None
+        results["sentiment.tokens_batch"] = None
+
+    # 取得したコメント本文の正規化（HTMLの除去とNFKC正規化）。textDisplayと同じくHTMLを含む本文で計測する
+    markup_texts = [f'{text}<br>&quot;{text}&quot;' if i % 3 == 0 else text for i, text in enumerate(texts)]
+    results["normalize"] = measure(lambda: [normalize_comment(text) for text in markup_texts], len(texts), repeat)
+
+    # 形態素解析済みトークン列からのキーワードの絞り込み（items_per_secondは1秒あたりのトークン数）。
+    # 比較のため以前の実装（keywords.filter_baseline）も計測する
+    if tokenizer.available:
+        token_lists = [tokenizer.tokenize(text) for text in texts]
+        token_count = sum(len(tokens) for tokens in token_lists)
+        results["keywords.filter_baseline"] = measure(
+            lambda: [filter_tokens_baseline(keywords, tokens) for tokens in token_lists], token_count, repeat
+        )
+        results["keywords.filter"] = measure(
+            lambda: [keywords.extract_words_from_tokens(tokens) for tokens in token_lists], token_count, repeat
+        )
+    else:
+        results["keywords.filter_baseline"] = None
+        results["keywords.filter"] = None
+
+    # キーワード抽出: janome経路と簡易分割経路
+    if keywords.tokenizer is not None:
+        results["keywords.janome"] = measure(lambda: keywords.extract_keywords(texts), len(texts), repeat)
+    else:
+        results["keywords.janome"] = None
+
+    fallback_keywords = KeywordExtractor()
+    fallback_keywords.tokenizer = None
+    results["keywords.simple"] = measure(lambda: fallback_keywords.extract_keywords(texts), len(texts), repeat)
+
+    # ワーカーで実行される共有トークン列の経路（メモなし）
+    _init_worker()
+    results["pipeline.shared_tokens"] = measure(
+        lambda: [_analyze_text(text) for text in texts], len(texts), repeat
+    )
+
+    return results
+
@@ -0,0 +1,123 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_youtube import create_app
+
+FAKE_YOUTUBE_BASE_URL = "http://fake-youtube/youtube/v3"
+
+
+def percentile(values: List[float], ratio: float) -> float:
+    """パーセンタイル値（最近傍法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(ratio * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def video_ids(count: int) -> List[str]:
+    """ベンチマーク用の動画ID（11文字）"""
+    return [f"bench{i:06d}" for i in range(count)]
+
+
+async def _run_requests(client: httpx.AsyncClient, path: str, ids: List[str],
+                        total_requests: int, concurrency: int) -> Dict[str, float]:
+    """同時実行数を保ちながらリクエストを送信し、レイテンシを集計"""
+    latencies: List[float] = []
+    status_counts: Dict[str, int] = {}
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index
+        while next_index < total_requests:
+            index = next_index
+            next_index += 1
+            video_id = ids[index % len(ids)]
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json={"video_url": f"https://www.youtube.com/watch?v={video_id}"})
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            status_counts[status] = status_counts.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "elapsed_seconds": elapsed,
+        "requests_per_second": total_requests / elapsed if elapsed > 0 else 0.0,
+        "latency_p50_ms": percentile(latencies, 0.50) * 1000,
+        "latency_p99_ms": percentile(latencies, 0.99) * 1000,
+        "latency_max_ms": max(latencies) * 1000 if latencies else 0.0,
+        "status_counts": status_counts,
+    }
+
+
+async def run_load_test(total_requests: int = 200, concurrency: int = 10, videos: int = 20,
+                        comments_per_video: int = 1000, latency_ms: float = 50.0,
+                        use_cache: bool = False, server_url: Optional[str] = None) -> Dict[str, object]:
+    """
+    /api/analyze のエンドツーエンド負荷テスト
+
+    server_urlを省略した場合は、バックエンドとYouTube APIスタブを同一プロセス内で動かす。
+    指定した場合は起動済みのサーバー（スタブに向けたもの）へHTTPで送信する。
+
+    Args:
+        total_requests: 送信するリクエスト数
+        concurrency: 同時に送信するリクエスト数
+        videos: 対象とする動画の種類数（リクエストは動画を順番に巡回する）
+        comments_per_video: スタブが返す1動画あたりのコメント数
+        latency_ms: スタブの応答遅延（ミリ秒）
+        use_cache: 分析結果キャッシュを有効にするか（プロセス内実行時のみ）
+        server_url: 負荷をかけるサーバーのURL
+
+    Returns:
+        スループットとレイテンシの計測結果
+    """
+    ids = video_ids(videos)
+    params = {
+        "total_requests": total_requests,
+        "concurrency": concurrency,
+        "videos": videos,
+        "comments_per_video": comments_per_video,
+        "latency_ms": latency_ms,
+        "use_cache": use_cache,
+    }
+
+    if server_url:
+        async with httpx.AsyncClient(base_url=server_url, timeout=300.0) as client:
+            result = await _run_requests(client, "/api/analyze", ids, total_requests, concurrency)
+        return {"params": {**params, "server_url": server_url}, **result}
+
+    import main
+    from utils.cache import MemoryCacheBackend, ResultCache
+    from utils.ratelimit import TokenBucket
+
+    # バックエンドの依存先をスタブに差し替える
+    fake_app = create_app(comments_per_video=comments_per_video, latency_ms=latency_ms)
+    youtube_client = main.youtube_client
+    youtube_client.api_key = "benchmark"
+    youtube_client.base_url = FAKE_YOUTUBE_BASE_URL
+    youtube_client.quota_bucket = TokenBucket(rate=1e9, capacity=1e9)
+    youtube_client._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_app), timeout=300.0)
+    main.MAX_COMMENTS = comments_per_video
+    main.result_cache = ResultCache(MemoryCacheBackend(), ttl_seconds=3600 if use_cache else 0)
+
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=300.0) as client:
+            result = await _run_requests(client, "/api/analyze", ids, total_requests, concurrency)
+            youtube_calls = (await youtube_client._client.get("http://fake-youtube/__stats")).json()
+    finally:
+        await youtube_client.aclose()
+        main.analysis_executor.shutdown()
+
+    return {"params": params, **result, "youtube_requests": youtube_calls}
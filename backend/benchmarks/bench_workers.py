@@ -0,0 +1,198 @@
+"""
+ワーカープロセス数ごとのスループットを計測する負荷テスト
+
+YouTube APIスタブと、WEB_WORKERSを変えたバックエンド（python main.py）をそれぞれ別プロセスで起動し、
+ワーカー数ごとに次の2つを計測する。
+
+- distinct: キャッシュを無効にして多数の動画を分析する（分析のCPU処理がボトルネック）
+- hot: キャッシュを有効にして少数の動画に同時にリクエストする（ワーカー間の重複排除の確認）
+
+    cd backend
+    python -m benchmarks.bench_workers --workers 1,2,4 --output bench_results_workers.json
+
+hotのyoutube_requestsがワーカー数によらず一定であれば、同じ動画のYouTube APIの呼び出しは
+ワーカー間で1回にまとめられている。
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.bench_e2e import _run_requests, video_ids
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args], cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def _stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def _wait_ready(url: str, path: str, process: subprocess.Popen, checks: int = 1,
+                      timeout: float = 120.0) -> None:
+    """サーバーが応答するまで待機（マルチワーカーの場合は連続checks回の成功を待つ）"""
+    deadline = time.monotonic() + timeout
+    succeeded = 0
+    async with httpx.AsyncClient(base_url=url, timeout=5.0) as client:
+        while succeeded < checks:
+            if process.poll() is not None:
+                raise RuntimeError(f"サーバーが終了しました（終了コード {process.returncode}）")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"サーバーが起動しませんでした: {url}")
+            try:
+                response = await client.get(path)
+                succeeded = succeeded + 1 if response.status_code == 200 else 0
+            except httpx.HTTPError:
+                succeeded = 0
+            await asyncio.sleep(0.1 if succeeded else 0.5)
+
+
+async def _youtube_requests(client: httpx.AsyncClient) -> Dict[str, int]:
+    return (await client.get("/__stats")).json()
+
+
+def _difference(after: Dict[str, int], before: Dict[str, int]) -> Dict[str, int]:
+    return {name: after[name] - before.get(name, 0) for name in after}
+
+
+async def _run_backend(workers: int, scenario: str, fake_url: str, fake_client: httpx.AsyncClient,
+                       args: argparse.Namespace) -> Dict[str, Any]:
+    """ワーカー数を指定してバックエンドを起動し、1つのシナリオの負荷をかける"""
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {
+            **os.environ,
+            "WEB_WORKERS": str(workers),
+            "BACKEND_PORT": str(port),
+            "DEBUG": "False",
+            "YOUTUBE_API_KEY": "benchmark",
+            "YOUTUBE_API_BASE_URL": f"{fake_url}/youtube/v3",
+            "YOUTUBE_QUOTA_PER_SECOND": "1000000",
+            "YOUTUBE_QUOTA_DAILY": "0",
+            "MAX_COMMENTS": str(args.video_comments),
+            "ANALYSIS_EXECUTOR": args.executor,
+            # 単一プロセスの場合もマルチワーカーと同じ共有ストアを使い、ワーカー数以外の条件を揃える
+            "CACHE_BACKEND": "sqlite",
+            "CACHE_SQLITE_PATH": os.path.join(data_dir, "cache.sqlite3"),
+            "CACHE_TTL_SECONDS": "3600" if scenario == "hot" else "0",
+            "CACHE_STALE_SECONDS": "0",
+            "COORDINATION_DB_PATH": os.path.join(data_dir, "coordination.sqlite3"),
+            "JOB_STORE_PATH": os.path.join(data_dir, "jobs.sqlite3"),
+            "VIDEO_STATE_PATH": os.path.join(data_dir, "video_state.sqlite3"),
+        }
+        backend = _start(["main.py"], env)
+        url = f"http://127.0.0.1:{port}"
+        try:
+            await _wait_ready(url, "/ready", backend, checks=workers * 3)
+            if scenario == "hot":
+                ids = video_ids(args.hot_videos)
+                total_requests = args.hot_requests
+            else:
+                ids = video_ids(args.videos)
+                total_requests = args.requests
+
+            before = await _youtube_requests(fake_client)
+            async with httpx.AsyncClient(base_url=url, timeout=300.0) as client:
+                result = await _run_requests(client, "/api/analyze", ids, total_requests, args.concurrency)
+            after = await _youtube_requests(fake_client)
+        finally:
+            _stop(backend)
+
+    return {"workers": workers, "scenario": scenario, **result, "youtube_requests": _difference(after, before)}
+
+
+async def run_worker_scaling(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """スタブを起動し、ワーカー数・シナリオごとに計測する"""
+    fake_port = _free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    fake = _start([
+        "-m", "benchmarks.fake_youtube", "--port", str(fake_port),
+        "--comments", str(args.video_comments), "--latency-ms", str(args.latency_ms),
+    ], dict(os.environ))
+
+    results = []
+    try:
+        await _wait_ready(fake_url, "/__stats", fake)
+        async with httpx.AsyncClient(base_url=fake_url, timeout=30.0) as fake_client:
+            for workers in args.workers:
+                for scenario in ("distinct", "hot"):
+                    result = await _run_backend(workers, scenario, fake_url, fake_client, args)
+                    print(
+                        f"workers={workers} {scenario}: {result['requests_per_second']:.1f} req/s, "
+                        f"p50 {result['latency_p50_ms']:.0f} ms, p99 {result['latency_p99_ms']:.0f} ms, "
+                        f"YouTube API {sum(result['youtube_requests'].values())}回",
+                        file=sys.stderr,
+                    )
+                    results.append(result)
+    finally:
+        _stop(fake)
+    return results
+
+
+def main() -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="ワーカープロセス数ごとのスループットの負荷テスト")
+    parser.add_argument("--output", default="bench_results_workers.json", help="結果の出力先（-で標準出力）")
+    parser.add_argument("--workers", default="1,2,4",
+                        type=lambda value: [int(count) for count in value.split(",")],
+                        help="計測するワーカープロセス数（カンマ区切り）")
+    parser.add_argument("--executor", default="thread",
+                        help="分析の実行方式（threadの場合は1ワーカーあたり1コアまでしか使えない）")
+    parser.add_argument("--requests", type=int, default=200, help="distinctのリクエスト数")
+    parser.add_argument("--videos", type=int, default=200, help="distinctの動画の種類数")
+    parser.add_argument("--hot-requests", type=int, default=200, help="hotのリクエスト数")
+    parser.add_argument("--hot-videos", type=int, default=4, help="hotの動画の種類数")
+    parser.add_argument("--concurrency", type=int, default=16, help="同時リクエスト数")
+    parser.add_argument("--video-comments", type=int, default=300, help="スタブが返す1動画あたりのコメント数")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="スタブの応答遅延（ミリ秒）")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "analysis_executor": args.executor,
+        },
+        "results": asyncio.run(run_worker_scaling(args)),
+    }
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"ベンチマーク結果を出力しました: {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import random
+from typing import List
+
+# 合成コメントの部品（実際のコメントに近い長さ・語彙になるよう組み合わせる）
+_SUBJECTS = [
+    '今回の動画', 'この説明', '編集', 'BGM', 'サムネ', '後半の展開', '最初の部分',
+    '解説', 'ゲスト', '企画', '声', '映像', 'この曲', 'ライブ', '料理',
+]
+_PREDICATES = [
+    'とても面白いです', '最高でした', '素晴らしいと思います', '分かりやすかったです',
+    'ちょっと微妙でした', 'つまらなかった', '良くないと思う', '感動しました',
+    'もう少し詳しく知りたいです', '残念でした', '楽しかったです', 'すごいですね',
+    'いつも通りでした', '納得いかない', '勉強になりました', 'ひどい',
+]
+_SUFFIXES = [
+    '', '！', '。', 'ｗ', 'www', '笑', '！！', '…', '。ありがとうございます',
+    '。また見ます', '。次回も楽しみにしています',
+]
+_SHORT_COMMENTS = [
+    '最高！', 'ありがとうございます', 'いいね！', '神回', '草', '好き', 'つまらない',
+    '初見です', '待ってました', 'すごい',
+]
+
+
+def generate_comments(count: int, seed: int = 0, duplicate_ratio: float = 0.2) -> List[str]:
+    """
+    合成の日本語コメントを生成
+
+    Args:
+        count: 生成するコメント数
+        seed: 乱数シード（同じ値なら同じコーパスを生成）
+        duplicate_ratio: 定型の短いコメント（重複しやすいもの）の割合
+
+    Returns:
+        コメントテキストのリスト
+    """
+    rng = random.Random(seed)
+    comments = []
+    for _ in range(count):
+        if rng.random() < duplicate_ratio:
+            comments.append(rng.choice(_SHORT_COMMENTS))
+            continue
+
+        sentences = [
+            f"{rng.choice(_SUBJECTS)}が{rng.choice(_PREDICATES)}"
+            for _ in range(rng.randint(1, 3))
+        ]
+        comments.append('。'.join(sentences) + rng.choice(_SUFFIXES))
+    return comments
@@ -0,0 +1,181 @@
+"""
+YouTube Data API v3（videos / commentThreads / comments）のローカルスタブ
+
+合成コメントを返すため、ネットワークやAPIキーなしでベンチマークを実行できる。
+
+単体で起動する場合:
+    python -m benchmarks.fake_youtube --port 8081 --comments 1000 --latency-ms 50
+
+バックエンドをスタブに向ける場合:
+    YOUTUBE_API_BASE_URL=http://localhost:8081/youtube/v3 YOUTUBE_API_KEY=dummy python main.py
+"""
+import argparse
+import asyncio
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+from benchmarks.corpus import generate_comments
+
+# この接頭辞で始まる動画IDは存在しない動画として扱う
+MISSING_VIDEO_PREFIX = "missing"
+
+_PUBLISHED_BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# commentThreadsに埋め込む返信の最大件数（YouTube APIと同じく最大5件）
+EMBEDDED_REPLIES = 5
+
+
+def create_app(comments_per_video: int = 1000, latency_ms: float = 0.0, page_size: int = 100,
+               replies_per_thread: int = 0) -> FastAPI:
+    """
+    スタブのアプリケーションを生成
+
+    Args:
+        comments_per_video: 1動画あたりのコメント数
+        latency_ms: 1リクエストあたりの応答遅延（ミリ秒）
+        page_size: 1ページあたりの最大件数（YouTube APIと同じく100）
+        replies_per_thread: 返信のあるスレッド（5件に1件）あたりの返信数
+
+    Returns:
+        FastAPIアプリケーション
+    """
+    app = FastAPI(title="Fake YouTube Data API")
+    corpora: Dict[str, List[str]] = {}
+    request_counts = {"videos": 0, "commentThreads": 0, "comments": 0}
+
+    def get_corpus(video_id: str) -> List[str]:
+        # 動画IDごとに決まったコーパスを返す（実行ごとに同じ内容）
+        if video_id not in corpora:
+            corpora[video_id] = generate_comments(comments_per_video, seed=zlib.crc32(video_id.encode()))
+        return corpora[video_id]
+
+    def reply_count(index: int) -> int:
+        return replies_per_thread if index % 5 == 0 else 0
+
+    def make_reply(video_id: str, index: int, reply_index: int) -> dict:
+        corpus = get_corpus(video_id)
+        parent_id = f"{video_id}-{index}"
+        published_at = (_PUBLISHED_BASE + timedelta(minutes=index, seconds=reply_index + 1))
+        published_at = published_at.isoformat().replace("+00:00", "Z")
+        text = corpus[(index + reply_index + 1) % len(corpus)]
+        return {
+            "id": f"{parent_id}.{reply_index}",
+            "snippet": {
+                "parentId": parent_id,
+                "textDisplay": text,
+                "textOriginal": text,
+                "likeCount": reply_index % 3,
+                "publishedAt": published_at,
+                "updatedAt": published_at,
+            },
+        }
+
+    async def simulate_latency() -> None:
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000)
+
+    @app.get("/youtube/v3/videos")
+    async def videos(id: str, part: str = "id", key: Optional[str] = None):
+        request_counts["videos"] += 1
+        await simulate_latency()
+        if id.startswith(MISSING_VIDEO_PREFIX):
+            return {"items": []}
+        return {"items": [{"id": id}]}
+
+    @app.get("/youtube/v3/commentThreads")
+    async def comment_threads(
+        videoId: str,
+        part: str = "snippet",
+        maxResults: int = Query(20, ge=1, le=100),
+        pageToken: Optional[str] = None,
+        order: str = "relevance",
+        key: Optional[str] = None,
+    ):
+        request_counts["commentThreads"] += 1
+        await simulate_latency()
+        if videoId.startswith(MISSING_VIDEO_PREFIX):
+            return JSONResponse(status_code=404, content={"error": {"code": 404, "message": "videoNotFound"}})
+
+        corpus = get_corpus(videoId)
+        offset = int(pageToken or 0)
+        limit = min(maxResults, page_size)
+        items = []
+        for index in range(offset, min(offset + limit, len(corpus))):
+            comment_id = f"{videoId}-{index}"
+            published_at = (_PUBLISHED_BASE + timedelta(minutes=index)).isoformat().replace("+00:00", "Z")
+            item = {
+                "id": comment_id,
+                "snippet": {
+                    "videoId": videoId,
+                    "totalReplyCount": reply_count(index),
+                    "topLevelComment": {
+                        "id": comment_id,
+                        "snippet": {
+                            "textDisplay": corpus[index],
+                            "textOriginal": corpus[index],
+                            "likeCount": index % 17,
+                            "publishedAt": published_at,
+                            "updatedAt": published_at,
+                        },
+                    },
+                },
+            }
+            if "replies" in part.split(",") and reply_count(index):
+                item["replies"] = {"comments": [
+                    make_reply(videoId, index, reply_index)
+                    for reply_index in range(min(reply_count(index), EMBEDDED_REPLIES))
+                ]}
+            items.append(item)
+
+        data = {"items": items, "pageInfo": {"totalResults": len(items), "resultsPerPage": limit}}
+        if offset + limit < len(corpus):
+            data["nextPageToken"] = str(offset + limit)
+        return data
+
+    @app.get("/youtube/v3/comments")
+    async def comments(
+        parentId: str,
+        part: str = "snippet",
+        maxResults: int = Query(20, ge=1, le=100),
+        pageToken: Optional[str] = None,
+        key: Optional[str] = None,
+    ):
+        request_counts["comments"] += 1
+        await simulate_latency()
+        video_id, _, index = parentId.rpartition("-")
+        total = reply_count(int(index)) if index.isdigit() else 0
+        offset = int(pageToken or 0)
+        limit = min(maxResults, page_size)
+        items = [make_reply(video_id, int(index), reply_index)
+                 for reply_index in range(offset, min(offset + limit, total))]
+
+        data = {"items": items, "pageInfo": {"totalResults": len(items), "resultsPerPage": limit}}
+        if offset + limit < total:
+            data["nextPageToken"] = str(offset + limit)
+        return data
+
+    @app.get("/__stats")
+    async def stats():
+        """受け付けたリクエスト数（ベンチマークでのAPI呼び出し回数の確認用）"""
+        return request_counts
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="YouTube Data APIのローカルスタブ")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--comments", type=int, default=1000, help="1動画あたりのコメント数")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="1リクエストあたりの応答遅延")
+    parser.add_argument("--replies", type=int, default=0, help="返信のあるスレッド（5件に1件）あたりの返信数")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.comments, args.latency_ms, replies_per_thread=args.replies),
+                host=args.host, port=args.port)
@@ -0,0 +1,90 @@
+"""
+オフラインのベンチマークを実行し、結果をJSONで出力する
+
+    cd backend
+    python -m benchmarks.run --output bench_results.json
+
+リリース間の性能比較には、同じ引数で実行した結果のJSONを比較する。
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+# ベンチマーク中はAPIキー未設定の警告や分析ログを抑制する
+os.environ.setdefault("YOUTUBE_API_KEY", "benchmark")
+logging.basicConfig(level=logging.WARNING)
+
+from benchmarks.bench_analyzers import run_analyzer_benchmarks  # noqa: E402
+from benchmarks.bench_e2e import run_load_test  # noqa: E402
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main() -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="YouTube Comment Analyzer のベンチマーク")
+    parser.add_argument("--output", default="bench_results.json", help="結果の出力先（-で標準出力）")
+    parser.add_argument("--comments", type=int, default=1000, help="分析器ベンチマークのコメント数")
+    parser.add_argument("--repeat", type=int, default=3, help="分析器ベンチマークの計測回数")
+    parser.add_argument("--seed", type=int, default=0, help="コーパス生成の乱数シード")
+    parser.add_argument("--requests", type=int, default=200, help="負荷テストのリクエスト数")
+    parser.add_argument("--concurrency", type=int, default=10, help="負荷テストの同時リクエスト数")
+    parser.add_argument("--videos", type=int, default=20, help="負荷テストの動画の種類数")
+    parser.add_argument("--video-comments", type=int, default=300, help="スタブが返す1動画あたりのコメント数")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="スタブの応答遅延（ミリ秒）")
+    parser.add_argument("--cache", action="store_true", help="負荷テストで分析結果キャッシュを有効にする")
+    parser.add_argument("--server-url", default=None, help="起動済みサーバーに負荷をかける場合のURL")
+    parser.add_argument("--skip-analyzers", action="store_true", help="分析器ベンチマークを省略")
+    parser.add_argument("--skip-e2e", action="store_true", help="負荷テストを省略")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "analysis_executor": os.getenv("ANALYSIS_EXECUTOR", "process"),
+        },
+    }
+
+    if not args.skip_analyzers:
+        results["analyzers"] = run_analyzer_benchmarks(args.comments, repeat=args.repeat, seed=args.seed)
+
+    if not args.skip_e2e:
+        results["e2e"] = asyncio.run(run_load_test(
+            total_requests=args.requests,
+            concurrency=args.concurrency,
+            videos=args.videos,
+            comments_per_video=args.video_comments,
+            latency_ms=args.latency_ms,
+            use_cache=args.cache,
+            server_url=args.server_url,
+        ))
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"ベンチマーク結果を出力しました: {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,16 @@
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
-from typing import List, Dict
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl
+from typing import AsyncIterator, List, Dict, Literal, Optional, Tuple
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+import hashlib
+import json
 import re
+import time
 import logging
 import os
 from dotenv import load_dotenv
@@ -10,18 +18,59 @@ from dotenv import load_dotenv
 # .envファイルを読み込み
 load_dotenv()
 
-from api.youtube import YouTubeClient
-from analyzer.sentiment import SentimentAnalyzer
-from analyzer.keywords import KeywordExtractor
+from api.youtube import YouTubeClient, YouTubeUnavailableError
+from analyzer.executor import PageAccumulator, create_analysis_executor, preload_analyzers
+from analyzer.trends import BUCKET_SECONDS, BucketSummary, TrendAccumulator, build_series
+from utils.cache import MemoryCacheBackend, ResultCache, create_result_cache
+from utils.comment_store import ColumnarCommentStore
+from utils.jobs import Job, JobQueue, JobStore, QueueFullError
+from utils.leases import LeaseFlight, LeaseStore
+from utils.metrics import STAGE_SECONDS, MetricsMiddleware, registry
+from utils.singleflight import SingleFlight
+from utils.video_state import VideoState, VideoStateStore
 
 # ログ設定
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 起動時に分析ワーカーを立ち上げて辞書を読み込むか（falseの場合は最初の分析時に読み込む）
+ANALYSIS_WARMUP = os.getenv("ANALYSIS_WARMUP", "True").lower() == "true"
+
+async def _warm_up_analyzers(app: FastAPI):
+    """バックグラウンドで分析器を読み込み、完了したらready状態にする"""
+    try:
+        await analysis_executor.warm_up()
+    except Exception as e:
+        logger.error("分析ワーカーのウォームアップエラー: %s", e)
+    finally:
+        # 失敗した場合も最初の分析時に再度読み込みを試みるため受け付けは開始する
+        app.state.analyzers_ready = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """起動時のウォームアップと終了時のリソース解放"""
+    # 辞書の読み込みを待たずにポートを開き、読み込み状況は /ready で公開する
+    app.state.analyzers_ready = not ANALYSIS_WARMUP
+    warm_up_task = asyncio.create_task(_warm_up_analyzers(app)) if ANALYSIS_WARMUP else None
+
+    # 前回の停止時に待機中・実行中だったジョブを再開する
+    job_queue = get_job_queue()
+    job_queue.store.purge_finished(time.time() - JOB_RETENTION_SECONDS)
+    job_queue.start()
+
+    yield
+
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+    await job_queue.stop()
+    analysis_executor.shutdown()
+    await youtube_client.aclose()
+
 app = FastAPI(
     title="YouTube Comment Analyzer",
     description="YouTube動画のコメントを分析し、感情分析と頻出キーワードを提供するAPI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS設定
@@ -34,14 +83,17 @@ cors_config = {
     "allow_headers": ["Content-Type", "Authorization"] if not is_debug else ["*"],
 }
 app.add_middleware(CORSMiddleware, **cors_config)
+app.add_middleware(MetricsMiddleware)
 
 # リクエスト・レスポンスモデル
 class AnalyzeRequest(BaseModel):
     video_url: HttpUrl
+    include_replies: bool = False  # 返信も分析するか（返信も最大コメント数に含める）
 
 class KeywordItem(BaseModel):
     word: str
     count: int
+    error: Optional[int] = None  # 近似集計時の誤差（真の出現回数は count - error 以上）
 
 class SentimentData(BaseModel):
     positive: int
@@ -53,10 +105,157 @@ class AnalyzeResponse(BaseModel):
     keywords: List[KeywordItem]
     total_comments: int
 
+class AnalyzeSnapshot(AnalyzeResponse):
+    done: bool
+    pages_fetched: int
+
+class IncrementalAnalyzeResponse(AnalyzeResponse):
+    new_comments: int
+    pages_fetched: int
+    truncated: bool = False  # 新着コメントの一部が未分析（次回以降に分析する）
+
+# 一括分析で受け付ける最大動画数と同時実行数の上限
+BATCH_MAX_VIDEOS = int(os.getenv("BATCH_MAX_VIDEOS", "200"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+class BatchAnalyzeRequest(BaseModel):
+    videos: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_VIDEOS)
+    max_concurrency: Optional[int] = Field(None, ge=1)
+    include_replies: bool = False
+
+class BatchItemResult(BaseModel):
+    video: str
+    video_id: Optional[str] = None
+    status_code: int
+    result: Optional[AnalyzeResponse] = None
+    error: Optional[str] = None
+
+class BatchAnalyzeResponse(BaseModel):
+    results: List[BatchItemResult]
+    aggregate: AnalyzeResponse
+    succeeded: int
+    failed: int
+
+# ジョブで取得できる最大コメント数
+JOB_MAX_COMMENTS = int(os.getenv("JOB_MAX_COMMENTS", "10000"))
+
+class JobRequest(BaseModel):
+    video_url: HttpUrl
+    max_comments: Optional[int] = Field(None, ge=1, le=JOB_MAX_COMMENTS)
+    priority: int = Field(0, ge=-100, le=100)  # 大きいほど先に実行
+    include_replies: bool = False
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str  # queued / running / succeeded / failed
+    video_id: str
+    max_comments: int
+    include_replies: bool
+    priority: int
+    pages_fetched: int
+    comments_analyzed: int
+    queue_position: Optional[int] = None
+    result: Optional[AnalyzeResponse] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+class StoreIngestRequest(BaseModel):
+    video_url: HttpUrl
+    max_comments: Optional[int] = Field(None, ge=1, le=JOB_MAX_COMMENTS)
+    include_replies: bool = False
+
+class StoreIngestResponse(BaseModel):
+    video_id: str
+    new_comments: int
+    stored_comments: int
+    pages_fetched: int
+
+# 時系列の最大バケット数と、バケットごとに返すキーワード数
+TREND_MAX_BUCKETS = int(os.getenv("TREND_MAX_BUCKETS", "720"))
+TREND_TOP_KEYWORDS = 5
+# 保存済みコメントの集計で指定できるキーワード数の上限
+STORE_MAX_TOP_N = 100
+
+class TrendRequest(BaseModel):
+    video_url: HttpUrl
+    bucket: Literal['hour', 'day'] = 'day'
+    max_comments: Optional[int] = Field(None, ge=1, le=JOB_MAX_COMMENTS)
+    include_replies: bool = False
+
+class TrendResponse(BaseModel):
+    bucket: str
+    timestamps: List[str]  # バケットの開始時刻（ISO 8601, UTC）
+    positive: List[int]
+    neutral: List[int]
+    negative: List[int]
+    keywords: List[List[KeywordItem]]
+    total_comments: int
+    omitted_comments: int  # 投稿日時が不明、または最大バケット数より古く時系列に含めなかったコメント数
+
 # 初期化
 youtube_client = YouTubeClient()
-sentiment_analyzer = SentimentAnalyzer()
-keyword_extractor = KeywordExtractor()
+analysis_executor = create_analysis_executor()
+result_cache = create_result_cache()
+
+# マルチワーカー構成で、ワーカープロセス間で分析の重複実行と1日のクォータを調整するSQLiteファイル
+COORDINATION_DB_PATH = os.getenv("COORDINATION_DB_PATH")
+if COORDINATION_DB_PATH and isinstance(result_cache.backend, MemoryCacheBackend):
+    logger.warning("分析結果キャッシュがプロセスごとのため、他のワーカーの分析結果を共有できません。CACHE_BACKEND=sqlite を設定してください")
+analysis_flight = SingleFlight(LeaseFlight(LeaseStore(COORDINATION_DB_PATH)) if COORDINATION_DB_PATH else None)
+
+# 差分再分析用の動画ごとの状態（最初に使用したときに生成）
+VIDEO_STATE_PATH = os.getenv("VIDEO_STATE_PATH", "data/video_state.sqlite3")
+_video_state_store: Optional[VideoStateStore] = None
+
+def get_video_state_store() -> VideoStateStore:
+    """差分再分析用の状態ストアを取得"""
+    global _video_state_store
+    if _video_state_store is None:
+        _video_state_store = VideoStateStore(VIDEO_STATE_PATH)
+    return _video_state_store
+
+# 非同期分析ジョブ（最初に使用したときに生成）
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "data/jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "100"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+JOB_RESUME_INTERRUPTED = os.getenv("JOB_RESUME_INTERRUPTED", "True").lower() == "true"
+_job_queue: Optional[JobQueue] = None
+
+def get_job_queue() -> JobQueue:
+    """非同期分析ジョブのキューを取得"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            JobStore(JOB_STORE_PATH), run_job, workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING,
+            resume_interrupted=JOB_RESUME_INTERRUPTED,
+        )
+    return _job_queue
+
+# 取得したコメントと分析結果の保存先（最初に使用したときに生成）
+COMMENT_STORE_PATH = os.getenv("COMMENT_STORE_PATH", "data/comments")
+_comment_store: Optional[ColumnarCommentStore] = None
+
+def get_comment_store() -> ColumnarCommentStore:
+    """コメントストアを取得"""
+    global _comment_store
+    if _comment_store is None:
+        _comment_store = ColumnarCommentStore(COMMENT_STORE_PATH)
+    return _comment_store
+
+# マルチワーカー構成でfork前に辞書を読み込み、各ワーカーでコピーオンライト共有する
+if os.getenv("ANALYSIS_PREFORK_WARMUP", "False").lower() == "true":
+    preload_analyzers()
+
+# 分析パラメータ（キャッシュキーにも使用）
+MAX_COMMENTS = int(os.getenv("MAX_COMMENTS", "100"))
+TOP_KEYWORDS = 20
+
+# 差分再分析で前回のチェックポイントを探して遡る最大コメント数（分析済みのコメントも含む）
+INCREMENTAL_SCAN_LIMIT = int(os.getenv("INCREMENTAL_SCAN_LIMIT", str(MAX_COMMENTS * 10)))
 
 def extract_video_id(url: str) -> str:
     """YouTube URLから動画IDを抽出"""
@@ -68,23 +267,203 @@ def extract_video_id(url: str) -> str:
     
     url_str = str(url).strip()
     
-    for pattern in patterns:
-        match = re.search(pattern, url_str)
-        if match:
-            video_id = match.group(1)
-            # 動画IDの長さチェック（YouTubeの動画IDは通常11文字）
-            if len(video_id) >= 10 and len(video_id) <= 12:
-                return video_id
+    with STAGE_SECONDS.time(stage="video_id"):
+        for pattern in patterns:
+            match = re.search(pattern, url_str)
+            if match:
+                video_id = match.group(1)
+                # 動画IDの長さチェック（YouTubeの動画IDは通常11文字）
+                if len(video_id) >= 10 and len(video_id) <= 12:
+                    return video_id
     
     raise ValueError("無効なYouTube URLです。正しい形式: https://www.youtube.com/watch?v=VIDEO_ID")
 
+def resolve_video_id(value: str) -> str:
+    """動画IDまたはYouTube URLから動画IDを取得"""
+    value = value.strip()
+    if re.fullmatch(r'[a-zA-Z0-9_-]{10,12}', value):
+        return value
+    return extract_video_id(value)
+
 @app.get("/")
 async def root():
-    """ヘルスチェック用エンドポイント"""
+    """ヘルスチェック用エンドポイント（プロセスが応答できるかのみ確認）"""
     return {"message": "YouTube Comment Analyzer API"}
 
+@app.get("/ready")
+async def ready(response: Response):
+    """レディネスチェック用エンドポイント（分析器の読み込みが完了するまで503）"""
+    if not getattr(app.state, "analyzers_ready", False):
+        response.status_code = 503
+        return {"status": "starting", "analyzers_ready": False}
+    return {"status": "ready", "analyzers_ready": True}
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-MatchヘッダーがETagに一致するか判定（弱い比較）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+def _content_etag(payload: Dict) -> str:
+    """分析結果の内容から弱いETagを生成（再分析で結果が変わればETagも変わる）"""
+    body = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return f'W/"{hashlib.blake2b(body.encode("utf-8"), digest_size=12).hexdigest()}"'
+
+def _cache_key(video_id: str, max_results: Optional[int] = None, include_replies: bool = False) -> str:
+    """分析結果キャッシュのキー"""
+    return ResultCache.make_key(
+        video_id, max_results=max_results or MAX_COMMENTS, top_n=TOP_KEYWORDS, include_replies=include_replies
+    )
+
+async def _stale_fallback(cache_key: str, error: YouTubeUnavailableError) -> Tuple[Dict, float]:
+    """
+    YouTube APIを呼び出せない場合（クォータ超過・障害）に期限切れのキャッシュを取得
+
+    Returns:
+        (キャッシュされた値, 保存からの経過秒数)
+
+    Raises:
+        YouTubeUnavailableError: 代わりに返せるキャッシュがない場合は元のエラー
+    """
+    stale = await result_cache.aget_stale(cache_key)
+    if stale is None:
+        raise error
+    value, age = stale
+    logger.warning("YouTube APIを利用できないため期限切れのキャッシュを返します (%s, %.0f秒前): %s",
+                   cache_key, age, error.detail)
+    return value, age
+
+def _mark_stale(response: Response, age: float) -> None:
+    """期限切れのキャッシュを返すレスポンスのヘッダーを設定"""
+    response.headers["Warning"] = '110 - "Response is Stale"'
+    response.headers["Age"] = str(int(age))
+    response.headers["Cache-Control"] = "no-cache"
+
+async def _analyze_uncached(video_id: str, cache_key: str,
+                            include_replies: bool = False) -> Tuple[AnalyzeResponse, Optional[float]]:
+    """
+    分析を実行して結果をキャッシュ（同じ動画の分析が実行中であれば、その結果を待つ）
+
+    YouTube APIを呼び出せない場合は期限切れのキャッシュがあればそれを返す。
+
+    Returns:
+        (分析結果, 期限切れのキャッシュを返した場合は保存からの経過秒数。それ以外はNone)
+    """
+    async def analyze_and_cache() -> Tuple[AnalyzeResponse, Optional[float]]:
+        try:
+            result = await run_analysis(video_id, include_replies)
+        except YouTubeUnavailableError as e:
+            value, age = await _stale_fallback(cache_key, e)
+            return AnalyzeResponse(**value), age
+        await result_cache.aset(cache_key, result.model_dump())
+        return result, None
+
+    def lookup() -> Optional[Tuple[AnalyzeResponse, Optional[float]]]:
+        # 他のワーカープロセスが分析した結果（スレッドで実行される）
+        cached = result_cache.get(cache_key)
+        return (AnalyzeResponse(**cached), None) if cached is not None else None
+
+    return await analysis_flight.do(cache_key, analyze_and_cache, lookup)
+
+async def analyze_video(video_id: str, include_replies: bool = False) -> AnalyzeResponse:
+    """キャッシュを利用して動画を分析"""
+    cache_key = _cache_key(video_id, include_replies=include_replies)
+    cached = await result_cache.aget(cache_key)
+    if cached is not None:
+        return AnalyzeResponse(**cached)
+    result, _ = await _analyze_uncached(video_id, cache_key, include_replies)
+    return result
+
+async def run_analysis(video_id: str, include_replies: bool = False) -> AnalyzeResponse:
+    """
+    コメント取得から感情分析・キーワード抽出までを実行
+
+    Args:
+        video_id: YouTube動画ID
+        include_replies: 返信も分析するか
+
+    Returns:
+        分析結果
+    """
+    # YouTube APIからコメント取得
+    with STAGE_SECONDS.time(stage="fetch_comments"):
+        comments = await youtube_client.get_comments(
+            video_id, max_results=MAX_COMMENTS, include_replies=include_replies
+        )
+    logger.info("コメント取得完了: %s件", len(comments))
+
+    if not comments:
+        raise HTTPException(status_code=404, detail="コメントが見つかりませんでした")
+
+    # 感情分析・キーワード抽出（イベントループを塞がないようワーカーで実行）
+    sentiment_result, keywords = await analysis_executor.analyze(comments, top_n=TOP_KEYWORDS)
+    logger.info("感情分析完了: %s", sentiment_result)
+    logger.info("キーワード抽出完了: %s件", len(keywords))
+
+    return _build_response(sentiment_result, keywords, len(comments))
+
+def _build_response(sentiment_result: Dict[str, int], keywords: List[Tuple],
+                    total_comments: int) -> AnalyzeResponse:
+    """分析結果からレスポンスを作成（キーワードは (単語, 回数) または近似集計の (単語, 回数, 誤差)）"""
+    return AnalyzeResponse(
+        sentiment=SentimentData(
+            positive=sentiment_result['positive'],
+            neutral=sentiment_result['neutral'],
+            negative=sentiment_result['negative']
+        ),
+        keywords=[
+            KeywordItem(word=word, count=count, error=rest[0] if rest else None)
+            for word, count, *rest in keywords
+        ],
+        total_comments=total_comments
+    )
+
+def _accumulated_response(accumulator: PageAccumulator) -> AnalyzeResponse:
+    """ページごとに集計した分析結果からレスポンスを作成"""
+    return _build_response(
+        accumulator.sentiment, accumulator.word_counts.most_common(TOP_KEYWORDS), accumulator.total_comments
+    )
+
+def _build_trend_response(bucket: str, summaries: Dict[int, BucketSummary], omitted_comments: int = 0) -> TrendResponse:
+    """バケットごとの集計結果から、空のバケットを補った時系列のレスポンスを作成"""
+    starts, series, omitted = build_series(summaries, BUCKET_SECONDS[bucket], TREND_MAX_BUCKETS)
+    return TrendResponse(
+        bucket=bucket,
+        timestamps=[
+            datetime.fromtimestamp(start, tz=timezone.utc).isoformat().replace("+00:00", "Z") for start in starts
+        ],
+        positive=[sentiment['positive'] for sentiment, _, _ in series],
+        neutral=[sentiment['neutral'] for sentiment, _, _ in series],
+        negative=[sentiment['negative'] for sentiment, _, _ in series],
+        keywords=[
+            [KeywordItem(word=word, count=count, error=rest[0] if rest else None) for word, count, *rest in keywords]
+            for _, keywords, _ in series
+        ],
+        total_comments=sum(total for _, _, total in series),
+        omitted_comments=omitted + omitted_comments,
+    )
+
+@app.get("/api/stats")
+async def stats():
+    """キャッシュ・重複排除・YouTube APIのクォータの統計情報"""
+    return {
+        "youtube": await asyncio.to_thread(youtube_client.stats),
+        "cache": await result_cache.astats(),
+        "singleflight": analysis_flight.stats(),
+        "analysis": analysis_executor.stats(),
+        "jobs": get_job_queue().stats(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheusのテキスト形式のメトリクス（段階ごとの所要時間・API呼び出し・キャッシュ・分析経路）"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/analyze", response_model=AnalyzeResponse)
-async def analyze_comments(request: AnalyzeRequest, response: Response):
+async def analyze_comments(request: AnalyzeRequest, response: Response, http_request: Request):
     """
     YouTube動画のコメントを分析して感情分析と頻出キーワードを返す
     """
@@ -94,48 +473,593 @@ async def analyze_comments(request: AnalyzeRequest, response: Response):
     try:
         # YouTube URLから動画IDを抽出
         video_id = extract_video_id(str(request.video_url))
-        response.headers["ETag"] = f"W/\"{video_id}\""
-        logger.info(f"動画ID抽出完了: {video_id}")
-        
-        # YouTube APIからコメント取得
-        comments = await youtube_client.get_comments(video_id)
-        logger.info(f"コメント取得完了: {len(comments)}件")
-        
-        if not comments:
-            raise HTTPException(status_code=404, detail="コメントが見つかりませんでした")
-        
-        # 感情分析
-        sentiment_result = sentiment_analyzer.analyze_batch(comments)
-        logger.info(f"感情分析完了: {sentiment_result}")
-        
-        # キーワード抽出
-        keywords = keyword_extractor.extract_keywords(comments, top_n=20)
-        logger.info(f"キーワード抽出完了: {len(keywords)}件")
-        
-        # レスポンス作成
-        response = AnalyzeResponse(
-            sentiment=SentimentData(
-                positive=sentiment_result['positive'],
-                neutral=sentiment_result['neutral'],
-                negative=sentiment_result['negative']
-            ),
-            keywords=[
-                KeywordItem(word=word, count=count)
-                for word, count in keywords
-            ],
-            total_comments=len(comments)
-        )
+        logger.info("動画ID抽出完了: %s", video_id)
+
+        cache_key = _cache_key(video_id, include_replies=request.include_replies)
+        cached = await result_cache.aget(cache_key)
+        if cached is not None:
+            logger.info("キャッシュヒット: %s", video_id)
+            result = AnalyzeResponse(**cached)
+        else:
+            result, stale_age = await _analyze_uncached(video_id, cache_key, request.include_replies)
+            if stale_age is not None:
+                _mark_stale(response, stale_age)
+
+        etag = _content_etag(result.model_dump())
+        response.headers["ETag"] = etag
+        # クライアントが同じ結果を保持している場合は本文を返さない
+        if _etag_matches(http_request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers={
+                name: value for name, value in response.headers.items()
+                if name in ("etag", "cache-control", "warning", "age")
+            })
+        return result
         
+    except ValueError as e:
+        logger.error("URL解析エラー: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("分析エラー: %s", e)
+        error_detail = f"分析処理中にエラーが発生しました: {str(e)}"
+        raise HTTPException(status_code=500, detail=error_detail)
+
+async def _stream_snapshots(cache_key: str, first_page: List[str],
+                            pages: AsyncIterator[List[str]]) -> AsyncIterator[str]:
+    """ページごとに分析結果を逐次集計し、途中経過をNDJSONで出力"""
+    accumulator = PageAccumulator(analysis_executor)
+
+    def snapshot(done: bool) -> str:
+        return AnalyzeSnapshot(
+            **_accumulated_response(accumulator).model_dump(), done=done,
+            pages_fetched=accumulator.pages_fetched,
+        ).model_dump_json() + "\n"
+
+    try:
+        page = first_page
+        while True:
+            # 次のページの取得は解析と並行して進む
+            await accumulator.add(page)
+            yield snapshot(done=False)
+
+            try:
+                page = await pages.__anext__()
+            except StopAsyncIteration:
+                break
+
+        logger.info("ストリーミング分析完了: %s件", accumulator.total_comments)
+        await result_cache.aset(cache_key, _accumulated_response(accumulator).model_dump())
+        yield snapshot(done=True)
+
+    except HTTPException as e:
+        # レスポンス送信開始後はステータスコードを変更できないためエラー行として通知
+        logger.error("ストリーミング分析エラー: %s", e.detail)
+        yield json.dumps({"error": e.detail, "status_code": e.status_code}, ensure_ascii=False) + "\n"
+    except Exception as e:
+        logger.error("ストリーミング分析エラー: %s", e)
+        error_detail = f"分析処理中にエラーが発生しました: {str(e)}"
+        yield json.dumps({"error": error_detail, "status_code": 500}, ensure_ascii=False) + "\n"
+    finally:
+        await pages.aclose()
+
+@app.post("/api/analyze/stream")
+async def analyze_comments_stream(request: AnalyzeRequest):
+    """
+    コメントをページ単位で取得・分析し、途中経過をNDJSON（1行1スナップショット）で返す
+    """
+    try:
+        video_id = extract_video_id(str(request.video_url))
+    except ValueError as e:
+        logger.error("URL解析エラー: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    cache_key = _cache_key(video_id, include_replies=request.include_replies)
+    cached = await result_cache.aget(cache_key)
+    if cached is not None:
+        logger.info("キャッシュヒット: %s", video_id)
+        line = AnalyzeSnapshot(**cached, done=True, pages_fetched=0).model_dump_json() + "\n"
+        return StreamingResponse(iter([line]), media_type="application/x-ndjson")
+
+    # 最初のページは送信開始前に取得し、エラーを通常のステータスコードで返す
+    pages = youtube_client.iter_comment_pages(video_id, MAX_COMMENTS, include_replies=request.include_replies)
+    try:
+        first_page = await pages.__anext__()
+    except StopAsyncIteration:
+        first_page = []
+    except YouTubeUnavailableError as e:
+        await pages.aclose()
+        value, age = await _stale_fallback(cache_key, e)
+        line = AnalyzeSnapshot(**value, done=True, pages_fetched=0).model_dump_json() + "\n"
+        response = StreamingResponse(iter([line]), media_type="application/x-ndjson")
+        _mark_stale(response, age)
         return response
-        
+    except Exception:
+        await pages.aclose()
+        raise
+
+    if not first_page:
+        await pages.aclose()
+        raise HTTPException(status_code=404, detail="コメントが見つかりませんでした")
+
+    return StreamingResponse(
+        _stream_snapshots(cache_key, first_page, pages),
+        media_type="application/x-ndjson"
+    )
+
+async def _analyze_batch_item(video: str, semaphore: asyncio.Semaphore,
+                              include_replies: bool = False) -> BatchItemResult:
+    """一括分析の1件を処理（失敗は例外にせず結果として返す）"""
+    try:
+        video_id = resolve_video_id(video)
+    except ValueError as e:
+        return BatchItemResult(video=video, status_code=400, error=str(e))
+
+    try:
+        async with semaphore:
+            result = await analyze_video(video_id, include_replies)
+        return BatchItemResult(video=video, video_id=video_id, status_code=200, result=result)
+    except HTTPException as e:
+        return BatchItemResult(video=video, video_id=video_id, status_code=e.status_code, error=e.detail)
+    except Exception as e:
+        logger.error("一括分析エラー (%s): %s", video_id, e)
+        return BatchItemResult(
+            video=video, video_id=video_id, status_code=500,
+            error=f"分析処理中にエラーが発生しました: {str(e)}"
+        )
+
+@app.post("/api/analyze/batch", response_model=BatchAnalyzeResponse)
+async def analyze_comments_batch(request: BatchAnalyzeRequest):
+    """
+    複数の動画（URLまたは動画ID）をまとめて分析
+
+    動画ごとの結果（失敗した場合はエラー）と、成功した動画全体の集計を返す。
+    集計のキーワードは各動画の上位キーワードを合算したもの。
+    """
+    concurrency = min(request.max_concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # 同じ動画が複数回指定された場合はキャッシュと重複排除により1回だけ分析される
+    results = await asyncio.gather(*[
+        _analyze_batch_item(video, semaphore, request.include_replies) for video in request.videos
+    ])
+
+    sentiment_result = {'positive': 0, 'neutral': 0, 'negative': 0}
+    word_counts: Counter = Counter()
+    total_comments = 0
+    for item in results:
+        if item.result is None:
+            continue
+        sentiment_result['positive'] += item.result.sentiment.positive
+        sentiment_result['neutral'] += item.result.sentiment.neutral
+        sentiment_result['negative'] += item.result.sentiment.negative
+        word_counts.update({keyword.word: keyword.count for keyword in item.result.keywords})
+        total_comments += item.result.total_comments
+
+    succeeded = sum(1 for item in results if item.result is not None)
+    logger.info("一括分析完了: 成功%s件 / 失敗%s件", succeeded, len(results) - succeeded)
+
+    return BatchAnalyzeResponse(
+        results=results,
+        aggregate=_build_response(sentiment_result, word_counts.most_common(TOP_KEYWORDS), total_comments),
+        succeeded=succeeded,
+        failed=len(results) - succeeded
+    )
+
+async def run_incremental_analysis(video_id: str) -> IncrementalAnalyzeResponse:
+    """
+    前回の分析以降に投稿されたコメントのみを取得・分析し、保存済みの集計に加算
+
+    コメントを新しい順に取得し、前回のチェックポイント以前のコメントを含むページに
+    到達した時点で取得を打ち切る。
+    1回に分析する新着コメントはMAX_COMMENTS件までとし、超えた分はチェックポイントを進めずに
+    次回以降に分析する（分析済みのコメントは読み飛ばして遡る）。
+    """
+    # SQLiteのロック待ちでイベントループを止めないよう、状態の読み書きはスレッドで実行する
+    store = get_video_state_store()
+    state = await asyncio.to_thread(store.load, video_id) or VideoState(video_id=video_id)
+
+    new_records = []
+    pages_fetched = 0
+    fetched_comments = 0
+    newest = state.checkpoint  # 取得したコメントの最新の投稿日時
+    truncated = False  # 新着コメントがMAX_COMMENTS件を超え、一部を次回に残した
+    skipped = False  # チェックポイントまで遡れず、一部の新着コメントを分析できなかった
+    # 初回は新しい順にMAX_COMMENTS件のみを分析する
+    scan_limit = INCREMENTAL_SCAN_LIMIT if state.checkpoint else MAX_COMMENTS
+    pages = youtube_client.iter_comment_records(video_id, scan_limit, order='time')
+    try:
+        async for records in pages:
+            pages_fetched += 1
+            fetched_comments += len(records)
+            unseen_ids = await asyncio.to_thread(store.filter_unseen, video_id, [record.id for record in records])
+            for record in records:
+                if record.id not in unseen_ids:
+                    continue
+                # チェックポイント以前のコメントは前回の分析対象外（上限で打ち切ったページの残り）のため数えない
+                if state.checkpoint and record.published_at and record.published_at <= state.checkpoint:
+                    continue
+                if len(new_records) >= MAX_COMMENTS:
+                    truncated = True
+                    break
+                new_records.append(record)
+            if truncated:
+                break
+            newest = max([newest] + [record.published_at for record in records if record.published_at])
+
+            # 新しい順のため、以降のページは全て分析済み
+            if state.checkpoint and any(
+                record.published_at and record.published_at <= state.checkpoint for record in records
+            ):
+                break
+        else:
+            skipped = bool(state.checkpoint) and fetched_comments >= scan_limit
+    finally:
+        await pages.aclose()
+
+    if truncated:
+        logger.warning("新着コメントが上限(%s件)を超えたため、残りは次回に分析します: %s", MAX_COMMENTS, video_id)
+    elif skipped:
+        logger.warning("チェックポイントまで遡れなかったため(%s件)、それ以前の新着コメントは分析しません: %s",
+                       scan_limit, video_id)
+    logger.info("差分取得完了: 新着%s件 (%sページ)", len(new_records), pages_fetched)
+
+    if new_records:
+        # 保存済みの集計に加算するため厳密に集計する
+        sentiment_result, word_counts = await analysis_executor.analyze_counts(
+            [record.text for record in new_records], exact=True
+        )
+        for label, count in sentiment_result.items():
+            state.sentiment[label] += count
+        state.word_counts.update(word_counts)
+        state.total_comments += len(new_records)
+    # 取得したコメントが全て分析済みになった場合のみチェックポイントを進める
+    checkpoint = state.checkpoint if truncated else newest
+    if new_records or checkpoint != state.checkpoint:
+        state.checkpoint = checkpoint
+        await asyncio.to_thread(store.save, state, [record.id for record in new_records])
+
+    if state.total_comments == 0:
+        raise HTTPException(status_code=404, detail="コメントが見つかりませんでした")
+
+    result = _build_response(state.sentiment, state.word_counts.most_common(TOP_KEYWORDS), state.total_comments)
+    return IncrementalAnalyzeResponse(
+        **result.model_dump(), new_comments=len(new_records), pages_fetched=pages_fetched,
+        truncated=truncated or skipped,
+    )
+
+@app.post("/api/analyze/incremental", response_model=IncrementalAnalyzeResponse)
+async def analyze_comments_incremental(request: AnalyzeRequest):
+    """
+    前回の分析以降の新着コメントのみを分析し、累計の分析結果を返す
+    """
+    try:
+        video_id = extract_video_id(str(request.video_url))
+        logger.info("動画ID抽出完了: %s", video_id)
+        if request.include_replies:
+            raise HTTPException(status_code=400, detail="差分再分析は返信の分析に対応していません")
+
+        # 同じ動画の差分分析が同時に走ると二重に加算されるため、実行中のものに合流させる。
+        # 他のワーカープロセスで実行中の場合は完了を待ってから実行する（結果は共有しない）
+        return await analysis_flight.do(
+            f"incremental|{video_id}", lambda: run_incremental_analysis(video_id), lambda: None
+        )
+
     except ValueError as e:
-        logger.error(f"URL解析エラー: {e}")
+        logger.error("URL解析エラー: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"分析エラー: {e}")
+        logger.error("分析エラー: %s", e)
         error_detail = f"分析処理中にエラーが発生しました: {str(e)}"
         raise HTTPException(status_code=500, detail=error_detail)
 
+@app.delete("/api/analyze/incremental/{video_id}", status_code=204)
+async def reset_incremental_state(video_id: str):
+    """差分再分析の保存済みの状態（累計の集計と分析済みコメント）を削除"""
+    try:
+        video_id = resolve_video_id(video_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    deleted = await asyncio.to_thread(get_video_state_store().delete, video_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="差分再分析の状態がありません")
+    return Response(status_code=204)
+
+async def run_trend_analysis(video_id: str, bucket: str, max_comments: int,
+                             include_replies: bool) -> TrendResponse:
+    """
+    コメントを取得し、投稿日時のバケットごとに感情別件数と上位キーワードを集計
+
+    ページを取得するごとにコメント単位で分析し、バケットごとの集計に加算する（全体の分析は1回のみ）。
+    """
+    trends = TrendAccumulator(bucket, analysis_executor.new_word_counts)
+    pages = youtube_client.iter_comment_records(
+        video_id, max_comments, order='time', include_replies=include_replies
+    )
+    try:
+        async for records in pages:
+            results = await analysis_executor.analyze_each([record.text for record in records])
+            trends.add([record.published_at for record in records], results)
+    finally:
+        await pages.aclose()
+
+    if trends.total_comments == 0 and trends.undated_comments == 0:
+        raise HTTPException(status_code=404, detail="コメントが見つかりませんでした")
+
+    return _build_trend_response(bucket, trends.summaries(TREND_TOP_KEYWORDS), trends.undated_comments)
+
+@app.post("/api/analyze/trends", response_model=TrendResponse)
+async def analyze_comment_trends(request: TrendRequest, response: Response):
+    """
+    コメントの感情と頻出キーワードの推移を、1時間または1日ごとの時系列で返す
+
+    新しいコメントから順に最大 max_comments 件を取得して集計する。
+    """
+    try:
+        video_id = extract_video_id(str(request.video_url))
+        max_comments = request.max_comments or MAX_COMMENTS
+        cache_key = ResultCache.make_key(
+            video_id, max_results=max_comments, top_n=TREND_TOP_KEYWORDS,
+            include_replies=request.include_replies, trend=request.bucket,
+        )
+        cached = await result_cache.aget(cache_key)
+        if cached is not None:
+            return TrendResponse(**cached)
+
+        async def analyze_and_cache() -> Tuple[TrendResponse, Optional[float]]:
+            try:
+                result = await run_trend_analysis(video_id, request.bucket, max_comments, request.include_replies)
+            except YouTubeUnavailableError as e:
+                value, age = await _stale_fallback(cache_key, e)
+                return TrendResponse(**value), age
+            await result_cache.aset(cache_key, result.model_dump())
+            return result, None
+
+        def lookup() -> Optional[Tuple[TrendResponse, Optional[float]]]:
+            cached = result_cache.get(cache_key)
+            return (TrendResponse(**cached), None) if cached is not None else None
+
+        result, stale_age = await analysis_flight.do(cache_key, analyze_and_cache, lookup)
+        if stale_age is not None:
+            _mark_stale(response, stale_age)
+        return result
+
+    except ValueError as e:
+        logger.error("URL解析エラー: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("分析エラー: %s", e)
+        raise HTTPException(status_code=500, detail=f"分析処理中にエラーが発生しました: {str(e)}")
+
+async def run_job(job: Job) -> None:
+    """
+    ジョブとしてコメント取得と分析を実行し、進捗と結果をジョブストアに保存
+
+    ページを取得するごとに分析して集計し、取得済みページ数と分析済みコメント数を更新する。
+    ジョブストアへの書き込みはイベントループを止めないようスレッドで実行する。
+    """
+    store = get_job_queue().store
+    cache_key = _cache_key(job.video_id, job.max_comments, job.include_replies)
+    cached = await result_cache.aget(cache_key)
+    if cached is not None:
+        await asyncio.to_thread(store.update_progress, job.id, 0, cached['total_comments'])
+        await asyncio.to_thread(store.complete, job.id, cached)
+        return
+
+    accumulator = PageAccumulator(analysis_executor)
+    pages = youtube_client.iter_comment_pages(
+        job.video_id, max_results=job.max_comments, include_replies=job.include_replies
+    )
+    try:
+        async for page in pages:
+            # 次のページの取得は解析と並行して進む
+            await accumulator.add(page)
+            await asyncio.to_thread(
+                store.update_progress, job.id, accumulator.pages_fetched, accumulator.total_comments
+            )
+    except HTTPException as e:
+        stale = await result_cache.aget_stale(cache_key) if isinstance(e, YouTubeUnavailableError) else None
+        if stale is not None:
+            logger.warning("YouTube APIを利用できないため期限切れのキャッシュで完了します (%s): %s", job.id, e.detail)
+            await asyncio.to_thread(store.complete, job.id, stale[0])
+            return
+        logger.error("ジョブの分析エラー (%s): %s", job.id, e.detail)
+        await asyncio.to_thread(store.fail, job.id, e.status_code, e.detail)
+        return
+    finally:
+        await pages.aclose()
+
+    if accumulator.total_comments == 0:
+        await asyncio.to_thread(store.fail, job.id, 404, "コメントが見つかりませんでした")
+        return
+
+    result = _accumulated_response(accumulator).model_dump()
+    await result_cache.aset(cache_key, result)
+    await asyncio.to_thread(store.complete, job.id, result)
+    logger.info("ジョブ完了 (%s): %s件", job.id, accumulator.total_comments)
+
+def _job_response(job: Job, queue: JobQueue) -> JobResponse:
+    """ジョブの状態からレスポンスを作成"""
+    return JobResponse(
+        job_id=job.id,
+        status=job.status,
+        video_id=job.video_id,
+        max_comments=job.max_comments,
+        include_replies=job.include_replies,
+        priority=job.priority,
+        pages_fetched=job.pages_fetched,
+        comments_analyzed=job.comments_analyzed,
+        queue_position=queue.queue_position(job.id),
+        result=AnalyzeResponse(**job.result) if job.result is not None else None,
+        error=job.error,
+        status_code=job.status_code,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+@app.post("/api/jobs", response_model=JobResponse, status_code=202)
+async def create_job(request: JobRequest, response: Response):
+    """
+    コメント取得と分析をバックグラウンドのジョブとして登録し、ジョブIDをすぐに返す
+
+    結果は GET /api/jobs/{job_id} で取得する。
+    """
+    try:
+        video_id = extract_video_id(str(request.video_url))
+    except ValueError as e:
+        logger.error("URL解析エラー: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    queue = get_job_queue()
+    try:
+        job = await queue.submit(
+            video_id, request.max_comments or MAX_COMMENTS, request.priority, request.include_replies
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return _job_response(job, queue)
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """ジョブの進捗（取得済みページ数・分析済みコメント数）と、完了後は分析結果を返す"""
+    queue = get_job_queue()
+    job = await asyncio.to_thread(queue.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="ジョブが見つかりません")
+    return _job_response(job, queue)
+
+async def run_store_ingest(video_id: str, max_comments: int, include_replies: bool) -> StoreIngestResponse:
+    """
+    コメントを取得してコメント単位で分析し、コメントストアに追記
+
+    ページを取得するごとに分析・保存するため、取得件数が多くてもメモリ使用量は1ページ分に収まる。
+    """
+    store = get_comment_store()
+    new_comments = 0
+    pages_fetched = 0
+
+    pages = youtube_client.iter_comment_records(video_id, max_comments, include_replies=include_replies)
+    try:
+        async for records in pages:
+            results = await analysis_executor.analyze_each([record.text for record in records])
+            new_comments += await asyncio.to_thread(store.append, video_id, records, results)
+            pages_fetched += 1
+    finally:
+        await pages.aclose()
+
+    stored = store.open(video_id)
+    logger.info("コメントを保存しました (%s): 新規%s件 (%sページ)", video_id, new_comments, pages_fetched)
+    return StoreIngestResponse(
+        video_id=video_id,
+        new_comments=new_comments,
+        stored_comments=stored.rows if stored is not None else 0,
+        pages_fetched=pages_fetched,
+    )
+
+@app.post("/api/store/ingest", response_model=StoreIngestResponse)
+async def ingest_comments(request: StoreIngestRequest):
+    """
+    コメントを取得・分析してコメントストアに保存（保存済みのコメントは読み飛ばす）
+
+    保存したコメントは GET /api/store/{video_id} でYouTube APIを呼び出さずに再集計できる。
+    """
+    try:
+        video_id = extract_video_id(str(request.video_url))
+        return await run_store_ingest(video_id, request.max_comments or MAX_COMMENTS, request.include_replies)
+
+    except ValueError as e:
+        logger.error("URL解析エラー: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("コメント保存エラー: %s", e)
+        raise HTTPException(status_code=500, detail=f"コメントの保存中にエラーが発生しました: {str(e)}")
+
+def _to_epoch_seconds(value: Optional[datetime]) -> Optional[int]:
+    """クエリの日時をUNIX秒に変換（タイムゾーンの指定がない場合はUTC）"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+@app.get("/api/store/{video_id}", response_model=AnalyzeResponse)
+async def aggregate_stored_comments(video_id: str, since: Optional[datetime] = None,
+                                    until: Optional[datetime] = None,
+                                    top_n: int = Query(TOP_KEYWORDS, ge=1, le=STORE_MAX_TOP_N)):
+    """
+    保存済みのコメントから感情別の件数と上位キーワードを集計（YouTube APIは呼び出さない）
+
+    since・untilを指定した場合は、投稿日時がsince以上until未満のコメントのみを集計する。
+    """
+    try:
+        stored = get_comment_store().open(video_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if stored is None:
+        raise HTTPException(status_code=404, detail="保存済みのコメントがありません")
+
+    with STAGE_SECONDS.time(stage="store_aggregate"):
+        sentiment_result, keywords, total = await asyncio.to_thread(
+            stored.aggregate, _to_epoch_seconds(since), _to_epoch_seconds(until), top_n
+        )
+    return _build_response(sentiment_result, keywords, total)
+
+@app.get("/api/store/{video_id}/trends", response_model=TrendResponse)
+async def stored_comment_trends(video_id: str, bucket: Literal['hour', 'day'] = 'day',
+                                since: Optional[datetime] = None, until: Optional[datetime] = None,
+                                top_n: int = Query(TREND_TOP_KEYWORDS, ge=1, le=STORE_MAX_TOP_N)):
+    """保存済みのコメントから、感情と頻出キーワードの推移を時系列で返す（YouTube APIは呼び出さない）"""
+    try:
+        stored = get_comment_store().open(video_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if stored is None:
+        raise HTTPException(status_code=404, detail="保存済みのコメントがありません")
+
+    with STAGE_SECONDS.time(stage="store_aggregate"):
+        summaries = await asyncio.to_thread(
+            stored.trends, BUCKET_SECONDS[bucket], _to_epoch_seconds(since), _to_epoch_seconds(until), top_n
+        )
+    return _build_trend_response(bucket, summaries)
+
+@app.delete("/api/store/{video_id}", status_code=204)
+async def delete_stored_comments(video_id: str):
+    """動画の保存済みコメントを削除"""
+    try:
+        deleted = await asyncio.to_thread(get_comment_store().delete, video_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail="保存済みのコメントがありません")
+    return Response(status_code=204)
+
+def configure_multi_worker(workers: int) -> None:
+    """
+    マルチワーカー構成の既定値を環境変数に設定（起動するワーカープロセスに引き継がれる）
+
+    - 分析結果キャッシュをSQLiteにしてワーカー間で共有する
+    - 分析の重複実行と1日のクォータをCOORDINATION_DB_PATHでワーカー間で調整する
+    - 分析ワーカー数をCPUコア数をワーカー数で割った値にする
+    - 中断されたジョブの再実行は、ワーカーの起動前にここで1回だけ行う
+    """
+    os.environ.setdefault("CACHE_BACKEND", "sqlite")
+    os.environ.setdefault("COORDINATION_DB_PATH", "data/coordination.sqlite3")
+    os.environ.setdefault("ANALYSIS_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+    if JOB_RESUME_INTERRUPTED:
+        requeued = JobStore(JOB_STORE_PATH).requeue_interrupted()
+        if requeued:
+            logger.info("中断されていたジョブを待機中に戻しました: %s件", requeued)
+        os.environ["JOB_RESUME_INTERRUPTED"] = "False"
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -144,10 +1068,18 @@ if __name__ == "__main__":
     
     # デバッグモードの設定
     debug_mode = os.getenv("DEBUG", "False").lower() == "true"
-    
-    uvicorn.run(
-        app, 
-        host="0.0.0.0", 
-        port=port,
-        reload=debug_mode
-    )
+
+    # ワーカープロセス数（2以上の場合はCPUコアごとに分析を並列化する本番向けの構成）
+    web_workers = int(os.getenv("WEB_WORKERS", "1"))
+
+    if web_workers > 1 and not debug_mode:
+        configure_multi_worker(web_workers)
+        logger.info("ワーカープロセス%s個で起動します", web_workers)
+        uvicorn.run("main:app", host="0.0.0.0", port=port, workers=web_workers)
+    else:
+        uvicorn.run(
+            app, 
+            host="0.0.0.0", 
+            port=port,
+            reload=debug_mode
+        )
@@ -0,0 +1,82 @@
+"""
+テスト共通の設定
+
+mainは読み込み時に環境変数から設定を読むため、読み込む前にテスト用の値を設定する。
+保存先は一時ディレクトリにし、YouTube APIはbenchmarks.fake_youtubeのスタブに差し替える。
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+_DATA_DIR = tempfile.mkdtemp(prefix="yt-analyzer-test-")
+for name, value in {
+    "YOUTUBE_API_KEY": "test",
+    "YOUTUBE_API_BASE_URL": "http://fake-youtube/youtube/v3",
+    "YOUTUBE_QUOTA_PER_SECOND": "1000000",
+    "YOUTUBE_QUOTA_DAILY": "0",
+    "ANALYSIS_EXECUTOR": "thread",
+    "ANALYSIS_WORKERS": "1",
+    "ANALYSIS_WARMUP": "False",
+    "CACHE_BACKEND": "memory",
+    "MAX_COMMENTS": "300",
+    "VIDEO_STATE_PATH": os.path.join(_DATA_DIR, "video_state.sqlite3"),
+    "JOB_STORE_PATH": os.path.join(_DATA_DIR, "jobs.sqlite3"),
+    "COMMENT_STORE_PATH": os.path.join(_DATA_DIR, "comments"),
+}.items():
+    os.environ[name] = value
+os.environ.pop("COORDINATION_DB_PATH", None)
+os.environ.pop("ANALYSIS_MEMO_PATH", None)
+
+# スタブが1動画あたりに返すコメント数
+COMMENTS_PER_VIDEO = 250
+VIDEO_ID = "abcdefghijk"
+VIDEO_URL = f"https://www.youtube.com/watch?v={VIDEO_ID}"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def youtube(monkeypatch):
+    """YouTube APIのスタブに向けたクライアント"""
+    import httpx
+
+    import main
+    from api.youtube import YouTubeClient
+    from benchmarks.fake_youtube import create_app
+
+    client = YouTubeClient()
+    client._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(COMMENTS_PER_VIDEO)))
+    monkeypatch.setattr(main, "youtube_client", client)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def client(youtube, monkeypatch, tmp_path):
+    """テストごとに状態を分けたバックエンドのクライアント"""
+    import httpx
+
+    import main
+    from utils.cache import MemoryCacheBackend, ResultCache
+    from utils.singleflight import SingleFlight
+    from utils.video_state import VideoStateStore
+
+    monkeypatch.setattr(main, "result_cache", ResultCache(MemoryCacheBackend(), ttl_seconds=3600))
+    monkeypatch.setattr(main, "analysis_flight", SingleFlight())
+    monkeypatch.setattr(main, "_video_state_store", VideoStateStore(str(tmp_path / "video_state.sqlite3")))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        yield client
+
+
+async def youtube_requests(youtube) -> dict:
+    """スタブが受け付けたエンドポイントごとのリクエスト数"""
+    return (await youtube._client.get("http://fake-youtube/__stats")).json()
@@ -0,0 +1,20 @@
+import pytest
+
+from benchmarks.fake_youtube import MISSING_VIDEO_PREFIX
+from conftest import COMMENTS_PER_VIDEO, VIDEO_ID, VIDEO_URL
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_batch_reports_status_per_video(client):
+    response = await client.post("/api/analyze/batch", json={
+        "videos": [VIDEO_URL, f"{MISSING_VIDEO_PREFIX}0001", "not a video", "bcdefghijkl"],
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["status_code"] for item in body["results"]] == [200, 404, 400, 200]
+    assert [item["video_id"] for item in body["results"]] == [VIDEO_ID, f"{MISSING_VIDEO_PREFIX}0001", None, "bcdefghijkl"]
+    assert body["results"][1]["error"] and body["results"][1]["result"] is None
+    assert (body["succeeded"], body["failed"]) == (2, 2)
+    assert body["aggregate"]["total_comments"] == 2 * COMMENTS_PER_VIDEO
@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+from conftest import COMMENTS_PER_VIDEO, VIDEO_URL, youtube_requests
+from utils.cache import CacheBackend, MemoryCacheBackend, ResultCache, SQLiteCacheBackend
+
+pytestmark = pytest.mark.anyio
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", 1, 0.0)
+    backend.set("b", 2, 0.0)
+    backend.get("a")
+    backend.set("c", 3, 0.0)
+
+    assert backend.get("b") is None
+    assert [backend.get(key)[0] for key in ("a", "c")] == [1, 3]
+
+
+def test_result_cache_expires_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("utils.cache.time.time", lambda: now[0])
+    cache = ResultCache(SQLiteCacheBackend(str(tmp_path / "cache.sqlite3")), ttl_seconds=60, stale_ttl_seconds=60)
+    cache.set("video|", {"total_comments": 1})
+
+    now[0] += 59
+    assert cache.get("video|") == {"total_comments": 1}
+    now[0] += 2
+    assert cache.get("video|") is None
+    assert cache.get_stale("video|") == ({"total_comments": 1}, 61)
+    # 代替用の保持期間も過ぎたものは削除する
+    now[0] += 60
+    assert cache.get("video|") is None
+    assert len(cache.backend) == 0
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_expired_entry_is_a_miss_while_database_is_locked(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("utils.cache.time.time", lambda: now[0])
+    monkeypatch.setattr("utils.cache.BUSY_TIMEOUT_SECONDS", 0.05)
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResultCache(SQLiteCacheBackend(path), ttl_seconds=1)
+    cache.set("video|", {"total_comments": 1})
+
+    # 他のワーカーが書き込み中で、期限切れの値を削除できない
+    other = sqlite3.connect(path)
+    other.execute("BEGIN IMMEDIATE")
+    now[0] += 2
+    assert cache.get("video|") is None
+    cache.backend.clear()
+    other.rollback()
+
+    assert len(cache.backend) == 1
+    cache.backend.clear()
+    assert len(cache.backend) == 0
+
+
+def test_cache_backend_requires_all_methods():
+    class PartialBackend(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialBackend()
+
+
+async def test_analyze_returns_304_for_matching_etag(client, youtube):
+    response = await client.post("/api/analyze", json={"video_url": VIDEO_URL})
+    assert response.status_code == 200
+    assert response.json()["total_comments"] == COMMENTS_PER_VIDEO
+    etag = response.headers["ETag"]
+
+    cached = await client.post("/api/analyze", json={"video_url": VIDEO_URL}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert cached.content == b""
+
+    other = await client.post("/api/analyze", json={"video_url": VIDEO_URL}, headers={"If-None-Match": 'W/"other"'})
+    assert other.status_code == 200
+    assert other.headers["ETag"] == etag
+    # 2回目以降はキャッシュから返す
+    assert (await youtube_requests(youtube))["commentThreads"] == 3
@@ -0,0 +1,136 @@
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import main
+from api.youtube import CommentRecord
+from utils.comment_store import ColumnarCommentStore
+
+VIDEO_ID = "abcdefghijk"
+
+
+def _record(index: int, text: str) -> CommentRecord:
+    return CommentRecord(id=f"c{index}", text=text, published_at=f"2024-01-01T00:{index:02d}:00Z", like_count=index)
+
+
+def _rows(stored):
+    return [(stored.comment_id(row), stored.text(row)) for row in range(stored.rows)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ColumnarCommentStore(str(tmp_path / "comments"))
+
+
+def test_append_and_aggregate(store):
+    records = [_record(0, "最高の動画"), _record(1, "つまらない説明"), _record(2, "最高です")]
+    results = [("positive", ["最高", "動画"]), ("negative", ["説明"]), ("positive", ["最高"])]
+
+    assert store.append(VIDEO_ID, records, results) == 3
+
+    stored = store.open(VIDEO_ID)
+    assert _rows(stored) == [("c0", "最高の動画"), ("c1", "つまらない説明"), ("c2", "最高です")]
+    sentiment, keywords, total = stored.aggregate()
+    assert sentiment == {"positive": 2, "neutral": 0, "negative": 1}
+    assert keywords == [("最高", 2), ("動画", 1), ("説明", 1)]
+    assert total == 3
+    assert stored.like_count.tolist() == [0, 1, 2]
+
+
+def test_append_skips_stored_and_duplicate_ids(store):
+    store.append(VIDEO_ID, [_record(0, "a")], [("neutral", ["a"])])
+
+    added = store.append(
+        VIDEO_ID,
+        [_record(0, "a"), _record(1, "b"), _record(1, "b")],
+        [("neutral", ["a"]), ("positive", ["b"]), ("positive", ["b"])],
+    )
+
+    assert added == 1
+    stored = store.open(VIDEO_ID)
+    assert _rows(stored) == [("c0", "a"), ("c1", "b")]
+    assert store.append(VIDEO_ID, [_record(1, "b")], [("positive", ["b"])]) == 0
+
+
+def test_interrupted_append_is_truncated_on_next_append(store, monkeypatch):
+    store.append(VIDEO_ID, [_record(0, "最高")], [("positive", ["最高"])])
+
+    # 列の書き込み後、meta.jsonを更新する前に停止した状態を再現する
+    def crash(directory, meta):
+        raise OSError("停止")
+
+    monkeypatch.setattr(ColumnarCommentStore, "_write_meta", staticmethod(crash))
+    with pytest.raises(OSError):
+        store.append(VIDEO_ID, [_record(1, "途中で消える")], [("negative", ["消える"])])
+    monkeypatch.undo()
+
+    # 読み取り側は最後に完了した状態を参照する
+    stored = store.open(VIDEO_ID)
+    assert _rows(stored) == [("c0", "最高")]
+    directory = os.path.join(store.root, VIDEO_ID)
+    assert os.path.getsize(os.path.join(directory, "text.bin")) > len("最高".encode("utf-8"))
+
+    # 再起動後の追記で未完了の部分を切り詰めてから書き込む
+    restarted = ColumnarCommentStore(store.root)
+    assert restarted.append(VIDEO_ID, [_record(2, "面白い")], [("positive", ["面白い"])]) == 1
+
+    stored = restarted.open(VIDEO_ID)
+    assert _rows(stored) == [("c0", "最高"), ("c2", "面白い")]
+    assert stored.vocabulary() == ["最高", "面白い"]
+    assert stored.aggregate() == ({"positive": 2, "neutral": 0, "negative": 0}, [("最高", 1), ("面白い", 1)], 2)
+    # 中断された追記のコメントは保存されていないため、再度追記できる
+    assert restarted.append(VIDEO_ID, [_record(1, "再取得")], [("neutral", [])]) == 1
+
+
+def test_delete_and_invalid_video_id(store):
+    store.append(VIDEO_ID, [_record(0, "a")], [("neutral", [])])
+    assert store.delete(VIDEO_ID) is True
+    assert store.open(VIDEO_ID) is None
+    assert store.delete(VIDEO_ID) is False
+    with pytest.raises(ValueError):
+        store.open("../etc")
+
+
+def test_delete_keeps_lock_outside_video_directory(tmp_path):
+    root = str(tmp_path / "comments")
+    # ワーカープロセスごとのストアを想定し、同じディレクトリに別々のインスタンスを作る
+    writer, deleter = ColumnarCommentStore(root), ColumnarCommentStore(root)
+    errors = []
+
+    def append_repeatedly():
+        try:
+            for index in range(50):
+                writer.append(VIDEO_ID, [_record(index, "最高")], [("positive", ["最高"])])
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=append_repeatedly)
+    thread.start()
+    for _ in range(20):
+        deleter.delete(VIDEO_ID)
+    thread.join()
+
+    assert errors == []
+    stored = deleter.open(VIDEO_ID)
+    if stored is not None:
+        assert len(set(_rows(stored))) == stored.rows
+    assert deleter.delete(VIDEO_ID) is (stored is not None)
+    assert not os.path.exists(os.path.join(root, VIDEO_ID))
+    assert os.listdir(os.path.join(root, ".locks")) == [f"{VIDEO_ID}.lock"]
+
+
+@pytest.mark.anyio
+async def test_store_endpoints_validate_top_n(client, monkeypatch, tmp_path):
+    store = ColumnarCommentStore(str(tmp_path / "comments"))
+    store.append(VIDEO_ID, [_record(0, "最高の動画")], [("positive", ["最高", "動画"])])
+    monkeypatch.setattr(main, "_comment_store", store)
+
+    for path in (f"/api/store/{VIDEO_ID}", f"/api/store/{VIDEO_ID}/trends"):
+        assert (await client.get(path, params={"top_n": 1})).status_code == 200
+        for top_n in (0, -1, main.STORE_MAX_TOP_N + 1):
+            assert (await client.get(path, params={"top_n": top_n})).status_code == 422
+    keywords = (await client.get(f"/api/store/{VIDEO_ID}", params={"top_n": 1})).json()["keywords"]
+    assert [keyword["word"] for keyword in keywords] == ["最高"]
@@ -0,0 +1,20 @@
+import uuid
+from collections import Counter
+
+from analyzer.executor import analyze_chunk, analyze_each_chunk
+
+
+def test_chunk_results_match_per_comment_results():
+    # 他のテストで登録されたメモに当たらないよう、実行ごとに異なるコメントにする
+    suffix = uuid.uuid4().hex[:8]
+    texts = [f"最高の動画です {suffix}", f"つまらない内容でした {suffix}", f"最高の動画です {suffix}", f"普通 {suffix}"]
+
+    each, each_metrics = analyze_each_chunk(texts)
+    assert (each_metrics['memo_hits'], each_metrics['memo_misses']) == (1, 3)
+    assert each[0] == each[2]
+
+    sentiment_counts, word_counts, metrics = analyze_chunk(texts)
+    # 2回目は全てメモから返す
+    assert (metrics['memo_hits'], metrics['memo_misses']) == (4, 0)
+    assert sentiment_counts == {'positive': 0, 'neutral': 0, 'negative': 0, **Counter(label for label, _ in each)}
+    assert word_counts == Counter(word for _, words in each for word in words)
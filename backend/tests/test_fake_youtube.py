@@ -0,0 +1,24 @@
+import pytest
+from fastapi import HTTPException
+
+from benchmarks.fake_youtube import MISSING_VIDEO_PREFIX
+from conftest import COMMENTS_PER_VIDEO, VIDEO_ID, youtube_requests
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_stub_pages_through_all_comments(youtube):
+    comments = await youtube.get_comments(VIDEO_ID, max_results=1000)
+
+    assert len(comments) == COMMENTS_PER_VIDEO
+    # 動画IDごとに同じコーパスを返す
+    assert await youtube.get_comments(VIDEO_ID, max_results=1000) == comments
+    assert await youtube.get_comments("bcdefghijkl", max_results=1000) != comments
+    assert (await youtube_requests(youtube))["commentThreads"] == 9
+
+
+async def test_stub_reports_missing_video(youtube):
+    with pytest.raises(HTTPException) as error:
+        await youtube.get_comments(f"{MISSING_VIDEO_PREFIX}0001")
+
+    assert error.value.status_code == 404
@@ -0,0 +1,82 @@
+import httpx
+import pytest
+
+import main
+from conftest import COMMENTS_PER_VIDEO, VIDEO_ID, VIDEO_URL
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_incremental_analyzes_only_new_comments(client):
+    first = (await client.post("/api/analyze/incremental", json={"video_url": VIDEO_URL})).json()
+    assert (first["new_comments"], first["total_comments"], first["truncated"]) == (
+        COMMENTS_PER_VIDEO, COMMENTS_PER_VIDEO, False
+    )
+
+    # 前回のチェックポイント以前のコメントを含むページで取得を打ち切る
+    second = (await client.post("/api/analyze/incremental", json={"video_url": VIDEO_URL})).json()
+    assert (second["new_comments"], second["pages_fetched"]) == (0, 1)
+    assert second["sentiment"] == first["sentiment"]
+    assert second["total_comments"] == COMMENTS_PER_VIDEO
+
+    assert (await client.delete(f"/api/analyze/incremental/{VIDEO_ID}")).status_code == 204
+    assert (await client.delete(f"/api/analyze/incremental/{VIDEO_ID}")).status_code == 404
+    again = (await client.post("/api/analyze/incremental", json={"video_url": VIDEO_URL})).json()
+    assert again["new_comments"] == COMMENTS_PER_VIDEO
+
+
+def _newest_first(comments: dict):
+    """新しい順（インデックスの大きい順）に100件ずつコメントを返すYouTube APIのハンドラ"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/videos"):
+            return httpx.Response(200, json={"items": [{"id": VIDEO_ID}]})
+        offset = int(request.url.params.get("pageToken") or 0)
+        indices = list(range(comments["count"] - 1, -1, -1))[offset:offset + 100]
+        data = {"items": [{"snippet": {"topLevelComment": {"id": f"c{index}", "snippet": {
+            "textDisplay": "最高の動画", "likeCount": 0,
+            "publishedAt": f"2024-01-01T{index // 60:02d}:{index % 60:02d}:00Z",
+        }}}} for index in indices]}
+        if offset + 100 < comments["count"]:
+            data["nextPageToken"] = str(offset + 100)
+        return httpx.Response(200, json=data)
+
+    return handler
+
+
+async def _analyze(client) -> dict:
+    return (await client.post("/api/analyze/incremental", json={"video_url": VIDEO_URL})).json()
+
+
+async def test_incremental_keeps_checkpoint_when_truncated(client, youtube, monkeypatch):
+    comments = {"count": 150}
+    youtube._client = httpx.AsyncClient(transport=httpx.MockTransport(_newest_first(comments)))
+    monkeypatch.setattr(main, "MAX_COMMENTS", 100)
+
+    # 初回は新しい順に100件のみ
+    assert (await _analyze(client))["total_comments"] == 100
+
+    # 新着270件は100件ずつ分析し、チェックポイントまでの残りを次回に持ち越す
+    comments["count"] = 420
+    runs = [await _analyze(client) for _ in range(3)]
+    assert [(run["new_comments"], run["truncated"]) for run in runs] == [(100, True), (100, True), (70, False)]
+    assert runs[-1]["total_comments"] == 370
+
+    comments["count"] = 425
+    latest = await _analyze(client)
+    assert (latest["new_comments"], latest["pages_fetched"], latest["truncated"]) == (5, 1, False)
+
+
+async def test_incremental_skips_older_comments_left_on_checkpoint_page(client, youtube, monkeypatch):
+    comments = {"count": 150}
+    youtube._client = httpx.AsyncClient(transport=httpx.MockTransport(_newest_first(comments)))
+    monkeypatch.setattr(main, "MAX_COMMENTS", 30)
+
+    # 初回は1ページ目（100件）の途中までの30件のみを分析する
+    first = await _analyze(client)
+    assert (first["new_comments"], first["truncated"]) == (30, False)
+
+    # 1ページ目の残り（チェックポイントより古い未分析のコメント）は新着として数えない
+    comments["count"] = 155
+    second = await _analyze(client)
+    assert (second["new_comments"], second["pages_fetched"], second["truncated"]) == (5, 1, False)
+    assert second["total_comments"] == 35
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+
+import pytest
+
+import main
+from conftest import COMMENTS_PER_VIDEO, VIDEO_URL
+from utils.jobs import JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JobQueue, JobStore, QueueFullError
+
+pytestmark = pytest.mark.anyio
+
+
+def test_claim_is_exclusive_across_connections(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    # ワーカープロセスごとの接続を想定し、同じファイルに別々の接続を開く
+    stores = [JobStore(path) for _ in range(4)]
+    jobs = [stores[0].create(f"video{index:06d}", 100) for index in range(20)]
+
+    claimed = {job.id: [] for job in jobs}
+    barrier = threading.Barrier(len(stores))
+
+    def worker(store: JobStore) -> None:
+        barrier.wait()
+        for job in jobs:
+            if store.claim(job.id):
+                claimed[job.id].append(store)
+
+    threads = [threading.Thread(target=worker, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(len(owners) == 1 for owners in claimed.values())
+    assert {stores[1].get(job.id).status for job in jobs} == {JOB_RUNNING}
+
+
+def test_claim_only_from_queued(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job = store.create("abcdefghijk", 100)
+    store.update_progress(job.id, 3, 300)
+
+    assert store.claim(job.id)
+    assert store.get(job.id).pages_fetched == 0  # 再実行時は進捗をリセットする
+    assert not store.claim(job.id)
+
+    store.complete(job.id, {"total_comments": 1})
+    assert not store.claim(job.id)
+    assert store.requeue_interrupted() == 0
+
+    other = store.create("bbbbbbbbbbb", 100)
+    store.claim(other.id)
+    assert store.requeue_interrupted() == 1
+    assert store.get(other.id).status == JOB_QUEUED
+
+
+async def test_queue_runs_by_priority_and_reports_position(tmp_path):
+    started = []
+    release = asyncio.Event()
+
+    async def runner(job):
+        started.append(job.video_id)
+        await release.wait()
+        queue.store.complete(job.id, {})
+
+    queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), runner, workers=1, max_pending=2)
+    first = await queue.submit("aaaaaaaaaaa", 100)
+    await asyncio.sleep(0)
+    low = await queue.submit("bbbbbbbbbbb", 100)
+    high = await queue.submit("ccccccccccc", 100, priority=5)
+
+    assert (await queue.submit("bbbbbbbbbbb", 100)).id == low.id  # 同じ条件のジョブは合流する
+    with pytest.raises(QueueFullError):
+        await queue.submit("ddddddddddd", 100)
+    assert [queue.queue_position(job.id) for job in (first, low, high)] == [None, 1, 0]
+
+    release.set()
+    for _ in range(100):
+        if queue.store.get(low.id).status == JOB_SUCCEEDED:
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+
+    assert started == ["aaaaaaaaaaa", "ccccccccccc", "bbbbbbbbbbb"]
+    assert queue.pending == 0
+
+
+async def test_concurrent_submits_share_one_job(tmp_path):
+    release = asyncio.Event()
+
+    async def runner(job):
+        await release.wait()
+
+    queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), runner, workers=1)
+    jobs = await asyncio.gather(*[queue.submit("aaaaaaaaaaa", 100) for _ in range(5)])
+
+    assert len({job.id for job in jobs}) == 1
+    release.set()
+    await queue.stop()
+
+
+async def test_job_endpoints_report_progress_and_result(client, monkeypatch, tmp_path):
+    queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), main.run_job, workers=1)
+    monkeypatch.setattr(main, "_job_queue", queue)
+
+    response = await client.post("/api/jobs", json={"video_url": VIDEO_URL})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.headers["Location"] == f"/api/jobs/{job_id}"
+
+    for _ in range(200):
+        job = (await client.get(f"/api/jobs/{job_id}")).json()
+        if job["status"] == JOB_SUCCEEDED:
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+
+    assert job["status"] == JOB_SUCCEEDED
+    assert (job["pages_fetched"], job["comments_analyzed"]) == (3, COMMENTS_PER_VIDEO)
+    assert job["result"]["total_comments"] == COMMENTS_PER_VIDEO
+    assert (await client.get("/api/jobs/unknown")).status_code == 404
@@ -0,0 +1,19 @@
+import pytest
+
+from analyzer.keywords import KeywordExtractor
+from analyzer.tokens import MorphTokenizer
+from benchmarks.bench_analyzers import filter_tokens_baseline
+from benchmarks.corpus import generate_comments
+
+
+def test_filter_matches_baseline_implementation():
+    tokenizer = MorphTokenizer()
+    if not tokenizer.available:
+        pytest.skip("janomeが必要です")
+    keywords = KeywordExtractor()
+    texts = generate_comments(300, seed=0) + ["http://example.com 笑笑笑 ！！ 2024 最高"]
+
+    for text in texts:
+        tokens = tokenizer.tokenize(text)
+        assert keywords.extract_words_from_tokens(tokens) == filter_tokens_baseline(keywords, tokens), text
+
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from utils.leases import LeaseFlight, LeaseStore
+
+pytestmark = pytest.mark.anyio
+
+
+def test_lease_store_is_exclusive_until_expiry(tmp_path):
+    path = str(tmp_path / "coordination.sqlite3")
+    first, second = LeaseStore(path), LeaseStore(path)
+
+    assert first.acquire("key", "a", ttl_seconds=30)
+    assert not second.acquire("key", "b", ttl_seconds=30)
+    assert first.acquire("key", "a", ttl_seconds=30)  # 保持者は再取得できる
+    assert second.is_held("key")
+
+    first.release("key", "a")
+    assert not second.is_held("key")
+    assert second.acquire("key", "b", ttl_seconds=-1)  # 期限切れのリース
+    assert first.acquire("key", "a", ttl_seconds=30)
+    assert not second.renew("key", "b", ttl_seconds=30)
+
+
+async def test_lease_flight_coalesces_across_processes(tmp_path):
+    path = str(tmp_path / "coordination.sqlite3")
+    # ワーカープロセスごとのLeaseFlightを想定し、同じファイルに別々の接続を開く
+    flights = [LeaseFlight(LeaseStore(path), poll_interval=0.01) for _ in range(3)]
+    shared = {}
+    calls = []
+
+    async def analyze(worker: int):
+        calls.append(worker)
+        await asyncio.sleep(0.1)
+        shared["result"] = f"worker{worker}"
+        return shared["result"]
+
+    results = await asyncio.gather(*[
+        flight.do("video", lambda worker=worker: analyze(worker), lambda: shared.get("result"))
+        for worker, flight in enumerate(flights)
+    ])
+
+    assert len(calls) == 1
+    assert set(results) == {f"worker{calls[0]}"}
+    assert sum(flight.executed for flight in flights) == 1
+    assert sum(flight.waited for flight in flights) == 2
+
+
+async def test_lease_flight_runs_again_when_result_is_not_shared(tmp_path):
+    path = str(tmp_path / "coordination.sqlite3")
+    flights = [LeaseFlight(LeaseStore(path), poll_interval=0.01) for _ in range(2)]
+    calls = []
+
+    async def fail_first():
+        calls.append(len(calls))
+        await asyncio.sleep(0.05)
+        if len(calls) == 1:
+            raise RuntimeError("失敗")
+        return "ok"
+
+    results = await asyncio.gather(
+        *[flight.do("video", fail_first, lambda: None) for flight in flights], return_exceptions=True
+    )
+
+    # 失敗した処理の結果は共有されないため、待っていたプロセスが自身で実行する
+    assert len(calls) == 2
+    assert sorted(map(str, results)) == ["ok", "失敗"]
+    assert not flights[0].store.is_held("video")
+
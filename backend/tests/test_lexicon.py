@@ -0,0 +1,50 @@
+import random
+
+from analyzer.lexicon import PolarityLexicon, build_default_lexicon
+
+
+def _naive_find(lexicon: PolarityLexicon, text: str):
+    """先頭から順に、その位置から始まる最長の語を採用する素朴な照合（比較用）"""
+    matches = []
+    position = 0
+    while position < len(text):
+        words = [word for word in lexicon.entries if text.startswith(word, position)]
+        if not words:
+            position += 1
+            continue
+        word = max(words, key=len)
+        end = position + len(word)
+        matches.append((position, end, word, text.startswith(lexicon.negations, end)))
+        position = end
+    return matches
+
+
+def test_find_prefers_leftmost_then_longest():
+    lexicon = PolarityLexicon({'最高': 1.0, '最高峰': 2.0, '高峰': -3.0})
+
+    assert [match.word for match in lexicon.find('最高峰')] == ['最高峰']
+    # 先に始まる語を優先し、重なる語は採用しない
+    matches = lexicon.find('高峰と最高')
+    assert [(match.start, match.end, match.word) for match in matches] == [(0, 2, '高峰'), (3, 5, '最高')]
+    assert lexicon.score('高峰と最高') == -2.0
+
+
+def test_find_negates_following_negation():
+    lexicon = PolarityLexicon({'面白い': 1.0, 'つまらない': -1.0, '最高': 1.0})
+
+    match, = lexicon.find('面白くない')
+    assert (match.word, match.weight, match.negated) == ('面白く', -1.0, True)
+    assert lexicon.score('面白くなかった') == -1.0
+    assert lexicon.score('最高じゃない') == -1.0
+    assert lexicon.score('面白かった') == 1.0
+    # 語の一部の「ない」は否定表現として扱わない
+    assert lexicon.find('つまらない')[0].negated is False
+    assert lexicon.score('つまらなくない') == 1.0
+
+
+def test_find_matches_naive_scan():
+    lexicon = build_default_lexicon()
+    alphabet = list('最高悪いつまらないなくじゃ良かった面白ずの。') + [' ']
+    rng = random.Random(0)
+    for _ in range(500):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
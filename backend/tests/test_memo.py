@@ -0,0 +1,31 @@
+from analyzer.lexicon import PolarityLexicon
+from analyzer.memo import AnalysisMemo
+
+
+def test_memo_keys_on_exact_text_and_namespace():
+    memo = AnalysisMemo(namespace="a")
+    memo.set("最高 の動画", "positive", ["動画"])
+
+    assert memo.get("最高 の動画") == ("positive", ["動画"])
+    # 空白や改行は判定結果に影響するため別のコメントとして扱う
+    assert memo.get("最高の動画") is None
+    assert memo.get("最高\nの動画") is None
+    assert AnalysisMemo(namespace="b").make_key("最高 の動画") != memo.make_key("最高 の動画")
+    assert memo.stats() == {"entries": 1, "hits": 1, "misses": 2}
+
+
+def test_memo_persists_after_flush(tmp_path):
+    path = str(tmp_path / "memo.sqlite3")
+    memo = AnalysisMemo(path=path, namespace="a")
+    memo.set("最高の動画", "positive", ["動画"])
+    assert AnalysisMemo(path=path, namespace="a").get("最高の動画") is None
+
+    memo.flush()
+    assert AnalysisMemo(path=path, namespace="a").get("最高の動画") == ("positive", ["動画"])
+    assert AnalysisMemo(path=path, namespace="b").get("最高の動画") is None
+
+
+def test_fingerprint_changes_with_entries():
+    base = PolarityLexicon({'最高': 1.0})
+    assert base.fingerprint == PolarityLexicon({'最高': 1.0}).fingerprint
+    assert base.fingerprint != PolarityLexicon({'最高': 2.0}).fingerprint
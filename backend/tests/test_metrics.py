@@ -0,0 +1,36 @@
+import pytest
+
+from utils.metrics import MetricsRegistry, _Metric
+
+
+def test_registry_renders_counters_and_histograms():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "呼び出し回数", ["result"])
+    seconds = registry.histogram("stage_seconds", "所要時間", buckets=(0.1, 1.0))
+    calls.inc(result="hit")
+    calls.inc(2, result="miss")
+    seconds.observe(0.5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE calls_total counter" in lines
+    assert 'calls_total{result="hit"} 1' in lines
+    assert 'calls_total{result="miss"} 2' in lines
+    assert "# TYPE stage_seconds histogram" in lines
+    assert 'stage_seconds_bucket{le="0.1"} 0' in lines
+    assert 'stage_seconds_bucket{le="1"} 1' in lines
+    assert 'stage_seconds_bucket{le="+Inf"} 1' in lines
+    assert "stage_seconds_count 1" in lines
+    # 同じ定義の再登録は既存のものを返す
+    assert registry.counter("calls_total", "呼び出し回数", ["result"]) is calls
+    with pytest.raises(ValueError):
+        registry.counter("calls_total", "呼び出し回数")
+    with pytest.raises(ValueError):
+        calls.inc(result="hit", extra="x")
+
+
+def test_metric_requires_samples():
+    class Untyped(_Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Untyped("untyped", "種類のないメトリクス")
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from utils import ratelimit
+from utils.ratelimit import CircuitBreaker, DailyQuota, SQLiteDailyQuota
+
+
+class _Clock:
+    """datetime.nowとtime.monotonicを差し替えて時刻を進める"""
+
+    def __init__(self, monkeypatch, now: datetime):
+        self.now = now
+        self.monotonic = 1000.0
+        clock = self
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now.astimezone(tz) if tz else clock.now
+
+        monkeypatch.setattr(ratelimit, "datetime", FrozenDatetime)
+        monkeypatch.setattr(ratelimit.time, "monotonic", lambda: clock.monotonic)
+
+
+@pytest.fixture
+def pacific():
+    tz = ratelimit._pacific_timezone()
+    if tz is timezone.utc:
+        pytest.skip("タイムゾーンデータがありません")
+    return tz
+
+
+def test_daily_quota_rolls_over_at_pacific_midnight(monkeypatch, pacific):
+    clock = _Clock(monkeypatch, datetime(2024, 1, 1, 23, 30, tzinfo=timezone.utc))
+    quota = DailyQuota(limit=100)
+
+    assert quota.try_consume(60)
+    assert not quota.try_consume(50)
+    assert quota.remaining == 40
+
+    # UTCの日付が変わっても、太平洋時間（PST, UTC-8）の0時まではリセットしない
+    clock.now = datetime(2024, 1, 2, 7, 59, tzinfo=timezone.utc)
+    assert quota.used == 60
+    assert quota.seconds_until_reset() == 60
+
+    clock.now = datetime(2024, 1, 2, 8, 0, tzinfo=timezone.utc)
+    assert quota.used == 0
+    assert quota.try_consume(100)
+    assert not quota.try_consume(1)
+
+
+def test_daily_quota_exhaust_and_unlimited():
+    quota = DailyQuota(limit=100)
+    quota.exhaust()
+    assert quota.remaining == 0
+    assert not quota.try_consume(1)
+
+    unlimited = DailyQuota(limit=0)
+    assert unlimited.try_consume(10 ** 9)
+    assert unlimited.remaining is None
+
+
+def test_sqlite_daily_quota_is_shared_between_instances(tmp_path, monkeypatch, pacific):
+    clock = _Clock(monkeypatch, datetime(2024, 1, 2, 7, 0, tzinfo=timezone.utc))
+    path = str(tmp_path / "coordination.sqlite3")
+    first = SQLiteDailyQuota(100, path)
+    second = SQLiteDailyQuota(100, path)
+
+    assert asyncio.run(first.consume(70))
+    assert not asyncio.run(second.consume(40))
+    assert second.used == 70
+    asyncio.run(second.aexhaust())
+    assert not first.try_consume(1)
+
+    clock.now = datetime(2024, 1, 2, 8, 0, tzinfo=timezone.utc)
+    assert first.used == 0
+    assert second.try_consume(100)
+
+
+def test_circuit_breaker_half_open_allows_single_trial(monkeypatch):
+    clock = _Clock(monkeypatch, datetime(2024, 1, 1, tzinfo=timezone.utc))
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after == 30
+
+    clock.monotonic += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # 試行中は他の呼び出しを拒否する
+
+    # 試行が失敗すると再び開く
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.monotonic += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_circuit_breaker_allows_new_trial_after_abandoned_one(monkeypatch):
+    clock = _Clock(monkeypatch, datetime(2024, 1, 1, tzinfo=timezone.utc))
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.trip(60, "quota")
+    assert breaker.reason == "quota"
+
+    clock.monotonic += 60
+    assert breaker.allow()
+    # 試行の結果が記録されないままreset_timeoutが過ぎた場合は次の試行を許可する
+    clock.monotonic += 10
+    assert breaker.allow()
@@ -0,0 +1,37 @@
+import httpx
+import pytest
+
+from api.youtube import YouTubeClient
+from conftest import VIDEO_ID
+
+pytestmark = pytest.mark.anyio
+
+
+def _comment(comment_id: str) -> dict:
+    return {"id": comment_id, "snippet": {"textDisplay": comment_id, "likeCount": 0,
+                                          "publishedAt": "2024-01-01T00:00:00Z"}}
+
+
+def _deleted_replies(request: httpx.Request) -> httpx.Response:
+    """返信数は3件と報告するが、削除により1件しか返さないYouTube APIのハンドラ"""
+    if request.url.path.endswith("/videos"):
+        return httpx.Response(200, json={"items": [{"id": VIDEO_ID}]})
+    if request.url.path.endswith("/comments"):
+        parent_id = request.url.params["parentId"]
+        return httpx.Response(200, json={"items": [_comment(f"{parent_id}.0")]})
+    return httpx.Response(200, json={"items": [
+        {"id": f"t{index}", "snippet": {"totalReplyCount": 3, "topLevelComment": _comment(f"t{index}")}}
+        for index in range(5)
+    ]})
+
+
+async def test_unreturned_replies_do_not_use_up_the_limit():
+    youtube = YouTubeClient()
+    youtube._client = httpx.AsyncClient(transport=httpx.MockTransport(_deleted_replies))
+    try:
+        comments = await youtube.get_comments(VIDEO_ID, max_results=6, include_replies=True)
+    finally:
+        await youtube.aclose()
+
+    # 返されなかった返信の分は続くスレッドに割り当てる
+    assert comments == ["t0", "t0.0", "t1", "t1.0", "t2", "t2.0"]
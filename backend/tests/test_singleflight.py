@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_singleflight_coalesces_in_process():
+    flight = SingleFlight()
+    calls = []
+
+    async def analyze():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    results = await asyncio.gather(*[flight.do("video", analyze) for _ in range(5)])
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "coalesced": 4}
+
+
+async def test_singleflight_shares_errors_and_runs_again_afterwards():
+    flight = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("失敗")
+
+    results = await asyncio.gather(*[flight.do("video", fail) for _ in range(3)], return_exceptions=True)
+    assert [str(result) for result in results] == ["失敗"] * 3
+    assert len(calls) == 1
+
+    # 完了後の呼び出しは改めて実行する
+    async def analyze():
+        return "result"
+
+    assert await flight.do("video", analyze) == "result"
+    assert flight.stats()["in_flight"] == 0
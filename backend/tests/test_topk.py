@@ -0,0 +1,79 @@
+import random
+from collections import Counter
+
+import pytest
+
+from analyzer.topk import SpaceSaving
+
+
+def _zipf_stream(size: int, vocabulary: int, seed: int):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    return rng.choices([f"w{rank}" for rank in range(vocabulary)], weights=weights, k=size)
+
+
+def _assert_bounds(summary: SpaceSaving, truth: Counter):
+    """保持している項目は count - error <= 真の回数 <= count を満たす"""
+    for item, count, error in summary.most_common():
+        assert count - error <= truth[item] <= count, item
+        assert error <= summary.total / summary.capacity
+
+
+def test_exact_while_under_capacity():
+    summary = SpaceSaving(capacity=10)
+    summary.update(['a', 'b', 'a', 'c', 'a', 'b'])
+    assert summary.most_common(2) == [('a', 3, 0), ('b', 2, 0)]
+    assert summary.total == 6
+
+
+def test_counts_bound_true_frequency():
+    stream = _zipf_stream(20000, 500, seed=1)
+    summary = SpaceSaving(capacity=50)
+    summary.update(stream)
+    truth = Counter(stream)
+
+    assert len(summary) == 50
+    _assert_bounds(summary, truth)
+    # 総数 / capacity を超える項目は必ず保持される
+    kept = {item for item, _, _ in summary.most_common()}
+    assert {item for item, count in truth.items() if count > len(stream) / summary.capacity} <= kept
+
+
+def test_weighted_update_matches_repeated_items():
+    repeated = SpaceSaving(capacity=3)
+    weighted = SpaceSaving(capacity=3)
+    for item, count in [('a', 3), ('b', 2), ('c', 1), ('d', 4)]:
+        repeated.update([item] * count)
+        weighted.update({item: count})
+    assert weighted.most_common() == repeated.most_common()
+    assert weighted.total == repeated.total == 10
+
+
+def test_merge_keeps_bounds():
+    left_stream = _zipf_stream(10000, 400, seed=2)
+    right_stream = _zipf_stream(10000, 400, seed=3)
+    left = SpaceSaving(capacity=40)
+    left.update(left_stream)
+    right = SpaceSaving(capacity=40)
+    right.update(right_stream)
+
+    left.update(right)  # SpaceSavingを渡すとマージされる
+
+    assert left.total == len(left_stream) + len(right_stream)
+    assert len(left) == 40
+    _assert_bounds(left, Counter(left_stream) + Counter(right_stream))
+
+
+def test_merge_of_small_summaries_is_exact():
+    left = SpaceSaving(capacity=10)
+    left.update(['a', 'a', 'b'])
+    right = SpaceSaving(capacity=10)
+    right.update(['a', 'c'])
+    left.merge(right)
+    assert left.to_counter() == Counter({'a': 3, 'b': 1, 'c': 1})
+    assert all(error == 0 for _, _, error in left.most_common())
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        SpaceSaving(capacity=0)
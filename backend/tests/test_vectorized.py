@@ -0,0 +1,92 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from analyzer.lexicon import PolarityLexicon
+from analyzer.sentiment import NEGATION_WORDS, SENTENCE_DELIMITERS, SentimentAnalyzer
+from analyzer.tokens import MorphTokenizer, Token
+from analyzer.vectorized import DICTIONARY_THRESHOLD, LEXICON_THRESHOLD, BatchSentimentScorer
+from benchmarks.corpus import generate_comments
+
+WORD_POLARITY = {'良い': 1, '悪い': -1, '最高': 1, '残念': -1}
+# 「気 が 晴れる」「気 が 重い」のような複数語の表現（長い表現から順）
+PHRASE_POLARITY = {
+    '晴れる': [(('気', 'が'), 1)],
+    '重い': [(('気', 'が'), -1), (('が',), -1)],
+}
+
+
+def _tokens(*words: str):
+    return [Token(word, word, '名詞') for word in words]
+
+
+TOKEN_LISTS = [
+    _tokens('良い'),
+    _tokens('悪い', 'ない'),
+    _tokens('良い', '。', '悪い', '悪い'),
+    _tokens('気', 'が', '晴れる'),
+    _tokens('気', 'が', '重い', 'ない', '！', '最高'),
+    _tokens('が', '重い'),
+    _tokens('ない', '良い', 'ず'),
+    _tokens('残念', '\n', '良い', '良い', '悪い'),
+    _tokens('特に', 'なし'),
+    [],
+]
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = SentimentAnalyzer()
+    analyzer.analyzer = None  # テキストの分析は簡易感情分析で比較する
+    return analyzer
+
+
+def _with_dictionaries(analyzer: SentimentAnalyzer, word_polarity, phrase_polarity) -> SentimentAnalyzer:
+    analyzer.word_polarity = word_polarity
+    analyzer.phrase_polarity = phrase_polarity
+    analyzer.batch_scorer = BatchSentimentScorer(
+        word_polarity, phrase_polarity, analyzer.lexicon, NEGATION_WORDS, SENTENCE_DELIMITERS
+    )
+    return analyzer
+
+
+def test_score_tokens_matches_analyze_tokens(analyzer):
+    analyzer = _with_dictionaries(analyzer, WORD_POLARITY, PHRASE_POLARITY)
+    scores = analyzer.batch_scorer.score_tokens(TOKEN_LISTS)
+
+    expected = [analyzer.analyze_tokens(tokens) for tokens in TOKEN_LISTS]
+    assert analyzer.batch_scorer.to_labels(scores, DICTIONARY_THRESHOLD) == expected
+    assert analyzer.analyze_tokens_batch(TOKEN_LISTS) == expected
+    # 否定で反転・文ごとの平均の合計・複数語の表現
+    assert expected[:5] == ['positive', 'positive', 'neutral', 'positive', 'positive']
+
+
+def test_score_tokens_matches_analyze_tokens_on_corpus():
+    tokenizer = MorphTokenizer()
+    analyzer = SentimentAnalyzer()
+    if not tokenizer.available or not analyzer.word_polarity or analyzer.batch_scorer is None:
+        pytest.skip("janomeまたはosetiの極性辞書がありません")
+
+    token_lists = [tokenizer.tokenize(text) for text in generate_comments(300, seed=7)]
+    scores = analyzer.batch_scorer.score_tokens(token_lists)
+    assert analyzer.batch_scorer.to_labels(scores, DICTIONARY_THRESHOLD) == [
+        analyzer.analyze_tokens(tokens) for tokens in token_lists
+    ]
+
+
+def test_score_texts_matches_lexicon_score(analyzer):
+    texts = generate_comments(300, seed=11) + ['', '面白くない', '最高じゃないけど良かった']
+    scores = analyzer.batch_scorer.score_texts(texts)
+
+    assert scores.tolist() == pytest.approx([analyzer.lexicon.score(text) for text in texts])
+    assert analyzer.batch_scorer.to_labels(scores, LEXICON_THRESHOLD) == [
+        analyzer._simple_sentiment_analysis(text) for text in texts
+    ]
+
+
+def test_custom_lexicon_scores_match():
+    lexicon = PolarityLexicon({'神回': 2.0, '微妙': -0.5})
+    scorer = BatchSentimentScorer({}, {}, lexicon, NEGATION_WORDS, SENTENCE_DELIMITERS)
+    texts = ['神回', '微妙', '神回だけど微妙', '神回じゃない']
+    assert scorer.score_texts(texts).tolist() == pytest.approx([lexicon.score(text) for text in texts])
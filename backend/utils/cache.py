@@ -0,0 +1,305 @@
+import abc
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOOKUPS = registry.counter(
+    "result_cache_lookups_total", "分析結果キャッシュの参照件数", ["result"]
+)
+
+# SQLiteキャッシュの最終アクセス時刻を更新する最短間隔（秒）。
+# 参照のたびに書き込むと複数のワーカープロセスで共有した際に書き込みロックを奪い合うため
+ACCESS_UPDATE_INTERVAL = 60.0
+
+# SQLiteのロック待ちの上限（秒）。他のワーカーの書き込みを長く待つより、キャッシュなしとして処理を続ける
+BUSY_TIMEOUT_SECONDS = 5.0
+
+
+class CacheBackend(abc.ABC):
+    """分析結果キャッシュの保存先インターフェース"""
+
+    # ファイルなどへの入出力で待たされることがあるか（Trueの場合はイベントループの外で呼び出す）
+    blocking = False
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(値, 保存時刻) を返す。存在しない場合はNone"""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any, stored_at: float) -> None:
+        """値を保存時刻とともに保存"""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """キーの値を削除（存在しない場合は何もしない）"""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """全ての値を削除"""
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        """保存件数"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """プロセス内のLRUキャッシュ（上限件数を超えると最も古いものから削除）"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, stored_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """SQLiteファイルに保存するキャッシュ（サーバー再起動後も保持され、複数のワーカープロセスで共有できる）"""
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=BUSY_TIMEOUT_SECONDS)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # キャッシュは失われても再計算できるため、コミットごとのfsyncを省く
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS result_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_result_cache_accessed ON result_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT value, stored_at, accessed_at FROM result_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                if now - row[2] >= ACCESS_UPDATE_INTERVAL:
+                    self._conn.execute(
+                        "UPDATE result_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                    )
+                    self._conn.commit()
+            except sqlite3.OperationalError as e:
+                # 他のワーカーの書き込みでロックを取得できない場合はキャッシュなしとして扱う
+                logger.warning("キャッシュを参照できませんでした: %s", e)
+                self._conn.rollback()
+                return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, stored_at: float) -> None:
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO result_cache (key, value, stored_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, payload, stored_at, time.time()),
+                )
+                # 上限を超えた分は最終アクセスが古い順に削除
+                self._conn.execute(
+                    "DELETE FROM result_cache WHERE key IN ("
+                    " SELECT key FROM result_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._conn.commit()
+            except sqlite3.OperationalError as e:
+                logger.warning("キャッシュに保存できませんでした: %s", e)
+                self._conn.rollback()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+                self._conn.commit()
+            except sqlite3.OperationalError as e:
+                # 期限切れの値は参照時にも期限切れとして扱われるため、削除できなくても処理を続ける
+                logger.warning("キャッシュを削除できませんでした: %s", e)
+                self._conn.rollback()
+
+    def clear(self) -> None:
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM result_cache")
+                self._conn.commit()
+            except sqlite3.OperationalError as e:
+                logger.warning("キャッシュを削除できませんでした: %s", e)
+                self._conn.rollback()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+
+
+class ResultCache:
+    """
+    動画IDと分析パラメータをキーにした分析結果キャッシュ（TTL付き）
+
+    期限切れのエントリもstale_ttl_seconds秒の間は削除せず、
+    YouTube APIを呼び出せない場合の代替（get_stale）として使う。
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float = 3600, stale_ttl_seconds: float = 0):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stale_ttl_seconds = stale_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(video_id: str, **params: Any) -> str:
+        """動画IDとパラメータからキャッシュキーを生成"""
+        param_str = ",".join(f"{name}={params[name]}" for name in sorted(params))
+        return f"{video_id}|{param_str}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        有効期限内のキャッシュを取得
+
+        Args:
+            key: キャッシュキー
+
+        Returns:
+            キャッシュされた値。存在しないか期限切れの場合はNone
+        """
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+        value, stored_at = entry
+        age = time.time() - stored_at
+        if age > self.ttl_seconds:
+            if age > self.ttl_seconds + self.stale_ttl_seconds:
+                self.backend.delete(key)
+            self.misses += 1
+            CACHE_LOOKUPS.inc(result="expired")
+            return None
+
+        self.hits += 1
+        CACHE_LOOKUPS.inc(result="hit")
+        return value
+
+    def get_stale(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        期限切れのものも含めてキャッシュを取得（YouTube APIを呼び出せない場合の代替用）
+
+        Returns:
+            (キャッシュされた値, 保存からの経過秒数)。存在しないか保持期間を過ぎた場合はNone
+        """
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        age = time.time() - stored_at
+        if age > self.ttl_seconds + self.stale_ttl_seconds:
+            return None
+        CACHE_LOOKUPS.inc(result="stale")
+        return value, age
+
+    def set(self, key: str, value: Any) -> None:
+        """値をキャッシュに保存"""
+        self.backend.set(key, value, time.time())
+
+    async def _run(self, func, *args):
+        # SQLiteなどのロック待ちでイベントループを止めないよう、スレッドで実行する
+        if self.backend.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """getのイベントループ用"""
+        return await self._run(self.get, key)
+
+    async def aget_stale(self, key: str) -> Optional[Tuple[Any, float]]:
+        """get_staleのイベントループ用"""
+        return await self._run(self.get_stale, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """setのイベントループ用"""
+        await self._run(self.set, key, value)
+
+    async def astats(self) -> Dict[str, Any]:
+        """statsのイベントループ用"""
+        return await self._run(self.stats)
+
+    def stats(self) -> Dict[str, Any]:
+        """キャッシュの統計情報を取得"""
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl_seconds,
+            "stale_ttl_seconds": self.stale_ttl_seconds,
+        }
+
+
+def create_result_cache() -> ResultCache:
+    """環境変数の設定に従って分析結果キャッシュを生成"""
+    backend_name = os.getenv("CACHE_BACKEND", "memory").lower()
+    ttl_seconds = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+    max_entries = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+    # 期限切れ後もYouTube APIを呼び出せない場合の代替として保持する秒数
+    stale_ttl_seconds = float(os.getenv("CACHE_STALE_SECONDS", "86400"))
+
+    if backend_name == "sqlite":
+        path = os.getenv("CACHE_SQLITE_PATH", "data/cache.sqlite3")
+        backend: CacheBackend = SQLiteCacheBackend(path, max_entries=max_entries)
+        logger.info("SQLiteキャッシュを使用します: %s", path)
+    else:
+        if backend_name != "memory":
+            logger.warning("不明なCACHE_BACKEND '%s' です。メモリキャッシュを使用します。", backend_name)
+        backend = MemoryCacheBackend(max_entries=max_entries)
+
+    return ResultCache(backend, ttl_seconds=ttl_seconds, stale_ttl_seconds=stale_ttl_seconds)
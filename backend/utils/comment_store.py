@@ -0,0 +1,435 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    COLUMNAR_AVAILABLE = True
+except ImportError:
+    np = None
+    COLUMNAR_AVAILABLE = False
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from analyzer.trends import BucketSummary, to_epoch_seconds
+from api.youtube import CommentRecord
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# 感情ラベルと保存する値
+SENTIMENT_CODES = {'negative': -1, 'neutral': 0, 'positive': 1}
+
+# 1行（コメント）ごとに1要素を持つ固定長の列 {ファイル名: dtype}
+_ROW_COLUMNS = {
+    'id_hash.u8': '<u8',       # コメントIDのハッシュ（重複排除用）
+    'published_at.i8': '<i8',  # 投稿日時（UNIX秒。不明な場合は0）
+    'like_count.i4': '<i4',
+    'sentiment.i1': '<i1',     # -1: negative, 0: neutral, 1: positive
+    'id_end.i8': '<i8',        # id.binにおける各コメントIDの終端位置
+    'text_end.i8': '<i8',      # text.binにおける各コメント本文の終端位置
+    'token_end.i8': '<i8',     # tokens.i4における各コメントの単語列の終端位置
+}
+_TOKEN_DTYPE = '<i4'
+_DATA_FILES = ('id.bin', 'text.bin', 'tokens.i4', 'vocab.jsonl')
+
+_VIDEO_ID_PATTERN = re.compile(r'^[\w-]{1,64}$')
+
+# 動画ごとのロックファイルを置くディレクトリ。動画のディレクトリを削除してもロックが残るよう外に置く
+# （動画IDに使えない「.」で始め、動画のディレクトリと衝突しないようにする）
+_LOCK_DIR = '.locks'
+
+
+def _hash_id(comment_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(comment_id.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _map(path: str, dtype: str, count: int) -> 'np.ndarray':
+    """ファイルの先頭count要素を読み取り専用でメモリマップする"""
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+
+class StoredComments:
+    """
+    保存済みコメントの読み取り用スナップショット
+
+    各列はメモリマップしたnumpy配列で、集計時もコメントをPythonオブジェクトに展開しない。
+    スナップショット作成後に追記された行は含まれない。
+    """
+
+    def __init__(self, directory: str, meta: Dict):
+        self.directory = directory
+        self.rows: int = meta['rows']
+        sizes = meta['sizes']
+        columns = {
+            name.split('.')[0]: _map(os.path.join(directory, name), dtype, self.rows)
+            for name, dtype in _ROW_COLUMNS.items()
+        }
+        self._published_at = columns['published_at']
+        self._like_count = columns['like_count']
+        self._sentiment = columns['sentiment']
+        self._id_end = columns['id_end']
+        self._text_end = columns['text_end']
+        self._token_end = columns['token_end']
+        self._tokens = _map(
+            os.path.join(directory, 'tokens.i4'), _TOKEN_DTYPE, sizes['tokens.i4'] // np.dtype(_TOKEN_DTYPE).itemsize
+        )
+        self._text = _map(os.path.join(directory, 'text.bin'), 'u1', sizes['text.bin'])
+        self._id = _map(os.path.join(directory, 'id.bin'), 'u1', sizes['id.bin'])
+        self._vocab_size: int = meta['vocab_size']
+        self._vocab_bytes: int = sizes['vocab.jsonl']
+        self._vocab: Optional[List[str]] = None
+
+    @property
+    def published_at(self) -> 'np.ndarray':
+        """投稿日時（UNIX秒）の列"""
+        return self._published_at
+
+    @property
+    def sentiment(self) -> 'np.ndarray':
+        """感情（-1/0/1）の列"""
+        return self._sentiment
+
+    @property
+    def like_count(self) -> 'np.ndarray':
+        """高評価数の列"""
+        return self._like_count
+
+    def _slice(self, data: 'np.ndarray', ends: 'np.ndarray', index: int) -> bytes:
+        start = int(ends[index - 1]) if index > 0 else 0
+        return data[start:int(ends[index])].tobytes()
+
+    def text(self, index: int) -> str:
+        """index行目のコメント本文"""
+        return self._slice(self._text, self._text_end, index).decode('utf-8')
+
+    def comment_id(self, index: int) -> str:
+        """index行目のコメントID"""
+        return self._slice(self._id, self._id_end, index).decode('utf-8')
+
+    def vocabulary(self) -> List[str]:
+        """単語ID順の単語リスト"""
+        if self._vocab is None:
+            with open(os.path.join(self.directory, 'vocab.jsonl'), 'rb') as f:
+                data = f.read(self._vocab_bytes)
+            self._vocab = [json.loads(line) for line in data.splitlines()[:self._vocab_size]]
+        return self._vocab
+
+    def row_mask(self, since: Optional[int] = None, until: Optional[int] = None) -> Optional['np.ndarray']:
+        """投稿日時の範囲（since以上until未満、UNIX秒）に含まれる行のマスク（範囲指定なしはNone）"""
+        if since is None and until is None:
+            return None
+        mask = np.ones(self.rows, dtype=bool)
+        if since is not None:
+            mask &= self._published_at >= since
+        if until is not None:
+            mask &= self._published_at < until
+        return mask
+
+    def sentiment_counts(self, mask: Optional['np.ndarray'] = None) -> Dict[str, int]:
+        """感情別の件数"""
+        values = self._sentiment if mask is None else self._sentiment[mask]
+        negative, neutral, positive = np.bincount(values.astype(np.intp) + 1, minlength=3)[:3]
+        return {'positive': int(positive), 'neutral': int(neutral), 'negative': int(negative)}
+
+    def word_counts(self, mask: Optional['np.ndarray'] = None) -> 'np.ndarray':
+        """単語IDごとの出現回数"""
+        tokens = self._tokens
+        if mask is not None:
+            lengths = np.diff(self._token_end, prepend=0)
+            tokens = tokens[np.repeat(mask, lengths)]
+        return np.bincount(tokens, minlength=self._vocab_size)
+
+    def top_words(self, counts: 'np.ndarray', top_n: int) -> List[Tuple[str, int]]:
+        """出現回数の多い順に単語を取得（同数の場合は先に登録された単語から）"""
+        if top_n <= 0:
+            return []
+        candidates = np.flatnonzero(counts)
+        if len(candidates) > top_n:
+            candidates = candidates[np.argpartition(-counts[candidates], top_n - 1)[:top_n]]
+        order = candidates[np.lexsort((candidates, -counts[candidates]))]
+        vocabulary = self.vocabulary()
+        return [(vocabulary[word_id], int(counts[word_id])) for word_id in order]
+
+    def aggregate(self, since: Optional[int] = None, until: Optional[int] = None,
+                  top_n: int = 20) -> Tuple[Dict[str, int], List[Tuple[str, int]], int]:
+        """
+        保存済みコメントの感情別件数と上位キーワードを集計
+
+        Args:
+            since: 集計対象とする投稿日時の下限（UNIX秒、この時刻を含む）
+            until: 集計対象とする投稿日時の上限（UNIX秒、この時刻を含まない）
+            top_n: 上位何件のキーワードを返すか
+
+        Returns:
+            (感情別の件数辞書, (キーワード, 出現回数)のタプルリスト, 対象のコメント数)
+        """
+        mask = self.row_mask(since, until)
+        total = self.rows if mask is None else int(np.count_nonzero(mask))
+        return self.sentiment_counts(mask), self.top_words(self.word_counts(mask), top_n), total
+
+    def trends(self, bucket_seconds: int, since: Optional[int] = None, until: Optional[int] = None,
+               top_n: int = 5) -> Dict[int, BucketSummary]:
+        """
+        投稿日時のバケットごとに感情別件数と上位キーワードを集計
+
+        全バケットを一度に集計する（(バケット, 単語ID)の組を数え、バケットごとに上位を取り出す）。
+        投稿日時が不明なコメントは含めない。
+
+        Args:
+            bucket_seconds: バケット幅（秒）
+            since: 集計対象とする投稿日時の下限（UNIX秒、この時刻を含む）
+            until: 集計対象とする投稿日時の上限（UNIX秒、この時刻を含まない）
+            top_n: バケットごとに返すキーワード数
+
+        Returns:
+            {バケットの開始時刻（UNIX秒）: (感情別の件数辞書, (キーワード, 出現回数)のタプルリスト, コメント数)}
+        """
+        mask = self.row_mask(since if since is not None else 1, until)
+        rows = np.flatnonzero(mask)
+        if len(rows) == 0:
+            return {}
+        starts, bucket_index = np.unique(self._published_at[rows] // bucket_seconds, return_inverse=True)
+        bucket_count = len(starts)
+
+        sentiment = np.bincount(
+            bucket_index * 3 + (self._sentiment[rows].astype(np.intp) + 1), minlength=bucket_count * 3
+        ).reshape(bucket_count, 3)
+
+        # (バケット, 単語ID)の組ごとの出現回数を、バケット順・出現回数の多い順に並べる
+        lengths = np.diff(self._token_end, prepend=0)
+        tokens = self._tokens[np.repeat(mask, lengths)].astype(np.int64)
+        pairs, pair_counts = np.unique(
+            np.repeat(bucket_index, lengths[rows]) * max(1, self._vocab_size) + tokens, return_counts=True
+        )
+        pair_buckets, pair_words = np.divmod(pairs, max(1, self._vocab_size))
+        order = np.lexsort((pair_words, -pair_counts, pair_buckets))
+        pair_buckets, pair_words, pair_counts = pair_buckets[order], pair_words[order], pair_counts[order]
+        bounds = np.searchsorted(pair_buckets, np.arange(bucket_count + 1))
+
+        vocabulary = self.vocabulary()
+        summaries: Dict[int, BucketSummary] = {}
+        for index, start in enumerate(starts):
+            negative, neutral, positive = (int(value) for value in sentiment[index])
+            begin = bounds[index]
+            end = min(bounds[index + 1], begin + max(0, top_n))
+            keywords = [
+                (vocabulary[word_id], int(count))
+                for word_id, count in zip(pair_words[begin:end], pair_counts[begin:end])
+            ]
+            summaries[int(start) * bucket_seconds] = (
+                {'positive': positive, 'neutral': neutral, 'negative': negative},
+                keywords,
+                negative + neutral + positive,
+            )
+        return summaries
+
+
+class ColumnarCommentStore:
+    """
+    コメントと分析結果を動画ごとの列指向ファイルに追記保存するクラス
+
+    動画ごとのディレクトリに列（ファイル）単位で追記し、各ファイルの有効なサイズと行数を
+    meta.jsonに記録する。meta.jsonは追記の完了後に置き換えるため、書き込み途中で停止しても
+    読み取り側は最後に完了した状態を参照し、次の追記時に未完了の部分を切り詰める。
+    """
+
+    def __init__(self, root: str):
+        if not COLUMNAR_AVAILABLE:
+            raise RuntimeError("numpyが必要です: pip install numpy")
+        self.root = root
+        os.makedirs(os.path.join(root, _LOCK_DIR), exist_ok=True)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        # 動画ごとの語彙 {動画ID: (語彙ファイルのサイズ, {単語: 単語ID})}
+        self._vocab_cache: Dict[str, Tuple[int, Dict[str, int]]] = {}
+
+    def _video_dir(self, video_id: str) -> str:
+        if not _VIDEO_ID_PATTERN.match(video_id):
+            raise ValueError(f"不正な動画IDです: {video_id}")
+        return os.path.join(self.root, video_id)
+
+    @staticmethod
+    def _read_meta(directory: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        if meta.get('version') != FORMAT_VERSION:
+            raise RuntimeError(f"未対応の形式のコメントストアです: {directory}")
+        return meta
+
+    @staticmethod
+    def _write_meta(directory: str, meta: Dict) -> None:
+        path = os.path.join(directory, 'meta.json')
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def _write_lock(self, video_id: str) -> Iterator[None]:
+        """動画ごとの書き込みロック（スレッド間、およびfcntlが使える場合はプロセス間）"""
+        with self._locks_lock:
+            lock = self._locks.setdefault(video_id, threading.Lock())
+        with lock:
+            with open(os.path.join(self.root, _LOCK_DIR, f'{video_id}.lock'), 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_vocab(self, video_id: str, directory: str, vocab_bytes: int) -> Dict[str, int]:
+        cached = self._vocab_cache.get(video_id)
+        if cached is not None and cached[0] == vocab_bytes:
+            return cached[1]
+        # 他のプロセスが追記した場合は読み込み直す
+        vocab: Dict[str, int] = {}
+        if vocab_bytes:
+            with open(os.path.join(directory, 'vocab.jsonl'), 'rb') as f:
+                for line in f.read(vocab_bytes).splitlines():
+                    vocab[json.loads(line)] = len(vocab)
+        return vocab
+
+    def append(self, video_id: str, records: Sequence[CommentRecord],
+               results: Sequence[Tuple[str, List[str]]]) -> int:
+        """
+        コメントと分析結果を追記（保存済みのコメントIDは読み飛ばす）
+
+        Args:
+            video_id: YouTube動画ID
+            records: コメントのリスト
+            results: コメントごとの(感情ラベル, 単語リスト)（recordsと同じ順）
+
+        Returns:
+            新たに保存したコメント数
+        """
+        directory = self._video_dir(video_id)
+        with self._write_lock(video_id):
+            os.makedirs(directory, exist_ok=True)
+            meta = self._read_meta(directory) or {
+                'version': FORMAT_VERSION,
+                'rows': 0,
+                'vocab_size': 0,
+                'sizes': {name: 0 for name in (*_ROW_COLUMNS, *_DATA_FILES)},
+            }
+            sizes = meta['sizes']
+
+            # 保存済み・同じ追記内で重複するコメントを除く
+            hashes = np.fromiter((_hash_id(record.id) for record in records), dtype='<u8', count=len(records))
+            stored = _map(os.path.join(directory, 'id_hash.u8'), '<u8', meta['rows'])
+            _, first_index = np.unique(hashes, return_index=True)
+            keep = np.zeros(len(records), dtype=bool)
+            keep[first_index] = True
+            keep &= ~np.isin(hashes, stored)
+            del stored
+            indices = np.flatnonzero(keep)
+            if len(indices) == 0:
+                return 0
+
+            vocab = self._load_vocab(video_id, directory, sizes['vocab.jsonl'])
+            # 追記に失敗した場合に保存されていない単語が残らないよう、完了するまでキャッシュから外す
+            self._vocab_cache.pop(video_id, None)
+            vocab_size_before = len(vocab)
+            new_words: List[str] = []
+            id_bytes: List[bytes] = []
+            text_bytes: List[bytes] = []
+            token_ids: List[int] = []
+            id_end = np.empty(len(indices), dtype='<i8')
+            text_end = np.empty(len(indices), dtype='<i8')
+            token_end = np.empty(len(indices), dtype='<i8')
+            published_at = np.empty(len(indices), dtype='<i8')
+            like_count = np.empty(len(indices), dtype='<i4')
+            sentiment = np.empty(len(indices), dtype='<i1')
+
+            id_offset = sizes['id.bin']
+            text_offset = sizes['text.bin']
+            token_offset = sizes['tokens.i4'] // np.dtype(_TOKEN_DTYPE).itemsize
+            for row, index in enumerate(indices):
+                record = records[index]
+                label, words = results[index]
+
+                encoded_id = record.id.encode('utf-8')
+                id_bytes.append(encoded_id)
+                id_offset += len(encoded_id)
+                id_end[row] = id_offset
+
+                encoded_text = record.text.encode('utf-8')
+                text_bytes.append(encoded_text)
+                text_offset += len(encoded_text)
+                text_end[row] = text_offset
+
+                for word in words:
+                    word_id = vocab.get(word)
+                    if word_id is None:
+                        word_id = vocab[word] = len(vocab)
+                        new_words.append(word)
+                    token_ids.append(word_id)
+                token_end[row] = token_offset + len(token_ids)
+
+                published_at[row] = to_epoch_seconds(record.published_at)
+                like_count[row] = record.like_count
+                sentiment[row] = SENTIMENT_CODES[label]
+
+            columns = {
+                'id_hash.u8': hashes[indices].tobytes(),
+                'published_at.i8': published_at.tobytes(),
+                'like_count.i4': like_count.tobytes(),
+                'sentiment.i1': sentiment.tobytes(),
+                'id_end.i8': id_end.tobytes(),
+                'text_end.i8': text_end.tobytes(),
+                'token_end.i8': token_end.tobytes(),
+                'id.bin': b''.join(id_bytes),
+                'text.bin': b''.join(text_bytes),
+                'tokens.i4': np.asarray(token_ids, dtype=_TOKEN_DTYPE).tobytes(),
+                'vocab.jsonl': ''.join(json.dumps(word, ensure_ascii=False) + '\n' for word in new_words).encode('utf-8'),
+            }
+            for name, data in columns.items():
+                with open(os.path.join(directory, name), 'ab') as f:
+                    # 前回中断された追記の残りを切り詰めてから書き込む
+                    f.truncate(sizes[name])
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                sizes[name] += len(data)
+
+            meta['rows'] += len(indices)
+            meta['vocab_size'] = vocab_size_before + len(new_words)
+            self._write_meta(directory, meta)
+            self._vocab_cache[video_id] = (sizes['vocab.jsonl'], vocab)
+            return len(indices)
+
+    def open(self, video_id: str) -> Optional[StoredComments]:
+        """保存済みコメントの読み取り用スナップショットを取得（未保存の場合はNone）"""
+        directory = self._video_dir(video_id)
+        meta = self._read_meta(directory)
+        if meta is None or meta['rows'] == 0:
+            return None
+        return StoredComments(directory, meta)
+
+    def delete(self, video_id: str) -> bool:
+        """動画の保存済みコメントを削除"""
+        directory = self._video_dir(video_id)
+        with self._write_lock(video_id):
+            self._vocab_cache.pop(video_id, None)
+            existed = os.path.exists(os.path.join(directory, 'meta.json'))
+            shutil.rmtree(directory, ignore_errors=True)
+        return existed
@@ -0,0 +1,333 @@
+import asyncio
+import bisect
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ジョブの状態
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+
+@dataclass
+class Job:
+    """非同期分析ジョブ"""
+    id: str
+    video_id: str
+    max_comments: int
+    priority: int = 0
+    include_replies: bool = False
+    status: str = JOB_QUEUED
+    pages_fetched: int = 0
+    comments_analyzed: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+_COLUMNS = (
+    "id, video_id, max_comments, priority, status, pages_fetched, comments_analyzed,"
+    " result, error, status_code, created_at, started_at, finished_at, include_replies"
+)
+
+
+class JobStore:
+    """ジョブの状態・進捗・結果をSQLiteに保存するクラス（再起動後もジョブを引き継ぐ）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " video_id TEXT NOT NULL,"
+            " max_comments INTEGER NOT NULL,"
+            " priority INTEGER NOT NULL,"
+            " status TEXT NOT NULL,"
+            " pages_fetched INTEGER NOT NULL DEFAULT 0,"
+            " comments_analyzed INTEGER NOT NULL DEFAULT 0,"
+            " result TEXT,"
+            " error TEXT,"
+            " status_code INTEGER,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL,"
+            " include_replies INTEGER NOT NULL DEFAULT 0)"
+        )
+        # 返信の分析に対応する前に作成されたテーブルには列を追加する
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "include_replies" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN include_replies INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, priority, created_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _to_job(row: Tuple) -> Job:
+        return Job(
+            id=row[0],
+            video_id=row[1],
+            max_comments=row[2],
+            priority=row[3],
+            status=row[4],
+            pages_fetched=row[5],
+            comments_analyzed=row[6],
+            result=json.loads(row[7]) if row[7] is not None else None,
+            error=row[8],
+            status_code=row[9],
+            created_at=row[10],
+            started_at=row[11],
+            finished_at=row[12],
+            include_replies=bool(row[13]),
+        )
+
+    def create(self, video_id: str, max_comments: int, priority: int = 0, include_replies: bool = False) -> Job:
+        """待機中のジョブを登録"""
+        job = Job(
+            id=uuid.uuid4().hex,
+            video_id=video_id,
+            max_comments=max_comments,
+            priority=priority,
+            include_replies=include_replies,
+            created_at=time.time(),
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, video_id, max_comments, priority, include_replies, status, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.video_id, job.max_comments, job.priority, int(job.include_replies),
+                 job.status, job.created_at),
+            )
+            self._conn.commit()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """ジョブを取得（存在しない場合はNone）"""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row is not None else None
+
+    def find_active(self, video_id: str, max_comments: int, include_replies: bool = False) -> Optional[Job]:
+        """同じ条件で待機中・実行中のジョブを取得"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE video_id = ? AND max_comments = ? AND include_replies = ?"
+                " AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                (video_id, max_comments, int(include_replies), *ACTIVE_STATUSES),
+            ).fetchone()
+        return self._to_job(row) if row is not None else None
+
+    def list_queued(self) -> List[Job]:
+        """待機中のジョブを優先度の高い順（同じ優先度は登録順）に取得"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE status = ? ORDER BY priority DESC, created_at",
+                (JOB_QUEUED,),
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def claim(self, job_id: str) -> bool:
+        """
+        待機中のジョブを実行中にする（再実行の場合は進捗をリセット）
+
+        複数のワーカープロセスが同じジョブを取り出した場合も、実行中にできるのは1つのプロセスのみ。
+
+        Returns:
+            実行中にできた場合はTrue（既に他のプロセスが実行中・完了の場合はFalse）
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, pages_fetched = 0, comments_analyzed = 0"
+                " WHERE id = ? AND status = ?",
+                (JOB_RUNNING, time.time(), job_id, JOB_QUEUED),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def update_progress(self, job_id: str, pages_fetched: int, comments_analyzed: int) -> None:
+        """取得済みページ数と分析済みコメント数を更新"""
+        self._update(job_id, pages_fetched=pages_fetched, comments_analyzed=comments_analyzed)
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        """ジョブを成功として結果を保存"""
+        self._update(
+            job_id, status=JOB_SUCCEEDED, status_code=200,
+            result=json.dumps(result, ensure_ascii=False), finished_at=time.time(),
+        )
+
+    def fail(self, job_id: str, status_code: int, error: str) -> None:
+        """ジョブを失敗として保存"""
+        self._update(job_id, status=JOB_FAILED, status_code=status_code, error=error, finished_at=time.time())
+
+    def requeue_interrupted(self) -> int:
+        """前回の停止時に実行中だったジョブを待機中に戻す"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (JOB_QUEUED, JOB_RUNNING)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def purge_finished(self, older_than: float) -> int:
+        """指定時刻より前に終了したジョブを削除"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (JOB_SUCCEEDED, JOB_FAILED, older_than),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+
+class QueueFullError(Exception):
+    """待機中のジョブが上限に達している"""
+
+
+class JobQueue:
+    """
+    ジョブを優先度順に限られた数のワーカーで実行するキュー
+
+    待機中のジョブ数がmax_pendingに達した場合は新たなジョブを受け付けない（バックプレッシャー）。
+    起動時には保存済みの待機中・中断されたジョブを再投入する。
+    """
+
+    def __init__(self, store: JobStore, runner: Callable[[Job], Awaitable[None]],
+                 workers: int = 2, max_pending: int = 100, resume_interrupted: bool = True):
+        """
+        Args:
+            store: ジョブの保存先
+            runner: ジョブを実行するコルーチン関数（結果・失敗の保存も行う）
+            workers: 同時に実行するジョブ数
+            max_pending: 待機中のジョブ数の上限
+            resume_interrupted: 起動時に実行中のまま残っているジョブを再実行するか
+                               （マルチワーカー構成では他のプロセスが実行中の場合があるため、起動前に1回だけ行う）
+        """
+        self.store = store
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.resume_interrupted = resume_interrupted
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        # 待機中のジョブの(優先度, 投入順, ジョブID)。キューと同じ順に並べ、順番の計算に使う
+        self._pending: List[Tuple[int, int, str]] = []
+        self._sequence = itertools.count()
+        # 同じ条件のジョブの確認から登録までを、他の登録と交互に実行しないためのロック
+        self._submit_lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        """待機中のジョブ数"""
+        return len(self._pending)
+
+    def _ensure_started(self) -> None:
+        if self._queue is not None:
+            return
+        self._queue = asyncio.PriorityQueue()
+        requeued = self.store.requeue_interrupted() if self.resume_interrupted else 0
+        for job in self.store.list_queued():
+            self._enqueue(job)
+        if self._pending:
+            logger.info("保存済みのジョブを再開します: %s件（中断されていたもの%s件）", len(self._pending), requeued)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def start(self) -> None:
+        """ワーカーを起動し、保存済みのジョブを再開"""
+        self._ensure_started()
+
+    def _enqueue(self, job: Job) -> None:
+        # 優先度の高い順、同じ優先度は投入順
+        entry = (-job.priority, next(self._sequence), job.id)
+        bisect.insort(self._pending, entry)
+        self._queue.put_nowait(entry)
+
+    async def submit(self, video_id: str, max_comments: int, priority: int = 0,
+                     include_replies: bool = False) -> Job:
+        """
+        ジョブを登録して待機させる
+
+        同じ動画・取得件数（・返信の有無）のジョブが待機中・実行中であれば、新たに登録せずそのジョブを返す。
+        SQLiteのロック待ちでイベントループを止めないよう、ジョブストアへの読み書きはスレッドで実行する。
+
+        Raises:
+            QueueFullError: 待機中のジョブが上限に達している場合
+        """
+        self._ensure_started()
+        async with self._submit_lock:
+            active = await asyncio.to_thread(self.store.find_active, video_id, max_comments, include_replies)
+            if active is not None:
+                return active
+            if self.pending >= self.max_pending:
+                raise QueueFullError(f"待機中のジョブが上限（{self.max_pending}件）に達しています")
+
+            job = await asyncio.to_thread(self.store.create, video_id, max_comments, priority, include_replies)
+            self._enqueue(job)
+            return job
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """待機中のジョブの順番（先頭が0。待機中でない場合はNone）"""
+        for position, entry in enumerate(self._pending):
+            if entry[2] == job_id:
+                return position
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            entry = await self._queue.get()
+            del self._pending[bisect.bisect_left(self._pending, entry)]
+            job_id = entry[2]
+            try:
+                job = await asyncio.to_thread(self.store.get, job_id)
+                if job is None or not await asyncio.to_thread(self.store.claim, job.id):
+                    continue
+                await self.runner(job)
+            except asyncio.CancelledError:
+                # 停止時に実行中だったジョブは次回起動時に再実行される
+                raise
+            except Exception as e:
+                logger.error("ジョブの実行エラー (%s): %s", job_id, e)
+                await asyncio.to_thread(self.store.fail, job_id, 500, f"ジョブの実行中にエラーが発生しました: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def stop(self) -> None:
+        """ワーカーを停止（実行中のジョブは保存済みの状態のまま次回起動時に再実行される）"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._pending.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """待機中のジョブ数とワーカー数"""
+        return {
+            "pending": self.pending,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+        }
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+LEASE_FLIGHTS = registry.counter(
+    "singleflight_cross_process_total",
+    "ワーカープロセス間の重複排除の件数（リースを取得して実行・他のプロセスの完了を待機）", ["result"]
+)
+
+# SQLiteのロック待ちの上限（秒）
+BUSY_TIMEOUT_SECONDS = 5.0
+
+
+class LeaseStore:
+    """
+    プロセス間で共有するリース（期限付きの排他ロック）をSQLiteで管理するクラス
+
+    保持しているプロセスが異常終了した場合も、期限を過ぎれば他のプロセスが取得できる。
+    メソッドはロック待ちでブロックするため、イベントループからはスレッド経由で呼び出す。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=BUSY_TIMEOUT_SECONDS)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # リースは停止時に失われてよいため、コミットごとのfsyncを省く
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            " key TEXT PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        """リースを取得（他の所有者の有効なリースがある場合はFalse）"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at"
+                " WHERE leases.expires_at <= ? OR leases.owner = excluded.owner",
+                (key, owner, now + ttl_seconds, now),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def renew(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        """保持しているリースの期限を延長（既に失っている場合はFalse）"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE key = ? AND owner = ?",
+                (time.time() + ttl_seconds, key, owner),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def release(self, key: str, owner: str) -> None:
+        """保持しているリースを解放"""
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+            self._conn.commit()
+
+    def is_held(self, key: str) -> bool:
+        """有効なリースがあるか"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM leases WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+
+class LeaseFlight:
+    """
+    同じキーに対する同時実行をワーカープロセス間でまとめるクラス
+
+    リースを取得したプロセスだけが処理を実行する。他のプロセスはリースが解放されるまで待ち、
+    共有キャッシュなどから結果を取得する（取得できない場合は自身で実行する）。
+    実行中はリースを定期的に延長し、プロセスが異常終了した場合は期限切れ後に他のプロセスが引き継ぐ。
+    """
+
+    def __init__(self, store: LeaseStore, ttl_seconds: float = 30.0, poll_interval: float = 0.05):
+        """
+        Args:
+            store: リースの保存先
+            ttl_seconds: リースの有効期間（実行中はttl_seconds / 3ごとに延長する）
+            poll_interval: 他のプロセスの完了を確認する間隔（秒）
+        """
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.executed = 0
+        self.waited = 0  # 他のプロセスの処理の完了を待った回数
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]],
+                 lookup: Callable[[], Optional[Any]]) -> Any:
+        """
+        プロセス間で重複を排除して処理を実行
+
+        Args:
+            key: 重複排除のキー
+            func: 実行するコルーチン関数
+            lookup: 他のプロセスが実行した処理の結果を取得する関数（ない場合はNone、スレッドで実行される）
+
+        Returns:
+            処理結果
+        """
+        while True:
+            try:
+                acquired = await asyncio.to_thread(self.store.acquire, key, self.owner, self.ttl_seconds)
+            except sqlite3.Error as e:
+                # リースを管理できない場合は重複排除を諦めて自身で実行する
+                logger.warning("リースを取得できませんでした: %s (%s)", key, e)
+                return await func()
+            if acquired:
+                return await self._run_with_lease(key, func, lookup)
+
+            self.waited += 1
+            LEASE_FLIGHTS.inc(result="waited")
+            logger.info("他のプロセスで実行中の処理を待機: %s", key)
+            while await self._is_held(key):
+                await asyncio.sleep(self.poll_interval)
+            result = await asyncio.to_thread(lookup)
+            if result is not None:
+                return result
+            # 結果が共有されなかった（失敗した）場合はリースを取得して自身で実行する
+
+    async def _is_held(self, key: str) -> bool:
+        try:
+            return await asyncio.to_thread(self.store.is_held, key)
+        except sqlite3.Error as e:
+            # 確認できない場合は待機をやめ、結果の取得または再取得に進む
+            logger.warning("リースを確認できませんでした: %s (%s)", key, e)
+            return False
+
+    async def _run_with_lease(self, key: str, func: Callable[[], Awaitable[Any]],
+                              lookup: Callable[[], Optional[Any]]) -> Any:
+        async def keep_alive() -> None:
+            while True:
+                await asyncio.sleep(self.ttl_seconds / 3)
+                try:
+                    renewed = await asyncio.to_thread(self.store.renew, key, self.owner, self.ttl_seconds)
+                except sqlite3.Error as e:
+                    # 一時的なロック競合の場合は次の周期で再試行する
+                    logger.warning("リースを延長できませんでした: %s (%s)", key, e)
+                    continue
+                if not renewed:
+                    logger.warning("リースを失いました: %s", key)
+                    return
+
+        try:
+            # 確認してからリースを取得するまでの間に他のプロセスが完了していれば、その結果を使う
+            result = await asyncio.to_thread(lookup)
+            if result is not None:
+                return result
+            self.executed += 1
+            LEASE_FLIGHTS.inc(result="executed")
+            heartbeat = asyncio.ensure_future(keep_alive())
+            try:
+                return await func()
+            finally:
+                heartbeat.cancel()
+        finally:
+            try:
+                await asyncio.to_thread(self.store.release, key, self.owner)
+            except sqlite3.Error as e:
+                # 解放できなかったリースは期限切れで他のプロセスが取得できる
+                logger.warning("リースを解放できませんでした: %s (%s)", key, e)
+
+    def stats(self) -> Dict[str, int]:
+        """実行・待機件数の統計情報を取得"""
+        return {
+            "executed": self.executed,
+            "waited": self.waited,
+        }
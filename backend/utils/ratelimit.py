@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# SQLiteのロック待ちの上限（秒）
+BUSY_TIMEOUT_SECONDS = 5.0
+
+
+class TokenBucket:
+    """
+    トークンバケット方式のレート制限
+
+    rate（トークン/秒）で補充され、最大capacityまで貯められる。
+    acquireはトークンが足りるまで待機する。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0:
+            raise ValueError("rateは正の値を指定してください")
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        """
+        トークンを消費（不足している場合は補充されるまで待機）
+
+        Args:
+            cost: 消費するトークン数
+        """
+        cost = min(cost, self.capacity)
+        # 待機中の呼び出しは到着順に処理する
+        async with self._lock:
+            self._refill()
+            while self._tokens < cost:
+                await asyncio.sleep((cost - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= cost
+
+    @property
+    def available(self) -> float:
+        """現在利用可能なトークン数"""
+        self._refill()
+        return self._tokens
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    指数バックオフの待機時間（フルジッター）
+
+    attempt回目（0始まり）の再試行前に、0〜min(cap, base * 2^attempt) 秒の一様乱数だけ待つ。
+    同時に失敗した呼び出しの再試行が同じ時刻に集中しないようにする。
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class DailyQuota:
+    """
+    1日あたりのクォータ予算
+
+    YouTube Data APIのクォータは太平洋時間の0時にリセットされるため、同じ時刻に使用量を0に戻す。
+    """
+
+    def __init__(self, limit: int, tz: Optional[tzinfo] = None):
+        """
+        Args:
+            limit: 1日に消費できるクォータ（0以下の場合は制限しない）
+            tz: 日付の切り替わりを判定するタイムゾーン（省略時は太平洋時間）
+        """
+        self.limit = limit
+        self.tz = tz or _pacific_timezone()
+        self._used = 0
+        self._day = self._today()
+
+    def _today(self) -> date:
+        return datetime.now(self.tz).date()
+
+    def _roll_over(self) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._used = 0
+
+    @property
+    def used(self) -> int:
+        """本日の消費クォータ"""
+        self._roll_over()
+        return self._used
+
+    @property
+    def remaining(self) -> Optional[int]:
+        """本日の残りクォータ（制限しない場合はNone）"""
+        if self.limit <= 0:
+            return None
+        return max(0, self.limit - self.used)
+
+    def try_consume(self, cost: int) -> bool:
+        """クォータを消費（残りが足りない場合は消費せずにFalse）"""
+        self._roll_over()
+        if self.limit > 0 and self._used + cost > self.limit:
+            return False
+        self._used += cost
+        return True
+
+    def exhaust(self) -> None:
+        """APIがクォータ超過を返した場合に、本日の残りを0にする"""
+        self._roll_over()
+        self._used = max(self._used, self.limit)
+
+    async def consume(self, cost: int) -> bool:
+        """try_consumeのイベントループ用"""
+        return self.try_consume(cost)
+
+    async def aexhaust(self) -> None:
+        """exhaustのイベントループ用"""
+        self.exhaust()
+
+    def seconds_until_reset(self) -> float:
+        """次にクォータがリセットされるまでの秒数"""
+        now = datetime.now(self.tz)
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=self.tz)
+        return max(0.0, (tomorrow - now).total_seconds())
+
+
+class SQLiteDailyQuota(DailyQuota):
+    """
+    複数のワーカープロセスで共有する1日のクォータ予算
+
+    日付ごとの消費クォータをSQLiteに保存し、全プロセスの合計で予算を判定する。
+    イベントループからはロック待ちでブロックしないよう、consume・aexhaustを使う。
+    """
+
+    def __init__(self, limit: int, path: str, tz: Optional[tzinfo] = None):
+        super().__init__(limit, tz)
+        self.path = path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=BUSY_TIMEOUT_SECONDS)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS quota_usage ("
+            " day TEXT PRIMARY KEY,"
+            " used INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    @property
+    def used(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT used FROM quota_usage WHERE day = ?", (self._today().isoformat(),)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def try_consume(self, cost: int) -> bool:
+        if self.limit > 0 and cost > self.limit:
+            return False
+        # 予算内の場合のみ加算する（1文で判定と加算を行うため、プロセス間で競合しない）
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO quota_usage (day, used) VALUES (?, ?)"
+                " ON CONFLICT(day) DO UPDATE SET used = used + excluded.used"
+                " WHERE ? <= 0 OR used + excluded.used <= ?",
+                (self._today().isoformat(), cost, self.limit, self.limit),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def exhaust(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO quota_usage (day, used) VALUES (?, ?)"
+                " ON CONFLICT(day) DO UPDATE SET used = MAX(used, excluded.used)",
+                (self._today().isoformat(), self.limit),
+            )
+            self._conn.commit()
+
+    async def consume(self, cost: int) -> bool:
+        try:
+            return await asyncio.to_thread(self.try_consume, cost)
+        except sqlite3.OperationalError as e:
+            # 共有ストアがロックされている場合は呼び出しを止めない（超過時はAPIのquotaExceededで検知できる）
+            logger.warning("クォータの使用量を記録できませんでした: %s", e)
+            self._rollback()
+            return True
+
+    async def aexhaust(self) -> None:
+        try:
+            await asyncio.to_thread(self.exhaust)
+        except sqlite3.OperationalError as e:
+            logger.warning("クォータの使い切りを記録できませんでした: %s", e)
+            self._rollback()
+
+    def _rollback(self) -> None:
+        with self._lock:
+            self._conn.rollback()
+
+
+def _pacific_timezone() -> tzinfo:
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo("America/Los_Angeles")
+    except Exception:
+        # タイムゾーンデータがない環境（Windowsでtzdata未インストールなど）ではUTCで代用する
+        return timezone.utc
+
+
+class CircuitBreaker:
+    """
+    サーキットブレーカー
+
+    連続してfailure_threshold回失敗すると開き（open）、reset_timeout秒の間は呼び出しを拒否する。
+    その後は1回だけ試行を許可し（half_open）、成功すれば閉じ、失敗すれば再び開く。
+    クォータ超過など復旧時刻がわかっている場合はtripで指定した時刻まで開く。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.reason = ""
+        self._state = self.CLOSED
+        self._open_until = 0.0
+        self._trial_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """現在の状態（開いている期間が過ぎた場合はhalf_open）"""
+        if self._state == self.OPEN and time.monotonic() >= self._open_until:
+            self._state = self.HALF_OPEN
+            self._trial_started = None
+        return self._state
+
+    @property
+    def retry_after(self) -> float:
+        """呼び出しが許可されるまでの秒数"""
+        return max(0.0, self._open_until - time.monotonic())
+
+    def allow(self) -> bool:
+        """
+        呼び出しを許可するか
+
+        half_openの間は1回の試行のみ許可する。試行が取り消されて結果が記録されない場合に備え、
+        reset_timeout秒を過ぎても結果がなければ次の試行を許可する。
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            now = time.monotonic()
+            if self._trial_started is None or now - self._trial_started >= self.reset_timeout:
+                self._trial_started = now
+                return True
+        return False
+
+    def record_success(self) -> None:
+        """呼び出しの成功を記録（half_openの場合は閉じる）"""
+        self.failures = 0
+        self.reason = ""
+        self._state = self.CLOSED
+        self._trial_started = None
+
+    def record_failure(self, reason: str = "errors") -> None:
+        """呼び出しの失敗を記録（連続失敗が閾値に達するか、試行中に失敗した場合は開く）"""
+        self.failures += 1
+        if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trip(self.reset_timeout, reason)
+
+    def trip(self, seconds: float, reason: str) -> None:
+        """指定した秒数の間、ブレーカーを開く"""
+        self._state = self.OPEN
+        self._open_until = time.monotonic() + seconds
+        self._trial_started = None
+        self.reason = reason
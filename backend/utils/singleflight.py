@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.leases import LeaseFlight
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+SINGLEFLIGHT_CALLS = registry.counter(
+    "singleflight_calls_total", "重複排除した処理の呼び出し件数（実行・実行中の処理への合流）", ["result"]
+)
+
+
+class SingleFlight:
+    """
+    同じキーに対する同時実行をまとめるクラス
+
+    実行中のキーに対して後から呼び出された場合は、新たに処理を開始せず
+    実行中の処理の結果（または例外）を共有する。
+    leasesを指定した場合は、他のワーカープロセスで実行中の処理ともまとめる。
+    """
+
+    def __init__(self, leases: Optional[LeaseFlight] = None):
+        """
+        Args:
+            leases: ワーカープロセス間で重複を排除する場合のリース（単一プロセスの場合はNone）
+        """
+        self.leases = leases
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]],
+                 lookup: Optional[Callable[[], Optional[Any]]] = None) -> Any:
+        """
+        キー単位で重複を排除して処理を実行
+
+        Args:
+            key: 重複排除のキー（動画IDなど）
+            func: 実行するコルーチン関数
+            lookup: 他のプロセスが実行した処理の結果を共有キャッシュから取得する関数（ない場合はNone）。
+                    省略した場合はプロセス内でのみ重複を排除する
+
+        Returns:
+            処理結果
+        """
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            SINGLEFLIGHT_CALLS.inc(result="coalesced")
+            logger.info("実行中の処理に合流: %s", key)
+        else:
+            # 呼び出し元がキャンセルされても共有中の処理は継続させるため独立したタスクで実行
+            if self.leases is not None and lookup is not None:
+                task = asyncio.ensure_future(self.leases.do(key, func, lookup))
+            else:
+                task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            self.executed += 1
+            SINGLEFLIGHT_CALLS.inc(result="executed")
+            task.add_done_callback(lambda t: self._on_done(key, t))
+
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: str, task: asyncio.Future) -> None:
+        """完了したタスクを実行中一覧から外す"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # 待機中の呼び出しが全てキャンセルされた場合に未取得の例外として警告されないようにする
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """実行・合流件数の統計情報を取得"""
+        stats: Dict[str, Any] = {
+            "in_flight": len(self._in_flight),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
+        if self.leases is not None:
+            stats["cross_process"] = self.leases.stats()
+        return stats
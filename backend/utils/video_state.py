@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VideoState:
+    """動画ごとの分析済み状態（差分再分析用）"""
+    video_id: str
+    checkpoint: str = ""  # 分析済みコメントの最新の投稿日時（ISO 8601）
+    sentiment: Dict[str, int] = field(default_factory=lambda: {'positive': 0, 'neutral': 0, 'negative': 0})
+    word_counts: Counter = field(default_factory=Counter)
+    total_comments: int = 0
+    updated_at: float = 0.0
+
+
+class VideoStateStore:
+    """動画ごとの分析済みコメントIDと集計結果をSQLiteに保存するクラス"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS video_state ("
+            " video_id TEXT PRIMARY KEY,"
+            " checkpoint TEXT NOT NULL,"
+            " sentiment TEXT NOT NULL,"
+            " word_counts TEXT NOT NULL,"
+            " total_comments INTEGER NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_comments ("
+            " video_id TEXT NOT NULL,"
+            " comment_id TEXT NOT NULL,"
+            " PRIMARY KEY (video_id, comment_id)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def load(self, video_id: str) -> Optional[VideoState]:
+        """
+        保存済みの状態を取得
+
+        Args:
+            video_id: YouTube動画ID
+
+        Returns:
+            保存済みの状態。未分析の場合はNone
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT checkpoint, sentiment, word_counts, total_comments, updated_at"
+                " FROM video_state WHERE video_id = ?",
+                (video_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return VideoState(
+            video_id=video_id,
+            checkpoint=row[0],
+            sentiment=json.loads(row[1]),
+            word_counts=Counter(json.loads(row[2])),
+            total_comments=row[3],
+            updated_at=row[4],
+        )
+
+    def filter_unseen(self, video_id: str, comment_ids: Iterable[str]) -> Set[str]:
+        """分析済みでないコメントIDを返す"""
+        ids = list(comment_ids)
+        if not ids:
+            return set()
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT comment_id FROM seen_comments WHERE video_id = ? AND comment_id IN ({placeholders})",
+                (video_id, *ids),
+            ).fetchall()
+        seen = {row[0] for row in rows}
+        return {comment_id for comment_id in ids if comment_id not in seen}
+
+    def save(self, state: VideoState, new_comment_ids: Iterable[str]) -> None:
+        """状態と新たに分析したコメントIDを保存"""
+        state.updated_at = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO video_state"
+                " (video_id, checkpoint, sentiment, word_counts, total_comments, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    state.video_id,
+                    state.checkpoint,
+                    json.dumps(state.sentiment),
+                    json.dumps(state.word_counts, ensure_ascii=False),
+                    state.total_comments,
+                    state.updated_at,
+                ),
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_comments (video_id, comment_id) VALUES (?, ?)",
+                [(state.video_id, comment_id) for comment_id in new_comment_ids],
+            )
+            self._conn.commit()
+
+    def delete(self, video_id: str) -> bool:
+        """動画の状態を削除（次回は初回と同様に分析し直す）。状態がなかった場合はFalse"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM video_state WHERE video_id = ?", (video_id,))
+            self._conn.execute("DELETE FROM seen_comments WHERE video_id = ?", (video_id,))
+            self._conn.commit()
+        return cursor.rowcount > 0
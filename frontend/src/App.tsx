@@ -1,17 +1,20 @@
 import { useState } from 'react';
 import './App.css';
-import InputForm from './components/InputForm';
+import InputForm, { AnalyzedVideo } from './components/InputForm';
 import SentimentChart from './components/SentimentChart';
+import TrendChart from './components/TrendChart';
 import WordCloud from './components/WordCloud';
 import { AnalysisResult } from './types';
 
 function App() {
   const [analysisResult, setAnalysisResult] = useState<AnalysisResult | null>(null);
+  const [analyzedVideo, setAnalyzedVideo] = useState<AnalyzedVideo | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
-  const handleAnalysisResult = (result: AnalysisResult) => {
+  const handleAnalysisResult = (result: AnalysisResult, video: AnalyzedVideo) => {
     setAnalysisResult(result);
+    setAnalyzedVideo(video);
     setError(null);
   };
 
@@ -71,6 +74,16 @@ function App() {
                   <WordCloud keywords={analysisResult.keywords} />
                 </div>
               </div>
+
+              {analyzedVideo && (
+                <div className="chart-section trend-section">
+                  <h3>感情の推移</h3>
+                  <TrendChart
+                    videoUrl={analyzedVideo.videoUrl}
+                    includeReplies={analyzedVideo.includeReplies}
+                  />
+                </div>
+              )}
             </div>
           )}
         </div>
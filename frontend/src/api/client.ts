@@ -1,4 +1,4 @@
-import { AnalysisResult } from '../types';
+import { AnalysisResult, TrendBucket, TrendResult } from '../types';
 
 declare const process: {
   env: {
@@ -23,7 +23,34 @@ export class ApiError extends Error {
 
 const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
 
-export const analyzeVideo = async (videoUrl: string): Promise<AnalysisResult> => {
+// ステータスコードに応じたエラーメッセージ（レスポンスにdetailがない場合に使用）
+const getStatusErrorMessage = (status: number): string => {
+  switch (status) {
+    case 400:
+      return '無効なリクエストです。YouTube URLを確認してください。';
+    case 403:
+      return 'YouTube APIの利用制限に達しました。しばらく待ってから再試行してください。';
+    case 404:
+      return '動画が見つかりません。URLを確認してください。';
+    case 429:
+      return 'リクエスト数が多すぎます。しばらく待ってから再試行してください。';
+    case 500:
+      return 'サーバー内部エラーが発生しました。';
+    case 503:
+      return 'YouTube APIが一時的に利用できません。しばらく待ってから再試行してください。';
+    default:
+      return `エラーが発生しました (${status})`;
+  }
+};
+
+export interface AnalyzeOptions {
+  includeReplies?: boolean; // 返信も分析するか
+}
+
+export const analyzeVideo = async (
+  videoUrl: string,
+  options: AnalyzeOptions = {}
+): Promise<AnalysisResult> => {
   let lastError: Error | null = null;
   
   for (let attempt = 1; attempt <= MAX_RETRY_ATTEMPTS; attempt++) {
@@ -35,6 +62,7 @@ export const analyzeVideo = async (videoUrl: string): Promise<AnalysisResult> =>
         },
         body: JSON.stringify({
           video_url: videoUrl,
+          include_replies: options.includeReplies ?? false,
         }),
       });
 
@@ -46,25 +74,7 @@ export const analyzeVideo = async (videoUrl: string): Promise<AnalysisResult> =>
           errorMessage = errorData.detail || errorMessage;
         } catch {
           // JSONパースに失敗した場合は、ステータスに基づいてメッセージを設定
-          switch (response.status) {
-            case 400:
-              errorMessage = '無効なリクエストです。YouTube URLを確認してください。';
-              break;
-            case 403:
-              errorMessage = 'YouTube APIの利用制限に達しました。しばらく待ってから再試行してください。';
-              break;
-            case 404:
-              errorMessage = '動画が見つかりません。URLを確認してください。';
-              break;
-            case 429:
-              errorMessage = 'リクエスト数が多すぎます。しばらく待ってから再試行してください。';
-              break;
-            case 500:
-              errorMessage = 'サーバー内部エラーが発生しました。';
-              break;
-            default:
-              errorMessage = `エラーが発生しました (${response.status})`;
-          }
+          errorMessage = getStatusErrorMessage(response.status);
         }
 
         // 403や429の場合は再試行しない
@@ -111,3 +121,43 @@ export const analyzeVideo = async (videoUrl: string): Promise<AnalysisResult> =>
   // すべての再試行が失敗した場合
   throw lastError || new ApiError('予期しないエラーが発生しました');
 };
+
+export const fetchTrends = async (
+  videoUrl: string,
+  bucket: TrendBucket,
+  options: AnalyzeOptions = {}
+): Promise<TrendResult> => {
+  let response: Response;
+  try {
+    response = await fetch(`${API_BASE_URL}/api/analyze/trends`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        video_url: videoUrl,
+        bucket,
+        include_replies: options.includeReplies ?? false,
+      }),
+    });
+  } catch {
+    throw new ApiError('サーバーに接続できません。ネットワーク接続を確認してください。');
+  }
+
+  if (!response.ok) {
+    let errorMessage: string;
+    try {
+      const errorData = await response.json();
+      errorMessage = errorData.detail || getStatusErrorMessage(response.status);
+    } catch {
+      errorMessage = getStatusErrorMessage(response.status);
+    }
+    throw new ApiError(errorMessage, response.status);
+  }
+
+  const data = await response.json();
+  if (!Array.isArray(data.timestamps) || !Array.isArray(data.positive)) {
+    throw new ApiError('サーバーから無効なデータが返されました');
+  }
+  return data;
+};
@@ -3,14 +3,20 @@ import { analyzeVideo } from '../api/client';
 import { AnalysisResult } from '../types';
 import './InputForm.css';
 
+export interface AnalyzedVideo {
+  videoUrl: string;
+  includeReplies: boolean;
+}
+
 interface InputFormProps {
-  onResult: (result: AnalysisResult) => void;
+  onResult: (result: AnalysisResult, video: AnalyzedVideo) => void;
   onError: (error: string) => void;
   onLoadingChange: (loading: boolean) => void;
 }
 
 const InputForm: React.FC<InputFormProps> = ({ onResult, onError, onLoadingChange }) => {
   const [videoUrl, setVideoUrl] = useState('');
+  const [includeReplies, setIncludeReplies] = useState(false);
   const [isSubmitting, setIsSubmitting] = useState(false);
 
   const validateYouTubeUrl = (url: string): boolean => {
@@ -35,8 +41,8 @@ const InputForm: React.FC<InputFormProps> = ({ onResult, onError, onLoadingChang
     onLoadingChange(true);
     
     try {
-      const result = await analyzeVideo(videoUrl);
-      onResult(result);
+      const result = await analyzeVideo(videoUrl, { includeReplies });
+      onResult(result, { videoUrl, includeReplies });
     } catch (error) {
       if (error instanceof Error) {
         onError(error.message);
@@ -75,6 +81,19 @@ const InputForm: React.FC<InputFormProps> = ({ onResult, onError, onLoadingChang
             required
           />
         </div>
+
+        <div className="form-group checkbox-group">
+          <label htmlFor="includeReplies" className="checkbox-label">
+            <input
+              type="checkbox"
+              id="includeReplies"
+              checked={includeReplies}
+              onChange={(e) => setIncludeReplies(e.target.checked)}
+              disabled={isSubmitting}
+            />
+            返信も分析する
+          </label>
+        </div>
         
         <button 
           type="submit" 
@@ -0,0 +1,131 @@
+import { useEffect, useState } from 'react';
+import {
+  Chart as ChartJS,
+  BarElement,
+  CategoryScale,
+  LinearScale,
+  Tooltip,
+  Legend,
+  TooltipItem,
+} from 'chart.js';
+import { Bar } from 'react-chartjs-2';
+import { fetchTrends } from '../api/client';
+import { TrendBucket, TrendResult } from '../types';
+import './TrendChart.css';
+
+ChartJS.register(BarElement, CategoryScale, LinearScale, Tooltip, Legend);
+
+interface TrendChartProps {
+  videoUrl: string;
+  includeReplies: boolean;
+}
+
+const formatTimestamp = (timestamp: string, bucket: TrendBucket): string => {
+  const date = new Date(timestamp);
+  const day = `${date.getMonth() + 1}/${date.getDate()}`;
+  return bucket === 'hour' ? `${day} ${date.getHours()}時` : day;
+};
+
+const TrendChart: React.FC<TrendChartProps> = ({ videoUrl, includeReplies }) => {
+  const [bucket, setBucket] = useState<TrendBucket>('day');
+  const [trends, setTrends] = useState<TrendResult | null>(null);
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState<string | null>(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    setLoading(true);
+    setError(null);
+
+    fetchTrends(videoUrl, bucket, { includeReplies })
+      .then((result) => {
+        if (!cancelled) setTrends(result);
+      })
+      .catch((e: unknown) => {
+        if (!cancelled) {
+          setTrends(null);
+          setError(e instanceof Error ? e.message : '推移の取得中にエラーが発生しました');
+        }
+      })
+      .finally(() => {
+        if (!cancelled) setLoading(false);
+      });
+
+    return () => {
+      cancelled = true;
+    };
+  }, [videoUrl, includeReplies, bucket]);
+
+  const data = trends && {
+    labels: trends.timestamps.map((timestamp) => formatTimestamp(timestamp, trends.bucket)),
+    datasets: [
+      { label: 'ポジティブ', data: trends.positive, backgroundColor: '#28a745' },
+      { label: 'ニュートラル', data: trends.neutral, backgroundColor: '#ffc107' },
+      { label: 'ネガティブ', data: trends.negative, backgroundColor: '#dc3545' },
+    ],
+  };
+
+  const options = {
+    responsive: true,
+    maintainAspectRatio: false,
+    scales: {
+      x: { stacked: true },
+      y: { stacked: true, beginAtZero: true },
+    },
+    plugins: {
+      legend: {
+        position: 'bottom' as const,
+      },
+      tooltip: {
+        callbacks: {
+          // 各バケットの上位キーワードを表示
+          footer: (items: TooltipItem<'bar'>[]) => {
+            const keywords = trends?.keywords[items[0]?.dataIndex ?? 0] ?? [];
+            return keywords.length > 0 ? `キーワード: ${keywords.map((k) => k.word).join('、')}` : '';
+          },
+        },
+      },
+    },
+  };
+
+  return (
+    <div className="trend-chart-container">
+      <div className="trend-controls" role="group" aria-label="集計単位">
+        <button
+          type="button"
+          className={bucket === 'day' ? 'active' : ''}
+          onClick={() => setBucket('day')}
+          disabled={loading}
+        >
+          日ごと
+        </button>
+        <button
+          type="button"
+          className={bucket === 'hour' ? 'active' : ''}
+          onClick={() => setBucket('hour')}
+          disabled={loading}
+        >
+          時間ごと
+        </button>
+      </div>
+
+      {loading && <p className="trend-message">推移を集計中...</p>}
+      {error && !loading && <p className="trend-message trend-error">{error}</p>}
+
+      {data && !loading && (
+        <>
+          <div className="trend-chart-wrapper">
+            <Bar data={data} options={options} />
+          </div>
+          {trends && trends.omitted_comments > 0 && (
+            <p className="trend-message">
+              投稿日時が不明なコメントや期間外のコメント {trends.omitted_comments}件 は含まれていません
+            </p>
+          )}
+        </>
+      )}
+    </div>
+  );
+};
+
+export default TrendChart;
@@ -1,6 +1,7 @@
 export interface KeywordItem {
   word: string;
   count: number;
+  error?: number | null;
 }
 
 export interface SentimentData {
@@ -13,4 +14,18 @@ export interface AnalysisResult {
   sentiment: SentimentData;
   keywords: KeywordItem[];
   total_comments: number;
+}
+
+export type TrendBucket = 'hour' | 'day';
+
+// 時系列は列ごとの配列（timestamps[i] のバケットの値が positive[i] など）
+export interface TrendResult {
+  bucket: TrendBucket;
+  timestamps: string[];
+  positive: number[];
+  neutral: number[];
+  negative: number[];
+  keywords: KeywordItem[][];
+  total_comments: number;
+  omitted_comments: number;
 }
\ No newline at end of file